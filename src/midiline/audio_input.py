@@ -1,14 +1,26 @@
 import time
 from typing import Generator, Optional
 
+import numpy as np
 import pyaudio
 
+INT16_SCALE = np.float32(1.0 / 32768.0)
+
 
 class AudioInput:
-    """Simple wrapper around PyAudio for reading fixed-length audio blocks."""
+    """Simple wrapper around PyAudio for reading fixed-length audio blocks.
+
+    :meth:`read` and :meth:`blocks` return the raw int16 bytes. :meth:`frames`
+    yields float32 NumPy blocks instead. With ``callback=True`` PyAudio
+    delivers audio on its own thread and each block is scaled straight from
+    the driver buffer into a preallocated ring of ``ring_blocks`` slots; the
+    callback never allocates or locks, and when the consumer falls behind new
+    blocks are dropped and counted in :attr:`overflows`.
+    """
 
     def __init__(self, device_index: Optional[int] = None, sample_rate: int = 44100,
-                 buffer_size: int = 1024, channels: int = 1):
+                 buffer_size: int = 1024, channels: int = 1, callback: bool = False,
+                 ring_blocks: int = 32):
         """Initialize the audio input configuration.
 
         Parameters
@@ -22,14 +34,28 @@ class AudioInput:
             Number of frames per block returned by :meth:`read`.
         channels:
             Number of audio channels to capture.
+        callback:
+            Open the stream in non-blocking callback mode.
+        ring_blocks:
+            Number of blocks the callback mode can hold before dropping.
         """
         self.device_index = device_index
         self.sample_rate = sample_rate
         self.buffer_size = buffer_size
         self.channels = channels
+        self.callback = callback
         self._pyaudio = pyaudio.PyAudio()
         self._stream = None
 
+        self.capacity = max(1, int(ring_blocks)) if callback else 1
+        self._ring = np.zeros((self.capacity, buffer_size, channels), dtype=np.float32)
+        self._times = np.zeros(self.capacity)
+        self._head = 0
+        self._tail = 0
+        self.overflows = 0
+        self.input_overflows = 0
+        self.time = 0.0
+
     def open(self) -> None:
         """Open the input stream with the configured parameters."""
         if self._stream is not None:
@@ -41,12 +67,39 @@ class AudioInput:
             input=True,
             frames_per_buffer=self.buffer_size,
             input_device_index=self.device_index,
+            stream_callback=self._on_audio if self.callback else None,
         )
 
+    def _store(self, slot: int, data: bytes, adc_time: float) -> None:
+        """Scale int16 ``data`` into ring slot ``slot`` without temporaries."""
+        samples = np.frombuffer(data, dtype=np.int16).reshape(-1, self.channels)
+        np.multiply(samples, INT16_SCALE, out=self._ring[slot, :len(samples)])
+        self._times[slot] = adc_time
+
+    def _on_audio(self, in_data, frame_count, time_info, status):
+        now = time.perf_counter()
+        if status & pyaudio.paInputOverflow:
+            self.input_overflows += 1
+        head = self._head
+        if head - self._tail >= self.capacity:
+            self.overflows += 1
+            return None, pyaudio.paContinue
+        current = time_info.get("current_time", 0.0) if time_info else 0.0
+        captured = time_info.get("input_buffer_adc_time", 0.0) if time_info else 0.0
+        if current and captured:
+            adc_time = now - (current - captured)
+        else:
+            adc_time = now - frame_count / self.sample_rate
+        self._store(head % self.capacity, in_data, adc_time)
+        self._head = head + 1
+        return None, pyaudio.paContinue
+
     def read(self) -> bytes:
         """Read one block of audio from the stream."""
         if self._stream is None:
             raise RuntimeError("Stream is not open")
+        if self.callback:
+            raise RuntimeError("read() is not available in callback mode, use frames()")
         return self._stream.read(self.buffer_size, exception_on_overflow=False)
 
     def blocks(self) -> Generator[bytes, None, None]:
@@ -57,6 +110,35 @@ class AudioInput:
         finally:
             self.close()
 
+    def frames(self) -> Generator[np.ndarray, None, None]:
+        """Yield float32 blocks in ``[-1, 1)`` until the stream is closed.
+
+        Blocks have shape ``(buffer_size,)`` for mono input and
+        ``(buffer_size, channels)`` otherwise. Each is a view into the ring
+        and stays valid only until the next iteration; :attr:`time` holds
+        its capture time on the :func:`time.perf_counter` clock, as expected
+        by :meth:`RealTimeProcessor.process_block`.
+        """
+        if self._stream is None:
+            raise RuntimeError("Stream is not open")
+        ring = self._ring if self.channels > 1 else self._ring[:, :, 0]
+        period = self.buffer_size / self.sample_rate
+        while self._stream is not None:
+            if not self.callback:
+                data = self._stream.read(self.buffer_size, exception_on_overflow=False)
+                self._store(0, data, time.perf_counter() - period)
+                self.time = self._times[0]
+                yield ring[0]
+                continue
+            tail = self._tail
+            if tail == self._head:
+                time.sleep(period / 4)
+                continue
+            slot = tail % self.capacity
+            self.time = self._times[slot]
+            yield ring[slot]
+            self._tail = tail + 1
+
     def close(self) -> None:
         """Stop and close the stream and release PyAudio resources."""
         if self._stream is not None:
@@ -69,14 +151,15 @@ class AudioInput:
 
 
 def demo(duration: float = 5.0, **kwargs) -> None:
-    """Simple demo that prints a few audio blocks for ``duration`` seconds."""
-    ai = AudioInput(**kwargs)
+    """Simple demo that prints the level of each block for ``duration`` seconds."""
+    ai = AudioInput(callback=True, **kwargs)
     ai.open()
     start = time.time()
-    for block in ai.blocks():
-        print(block)
+    for block in ai.frames():
+        print(f"{float(np.sqrt(np.mean(np.square(block)))):.4f}")
         if time.time() - start > duration:
             break
+    print(f"bloques descartados: {ai.overflows}")
     ai.close()
 
 
@@ -0,0 +1 @@
+"""Offline replay and benchmarks for the real-time pipeline."""
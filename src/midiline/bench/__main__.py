@@ -0,0 +1,82 @@
+"""Headless benchmark: ``python -m midiline.bench``."""
+
+import click
+
+from ..pitch_engines import engine_names
+from ..polyphonic import PolyphonicProcessor
+from .replay import replay
+from .signals import SIGNALS
+
+COLUMNS = (
+    ("engine", "motor", "{:>13}"),
+    ("block_size", "bloque", "{:>6d}"),
+    ("p50_ms", "p50 ms", "{:>7.3f}"),
+    ("p99_ms", "p99 ms", "{:>7.3f}"),
+    ("max_ms", "máx ms", "{:>7.3f}"),
+    ("realtime_factor", "x t.real", "{:>8.1f}"),
+    ("worst_headroom", "margen", "{:>7.1f}"),
+    ("onset_latency_ms", "lat. ms", "{:>7.1f}"),
+    ("missed", "perdidas", "{:>8d}"),
+    ("false_positives", "falsas", "{:>6d}"),
+)
+
+
+def _print_table(title, rows):
+    click.echo(title)
+    click.echo(" ".join(f"{header:>{len(fmt.format(0))}}" for _, header, fmt in COLUMNS))
+    for row in rows:
+        click.echo(" ".join(fmt.format(row[key]) for key, _, fmt in COLUMNS))
+
+
+@click.command()
+@click.option('--wav', 'wavs', multiple=True, type=click.Path(exists=True),
+              help='Archivo WAV a reproducir (sin referencia de notas)')
+@click.option('--signal', 'signals', multiple=True, type=click.Choice(sorted(SIGNALS)),
+              help='Señal sintética (por defecto todas si no se indica --wav)')
+@click.option('--block-sizes', default='64,128,256,512,1024,2048',
+              help='Tamaños de bloque separados por comas')
+@click.option('--window-size', default=2048, type=int, help='Ventana de análisis')
+@click.option('--hop-size', default=None, type=int,
+              help='Salto de análisis (por defecto el tamaño de bloque)')
+@click.option('--sample-rate', default=44100, type=int,
+              help='Frecuencia de muestreo de las señales sintéticas')
+@click.option('--cutoff', default=None, type=float, help='Filtro paso alto (Hz)')
+@click.option('--gate-threshold', default=0.0, type=float, help='Umbral de la puerta de ruido')
+@click.option('--pitch-engine', 'engines', multiple=True, type=click.Choice(engine_names()),
+              help='Detector de tono; repetir para compararlos sobre la misma entrada')
+@click.option('--polyphonic', is_flag=True,
+              help='Usa PolyphonicProcessor (la ventana mínima pasa a 4096)')
+def main(wavs, signals, block_sizes, window_size, hop_size, sample_rate, cutoff,
+         gate_threshold, engines, polyphonic):
+    """Reproduce señales a través de RealTimeProcessor y mide su rendimiento."""
+    sizes = [int(size) for size in block_sizes.split(',') if size.strip()]
+    inputs = []
+    for name in signals or ([] if wavs else sorted(SIGNALS)):
+        signal, truth = SIGNALS[name](sr=sample_rate)
+        inputs.append((name, signal, sample_rate, truth))
+    if wavs:
+        from ..transcribe import load_audio
+
+        for path in wavs:
+            signal, sr = load_audio(path)
+            inputs.append((path, signal, sr, None))
+
+    options = dict(cutoff=cutoff, gate_threshold=gate_threshold)
+    runs = [(engine, dict(options, pitch_engine=engine)) for engine in engines or ('yin',)]
+    if polyphonic:
+        runs = [('poly', dict(options, processor_class=PolyphonicProcessor))]
+        window_size = max(window_size, 4096)
+    for name, signal, sr, truth in inputs:
+        rows = []
+        for label, run_options in runs:
+            for size in sizes:
+                result = replay(
+                    signal, sr, size, truth=truth,
+                    window_size=max(window_size, size), hop_size=hop_size, **run_options,
+                )
+                rows.append(dict(result.summary(), engine=label))
+        _print_table(f"== {name} ({len(signal) / sr:.1f} s)", rows)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,150 @@
+"""Deterministic offline replay of audio through :class:`RealTimeProcessor`."""
+
+from __future__ import annotations
+
+import contextlib
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import mido
+import numpy as np
+
+from ..events import NoteEvent
+from ..realtime import RealTimeProcessor
+
+
+class CapturePort:
+    """In-memory stand-in for a mido output port.
+
+    Messages are stamped with :attr:`position`, the stream time in seconds
+    set by the replay loop before each send.
+    """
+
+    def __init__(self) -> None:
+        self.position = 0.0
+        self.messages: List[Tuple[float, mido.Message]] = []
+        self.closed = False
+
+    def send(self, msg: mido.Message) -> None:
+        self.messages.append((self.position, msg))
+
+    def close(self) -> None:
+        self.closed = True
+
+
+@contextlib.contextmanager
+def capture_output() -> Iterator[List[CapturePort]]:
+    """Replace ``mido.open_output`` with a factory of :class:`CapturePort`."""
+    ports: List[CapturePort] = []
+
+    def open_output(*args, **kwargs):
+        port = CapturePort()
+        ports.append(port)
+        return port
+
+    original = mido.open_output
+    mido.open_output = open_output
+    try:
+        yield ports
+    finally:
+        mido.open_output = original
+
+
+@dataclass
+class ReplayResult:
+    block_size: int
+    sample_rate: int
+    block_times: np.ndarray
+    messages: List[Tuple[float, mido.Message]]
+    latencies: List[float] = field(default_factory=list)
+    missed: int = 0
+    false_positives: int = 0
+    stats: Optional[dict] = None
+
+    @property
+    def audio_seconds(self) -> float:
+        return len(self.block_times) * self.block_size / self.sample_rate
+
+    def summary(self) -> Dict[str, float]:
+        times = self.block_times
+        period = self.block_size / self.sample_rate
+        busy = float(np.sum(times))
+        latencies = np.asarray(self.latencies)
+        return {
+            "block_size": self.block_size,
+            "blocks": len(times),
+            "p50_ms": float(np.percentile(times, 50)) * 1e3 if len(times) else 0.0,
+            "p95_ms": float(np.percentile(times, 95)) * 1e3 if len(times) else 0.0,
+            "p99_ms": float(np.percentile(times, 99)) * 1e3 if len(times) else 0.0,
+            "max_ms": float(np.max(times)) * 1e3 if len(times) else 0.0,
+            "realtime_factor": self.audio_seconds / busy if busy > 0 else float("inf"),
+            "worst_headroom": period / float(np.max(times)) if len(times) else float("inf"),
+            "onset_latency_ms": float(np.median(latencies)) * 1e3 if latencies.size else float("nan"),
+            "onset_latency_max_ms": float(np.max(latencies)) * 1e3 if latencies.size else float("nan"),
+            "missed": self.missed,
+            "false_positives": self.false_positives,
+        }
+
+
+def match_onsets(messages: List[Tuple[float, mido.Message]], truth: List[NoteEvent],
+                 tolerance: float = 0.1) -> Tuple[List[float], int, int]:
+    """Pair ground-truth notes with the first matching emitted note-on.
+
+    Returns ``(latencies, missed, false_positives)`` where a note counts as
+    found if a note-on with the same number arrives between its start and
+    ``tolerance`` seconds after its end.
+    """
+    onsets = [(t, msg.note) for t, msg in messages if msg.type == "note_on" and msg.velocity > 0]
+    used = [False] * len(onsets)
+    latencies = []
+    missed = 0
+    for event in truth:
+        for i, (t, note) in enumerate(onsets):
+            if used[i] or note != event.note:
+                continue
+            if event.start <= t <= event.end + tolerance:
+                used[i] = True
+                latencies.append(t - event.start)
+                break
+        else:
+            missed += 1
+    return latencies, missed, used.count(False)
+
+
+def replay(signal: np.ndarray, sample_rate: int, block_size: int,
+           truth: Optional[List[NoteEvent]] = None,
+           processor_class: type = RealTimeProcessor, **processor_options) -> ReplayResult:
+    """Feed ``signal`` through a fresh processor ``block_size`` samples at a time.
+
+    MIDI output goes to a :class:`CapturePort` and is drained synchronously
+    after every block, so emitted notes are stamped with the stream time at
+    the end of the block that produced them.
+    """
+    signal = np.asarray(signal, dtype=np.float32)
+    num_blocks = len(signal) // block_size
+    block_times = np.zeros(num_blocks)
+    with capture_output() as ports:
+        processor = processor_class(
+            buffer_size=block_size, samplerate=sample_rate, threaded_output=False,
+            **processor_options,
+        )
+    port = ports[0]
+    try:
+        for i in range(num_blocks):
+            block = signal[i * block_size:(i + 1) * block_size]
+            start = time.perf_counter()
+            processor.process_block(block, time=i * block_size / sample_rate)
+            block_times[i] = time.perf_counter() - start
+            port.position = (i + 1) * block_size / sample_rate
+            processor.sender.drain()
+        stats = processor.stats()
+    finally:
+        processor.close()
+
+    result = ReplayResult(block_size, sample_rate, block_times, port.messages, stats=stats)
+    if truth is not None:
+        result.latencies, result.missed, result.false_positives = match_onsets(
+            port.messages, truth
+        )
+    return result
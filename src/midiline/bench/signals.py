@@ -0,0 +1,126 @@
+"""Synthetic test signals with ground-truth note events."""
+
+from __future__ import annotations
+
+from typing import List, Sequence, Tuple
+
+import numpy as np
+
+from ..events import NoteEvent
+
+Signal = Tuple[np.ndarray, List[NoteEvent]]
+
+
+def midi_to_hz(note: float) -> float:
+    return 440.0 * 2.0 ** ((note - 69) / 12.0)
+
+
+def _sequence(render, notes: Sequence[int], sr: int, note_duration: float,
+              gap: float, amplitude: float) -> Signal:
+    """Concatenate ``render(freq, n)`` for each note, separated by silence."""
+    note_len = int(note_duration * sr)
+    gap_len = int(gap * sr)
+    parts = [np.zeros(gap_len, dtype=np.float32)]
+    truth = []
+    position = gap_len
+    for note in notes:
+        parts.append((amplitude * render(midi_to_hz(note), note_len)).astype(np.float32))
+        parts.append(np.zeros(gap_len, dtype=np.float32))
+        truth.append(NoteEvent(position / sr, (position + note_len) / sr, amplitude,
+                               note=int(note)))
+        position += note_len + gap_len
+    return np.concatenate(parts), truth
+
+
+def sines(notes: Sequence[int] = (45, 57, 64, 69, 76), sr: int = 44100,
+          note_duration: float = 0.5, gap: float = 0.25, amplitude: float = 0.5) -> Signal:
+    """Pure sine tones separated by silence."""
+    def render(freq, n):
+        return np.sin(2 * np.pi * freq * np.arange(n) / sr)
+
+    return _sequence(render, notes, sr, note_duration, gap, amplitude)
+
+
+def plucks(notes: Sequence[int] = (40, 45, 50, 55, 59, 64), sr: int = 44100,
+           note_duration: float = 0.6, gap: float = 0.15, amplitude: float = 0.8,
+           seed: int = 0) -> Signal:
+    """Karplus-Strong plucked strings, a rough stand-in for guitar notes."""
+    rng = np.random.default_rng(seed)
+
+    def render(freq, n):
+        period = max(2, int(round(sr / freq)))
+        out = np.zeros(n)
+        out[:period] = rng.uniform(-1.0, 1.0, period)
+        for start in range(period, n, period):
+            stop = min(start + period, n)
+            prev = out[start - period:stop - period]
+            nxt = out[start - period + 1:stop - period + 1]
+            if len(nxt) < len(prev):
+                nxt = np.append(nxt, out[stop - 1])
+            out[start:stop] = 0.996 * 0.5 * (prev + nxt)
+        return out / max(1e-9, float(np.max(np.abs(out))))
+
+    return _sequence(render, notes, sr, note_duration, gap, amplitude)
+
+
+def glissando(start_note: float = 52, end_note: float = 64, sr: int = 44100,
+              duration: float = 2.0, lead_in: float = 0.25, amplitude: float = 0.5) -> Signal:
+    """Exponential sweep; ground truth has one event per semitone crossed."""
+    n = int(duration * sr)
+    notes = start_note + (end_note - start_note) * np.arange(n) / n
+    freqs = 440.0 * 2.0 ** ((notes - 69) / 12.0)
+    phase = 2 * np.pi * np.cumsum(freqs) / sr
+    tone = (amplitude * np.sin(phase)).astype(np.float32)
+    lead = np.zeros(int(lead_in * sr), dtype=np.float32)
+
+    nearest = np.round(notes).astype(int)
+    changes = np.flatnonzero(np.diff(nearest)) + 1
+    bounds = np.concatenate([[0], changes, [n]])
+    truth = [
+        NoteEvent((len(lead) + a) / sr, (len(lead) + b) / sr, amplitude, note=int(nearest[a]))
+        for a, b in zip(bounds[:-1], bounds[1:])
+    ]
+    return np.concatenate([lead, tone]), truth
+
+
+def chords(chords: Sequence[Sequence[int]] = ((48, 52, 55), (45, 52, 57, 60), (40, 47, 52, 56)),
+           sr: int = 44100, chord_duration: float = 0.8, gap: float = 0.2,
+           amplitude: float = 0.8, harmonics: int = 6) -> Signal:
+    """Harmonic tones played together; every chord note is a ground-truth event."""
+    chord_len = int(chord_duration * sr)
+    gap_len = int(gap * sr)
+    t = np.arange(chord_len) / sr
+    decay = np.exp(-2.0 * t)
+    parts = [np.zeros(gap_len, dtype=np.float32)]
+    truth = []
+    position = gap_len
+    for notes in chords:
+        mix = np.zeros(chord_len)
+        for note in notes:
+            freq = midi_to_hz(note)
+            for h in range(1, harmonics + 1):
+                mix += np.sin(2 * np.pi * freq * h * t) * 0.7 ** (h - 1)
+            truth.append(NoteEvent(position / sr, (position + chord_len) / sr, amplitude,
+                                   note=int(note)))
+        mix *= decay * amplitude / max(1e-9, float(np.max(np.abs(mix))))
+        parts.append(mix.astype(np.float32))
+        parts.append(np.zeros(gap_len, dtype=np.float32))
+        position += chord_len + gap_len
+    return np.concatenate(parts), truth
+
+
+def noise(sr: int = 44100, duration: float = 2.0, amplitude: float = 0.05,
+          seed: int = 0) -> Signal:
+    """White noise; any emitted note is a false positive."""
+    rng = np.random.default_rng(seed)
+    signal = (amplitude * rng.standard_normal(int(duration * sr))).astype(np.float32)
+    return signal, []
+
+
+SIGNALS = {
+    "sines": sines,
+    "plucks": plucks,
+    "glissando": glissando,
+    "chords": chords,
+    "noise": noise,
+}
@@ -0,0 +1,248 @@
+"""Audio capture and analysis in a child process.
+
+Running :class:`RealTimeProcessor` in its own interpreter keeps the GUI's
+event loop from competing with the audio callback for the GIL. The child
+publishes meter data through a :class:`MeterRing` in shared memory and
+receives parameter changes over a small command queue.
+"""
+
+from __future__ import annotations
+
+import multiprocessing as mp
+import queue
+import time
+from dataclasses import fields
+from multiprocessing import shared_memory
+from typing import Callable, Dict, Optional
+
+import numpy as np
+
+from .realtime import Parameters
+
+METER_FIELDS = ("time", "level", "pitch", "note")
+
+# Processor settings that can be changed while running. They reach the
+# child's processor through ``update``, never its constructor.
+PARAMETERS = tuple(field.name for field in fields(Parameters))
+
+
+class MeterRing:
+    """Single-producer ring of meter records in shared memory.
+
+    The block starts with an int64 count of records written, followed by
+    ``capacity`` float64 records with the fields in :data:`METER_FIELDS`.
+    The writer fills a record before advancing the count, so readers only
+    see complete records as long as they keep up within ``capacity``.
+    """
+
+    def __init__(self, name: Optional[str] = None, capacity: int = 256) -> None:
+        self.capacity = int(capacity)
+        size = 8 + self.capacity * len(METER_FIELDS) * 8
+        create = name is None
+        self._shm = shared_memory.SharedMemory(name=name, create=create, size=size)
+        self.name = self._shm.name
+        self._count = np.ndarray((1,), dtype=np.int64, buffer=self._shm.buf)
+        self._records = np.ndarray(
+            (self.capacity, len(METER_FIELDS)), dtype=np.float64, buffer=self._shm.buf, offset=8
+        )
+        if create:
+            self._count[0] = 0
+
+    @property
+    def count(self) -> int:
+        return int(self._count[0])
+
+    def write(self, time: float, level: float, pitch: float, note: float) -> None:
+        count = int(self._count[0])
+        record = self._records[count % self.capacity]
+        record[0] = time
+        record[1] = level
+        record[2] = pitch
+        record[3] = note
+        self._count[0] = count + 1
+
+    def latest(self) -> Optional[Dict[str, float]]:
+        """Most recent record as a dict, or ``None`` if nothing was written."""
+        count = self.count
+        if count == 0:
+            return None
+        values = self._records[(count - 1) % self.capacity].tolist()
+        return dict(zip(METER_FIELDS, values))
+
+    def history(self, n: Optional[int] = None) -> np.ndarray:
+        """Copy of the last ``n`` records (all available by default), oldest first."""
+        count = self.count
+        n = min(count, self.capacity if n is None else int(n), self.capacity)
+        index = np.arange(count - n, count) % self.capacity
+        return self._records[index].copy()
+
+    def close(self) -> None:
+        # Views into the buffer must go before the mapping can be closed.
+        self._count = None
+        self._records = None
+        self._shm.close()
+
+    def unlink(self) -> None:
+        self._shm.unlink()
+
+
+def apply_parameter(processor, name: str, value) -> None:
+    """Apply one command-queue parameter change to ``processor``."""
+    if name not in PARAMETERS:
+        raise ValueError(f"unknown parameter: {name!r}")
+    processor.update(**{name: value})
+
+
+def build_processor(config: dict, processor_class: Optional[Callable] = None):
+    """Create the child's processor from ``config``.
+
+    Constructor arguments come from ``config["processor"]``. Settings in
+    :data:`PARAMETERS`, there or under ``params``, are applied afterwards
+    with ``update``, since the constructor does not take all of them.
+    """
+    if processor_class is None:
+        from .realtime import RealTimeProcessor as processor_class
+
+    options = dict(config.get("processor", {}))
+    params = {name: options.pop(name) for name in PARAMETERS if name in options}
+    params.update(config.get("params", {}))
+    processor = processor_class(**options)
+    if params:
+        processor.update(**params)
+    return processor
+
+
+def capture_main(config: dict, meter_name: str, commands, stop) -> None:
+    """Child process entry point: capture with sounddevice and analyse.
+
+    ``config`` holds ``device``, ``input_channel``, the ``meter_capacity``
+    of the parent's :class:`MeterRing` and the processor settings read by
+    :func:`build_processor`.
+    """
+    import sounddevice as sd
+
+    from .realtime import adc_time
+
+    meters = MeterRing(meter_name, capacity=config.get("meter_capacity", 256))
+    options = config.get("processor", {})
+    samplerate = options.get("samplerate", 44100)
+    buffer_size = options.get("buffer_size", 1024)
+    input_channel = int(config.get("input_channel", 0))
+    processor = build_processor(config)
+
+    def callback(indata, frames, time_info, status):
+        samples = indata[:, input_channel]
+        processor.process_block(samples, status, adc_time(time_info, frames, samplerate))
+        level = float(np.sqrt(np.dot(samples, samples) / max(1, frames)))
+        note = processor.last_note if processor.last_note is not None else -1
+        meters.write(processor.position, level, processor.smoothed_pitch, note)
+
+    try:
+        with sd.InputStream(
+            device=config.get("device"),
+            channels=input_channel + 1,
+            callback=callback,
+            blocksize=buffer_size,
+            samplerate=samplerate,
+            dtype="float32",
+        ):
+            while not stop.is_set():
+                drain_commands(commands, processor)
+                stop.wait(0.02)
+    finally:
+        processor.close()
+        meters.close()
+
+
+def drain_commands(commands, processor) -> None:
+    """Apply every pending ``(name, value)`` command without blocking."""
+    while True:
+        try:
+            name, value = commands.get_nowait()
+        except queue.Empty:
+            return
+        apply_parameter(processor, name, value)
+
+
+class CaptureProcess:
+    """Run ``target`` (by default :func:`capture_main`) in a child process.
+
+    :meth:`set` forwards parameter changes to the child and remembers them,
+    so a child restarted by :meth:`check` after an unexpected exit starts
+    with the current values. :meth:`stop` asks the child to finish, waits up
+    to ``timeout`` seconds and only then terminates it.
+    """
+
+    def __init__(self, config: dict, target: Callable = capture_main,
+                 meter_capacity: int = 256, timeout: float = 2.0) -> None:
+        self.config = dict(config)
+        self.target = target
+        self.timeout = float(timeout)
+        self.meters = MeterRing(capacity=meter_capacity)
+        self.restarts = 0
+        self._ctx = mp.get_context("spawn")
+        self._commands = None
+        self._stop = None
+        self._process = None
+        self._params: Dict[str, object] = {}
+
+    def start(self) -> None:
+        if self.is_alive():
+            return
+        config = dict(self.config)
+        config["params"] = dict(config.get("params", {}), **self._params)
+        config["meter_capacity"] = self.meters.capacity
+        self._commands = self._ctx.Queue()
+        self._stop = self._ctx.Event()
+        self._process = self._ctx.Process(
+            target=self.target,
+            args=(config, self.meters.name, self._commands, self._stop),
+            name="midiline-capture",
+            daemon=True,
+        )
+        self._process.start()
+
+    def is_alive(self) -> bool:
+        return self._process is not None and self._process.is_alive()
+
+    @property
+    def exitcode(self) -> Optional[int]:
+        return None if self._process is None else self._process.exitcode
+
+    def set(self, name: str, value) -> None:
+        """Change a processor parameter in the running child."""
+        if name not in PARAMETERS:
+            raise ValueError(f"unknown parameter: {name!r}")
+        self._params[name] = value
+        if self._commands is not None:
+            self._commands.put((name, value))
+
+    def check(self) -> bool:
+        """Restart the child if it died; return ``True`` when it did."""
+        if self._process is None or self._stop.is_set() or self._process.is_alive():
+            return False
+        self._process.join()
+        self.restarts += 1
+        self.start()
+        return True
+
+    def meter(self) -> Optional[Dict[str, float]]:
+        return self.meters.latest()
+
+    def stop(self) -> None:
+        """Stop the child cleanly and release the shared memory."""
+        if self._process is not None:
+            self._stop.set()
+            self._process.join(self.timeout)
+            if self._process.is_alive():
+                self._process.terminate()
+                self._process.join()
+            self._process = None
+        if self._commands is not None:
+            self._commands.close()
+            self._commands.join_thread()
+            self._commands = None
+        if self.meters is not None:
+            self.meters.close()
+            self.meters.unlink()
+            self.meters = None
@@ -1,7 +1,21 @@
+import os
+import time
+
 import click
-import sounddevice as sd
-import numpy as np
-from .realtime import RealTimeProcessor
+from .pitch_engines import available_engines, engine_names, engine_requirement
+
+# Heavy modules (NumPy, SciPy, mido, PortAudio) are imported inside the
+# commands that need them so that --help and unrelated commands start fast.
+
+def _installed_engine(ctx, param, value):
+    """Reject engines whose optional backend is missing with a usage error."""
+    if value not in available_engines():
+        module = engine_requirement(value)
+        raise click.BadParameter(
+            f"'{value}' necesita el paquete opcional '{module}', que no está instalado"
+        )
+    return value
+
 
 @click.group()
 def cli():
@@ -16,38 +30,271 @@ def cli():
               help='Umbral de amplitud para detectar notas')
 @click.option('--pitch-threshold', default=0.1, type=float,
               help='Umbral de detección para el algoritmo YIN')
-@click.option('--debug', is_flag=True, help='Imprime información de depuración')
-def record(input_device, buffer_size, midi_port, amp_threshold, pitch_threshold, debug):
+@click.option('--window-size', default=None, type=int,
+              help='Ventana de análisis de tono en muestras (por defecto 2x buffer)')
+@click.option('--hop-size', default=None, type=int,
+              help='Muestras entre análisis consecutivos (por defecto el buffer)')
+@click.option('--pitch-engine', default='yin', type=click.Choice(engine_names()),
+              callback=_installed_engine, help='Detector de tono (ver README)')
+@click.option('--polyphonic', is_flag=True,
+              help='Detecta varias notas simultáneas (ventana de 4096 muestras por defecto)')
+@click.option('--latency', default=0.0, type=float,
+              help='Retardo fijo de salida en ms desde la captura (0 = enviar al detectar)')
+@click.option('--input-channels', default='1',
+              help='Canales de entrada separados por comas (1-n); el n-ésimo usa el canal MIDI n')
+@click.option('--workers', default=None, type=int,
+              help='Hilos de análisis en modo multicanal (por defecto uno por canal)')
+@click.option('--stats-interval', default=0.0, type=float,
+              help='Segundos entre resúmenes de tiempos de proceso (0 = desactivado)')
+@click.option('--debug', is_flag=True,
+              help='Imprime un resumen de tiempos cada 5 s si no se indica --stats-interval')
+@click.option('--save', default=None, type=click.Path(dir_okay=False),
+              help='Guarda también las notas enviadas en este archivo .mid')
+@click.option('--save-interval', default=2.0, type=float,
+              help='Segundos entre escrituras a disco del archivo de --save')
+def record(input_device, buffer_size, midi_port, amp_threshold, pitch_threshold,
+           window_size, hop_size, pitch_engine, polyphonic, latency, input_channels, workers,
+           stats_interval, debug, save, save_interval):
     """Captura audio y envía notas MIDI en tiempo real."""
+    import sounddevice as sd
+    from .instrumentation import format_stats
+    from .multichannel import MultiChannelProcessor
+    from .realtime import RealTimeProcessor, adc_time
+
     samplerate = 44100
-    processor = RealTimeProcessor(
-        midi_port=midi_port,
+    channels = [int(ch) - 1 for ch in input_channels.split(',') if ch.strip()]
+    if not channels or min(channels) < 0:
+        raise click.BadParameter('los canales empiezan en 1', param_hint='--input-channels')
+    options = dict(
         buffer_size=buffer_size,
         samplerate=samplerate,
         pitch_threshold=pitch_threshold,
         amp_threshold=amp_threshold,
+        window_size=window_size,
+        hop_size=hop_size,
+        pitch_engine=pitch_engine,
+        latency=latency / 1000.0 if latency > 0 else None,
+    )
+    processor_class = RealTimeProcessor
+    if polyphonic:
+        from .polyphonic import PolyphonicProcessor
+
+        processor_class = PolyphonicProcessor
+    if len(channels) == 1:
+        processor = processor_class(midi_port=midi_port, **options)
+        input_channel = channels[0]
+
+        def callback(indata, frames, time, status):
+            processor.process_block(indata[:, input_channel], status,
+                                    adc_time(time, frames, samplerate))
+
+        def report():
+            click.echo(format_stats(processor.stats()))
+    else:
+        processor = MultiChannelProcessor(channels, midi_port=midi_port, workers=workers,
+                                          processor_class=processor_class, **options)
+
+        def callback(indata, frames, time, status):
+            processor.process_block(indata, status, adc_time(time, frames, samplerate))
+
+        def report():
+            for channel, stats in zip(channels, processor.stats()['channels']):
+                click.echo(f'[{channel + 1}] {format_stats(stats)}')
+
+    if debug and not stats_interval:
+        stats_interval = 5.0
+
+    recorder = None
+    if save:
+        from .recorder import MidiFileRecorder
+
+        recorder = MidiFileRecorder(save, flush_interval=save_interval)
+        recorder.start()
+        processor.sender.add_sink(recorder)
+
+    try:
+        with sd.InputStream(device=input_device, channels=max(channels) + 1,
+                            callback=callback, blocksize=buffer_size,
+                            samplerate=samplerate, dtype='float32'):
+            click.echo('Grabando... Presiona Ctrl+C para detener')
+            try:
+                tick = 0.25 if stats_interval else 1.0
+                next_report = time.monotonic() + stats_interval
+                while True:
+                    sd.sleep(int(tick * 1000))
+                    if stats_interval and time.monotonic() >= next_report:
+                        report()
+                        next_report += stats_interval
+            except KeyboardInterrupt:
+                pass
+    finally:
+        # The stream is closed by now, so the final note-offs cannot race the callback.
+        processor.close()
+        stats = processor.sender.stats()
+        click.echo(
+            f"Grabación finalizada ({stats['sent']} mensajes MIDI, "
+            f"{stats['dropped']} descartados, cola máxima {stats['max_queue_depth']})"
+        )
+        if recorder is not None:
+            recorder.stop()
+            click.echo(f"{recorder.written} eventos guardados en {save}")
+
+
+@cli.command()
+@click.argument('config', type=click.Path(exists=True, dir_okay=False))
+@click.option('--stats-interval', default=5.0, type=float,
+              help='Segundos entre informes de CPU y latencia por instancia (0 = desactivado)')
+def serve(config, stats_interval):
+    """Aloja en un solo proceso todas las entradas descritas en un archivo JSON."""
+    import sounddevice as sd
+    from .host import StageHost, load_config
+    from .instrumentation import format_stats
+    from .realtime import adc_time
+
+    try:
+        settings = load_config(config)
+    except ValueError as exc:
+        raise click.BadParameter(str(exc), param_hint='CONFIG')
+    host = StageHost(settings)
+
+    def stream_for(group):
+        def callback(indata, frames, time, status):
+            group.process_block(indata, status, adc_time(time, frames, group.samplerate))
+
+        return sd.InputStream(device=group.device, channels=group.channels, callback=callback,
+                              blocksize=host.buffer_size, samplerate=host.samplerate,
+                              dtype='float32')
+
+    def report():
+        for stats in host.stats()['instances']:
+            click.echo(f"[{stats['name']}] cpu={stats['cpu'] * 100:.1f}% {format_stats(stats)}")
+
+    streams = []
+    try:
+        for group in host.groups:
+            streams.append(stream_for(group))
+            streams[-1].start()
+        click.echo(f'Sirviendo {len(host.instances)} entradas en {len(host.groups)} '
+                   f'dispositivos con {host.workers} hilos. Presiona Ctrl+C para detener')
+        tick = 0.25 if stats_interval else 1.0
+        next_report = time.monotonic() + stats_interval
+        while True:
+            sd.sleep(int(tick * 1000))
+            if stats_interval and time.monotonic() >= next_report:
+                report()
+                next_report += stats_interval
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for stream in streams:
+            stream.close()
+        host.close()
+        report()
+
+
+@cli.command()
+@click.argument('paths', nargs=-1, required=True, type=click.Path(exists=True))
+@click.option('--output-dir', default=None, type=click.Path(file_okay=False),
+              help='Directorio de salida (por defecto junto a cada archivo)')
+@click.option('--workers', default=None, type=int,
+              help='Número de procesos (por defecto uno por CPU)')
+@click.option('--frame-size', default=None, type=int,
+              help='Tamaño del frame de análisis (por defecto 2048, o 4096 con --polyphonic)')
+@click.option('--hop-size', default=512, type=int, help='Salto entre frames')
+@click.option('--energy-threshold', default=0.2, type=float,
+              help='Energía relativa (0-1) para detectar una nota')
+@click.option('--pitch-threshold', default=0.1, type=float,
+              help='Umbral de detección para el algoritmo YIN')
+@click.option('--min-duration', default=0.05, type=float,
+              help='Duración mínima de una nota en segundos')
+@click.option('--polyphonic', is_flag=True,
+              help='Detecta varias notas simultáneas (acordes)')
+def transcribe(paths, output_dir, workers, frame_size, hop_size, energy_threshold,
+               pitch_threshold, min_duration, polyphonic):
+    """Transcribe archivos WAV/FLAC a archivos MIDI estándar."""
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+    from .transcribe import iter_audio_files, transcribe_file
+
+    files = list(iter_audio_files(paths))
+    if not files:
+        raise click.UsageError('No se encontraron archivos de audio')
+    # Check every target before starting: two inputs with the same name
+    # would otherwise overwrite each other's MIDI file in parallel.
+    jobs = []
+    seen = {}
+    for path in files:
+        base = os.path.splitext(os.path.basename(path))[0] + '.mid'
+        out_path = os.path.join(output_dir or os.path.dirname(path), base)
+        key = os.path.normcase(os.path.abspath(out_path))
+        if key in seen:
+            raise click.UsageError(
+                f'{seen[key]} y {path} se escribirían en el mismo archivo {out_path}'
+            )
+        seen[key] = path
+        jobs.append((path, out_path))
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+    options = dict(
+        frame_size=frame_size or (4096 if polyphonic else 2048),
+        hop_size=hop_size,
+        energy_threshold=energy_threshold,
+        min_duration=min_duration,
+    )
+    if polyphonic:
+        options['polyphonic'] = True
+    else:
+        options['pitch_threshold'] = pitch_threshold
+
+    start = time.perf_counter()
+    audio_seconds = 0.0
+    failures = 0
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            pool.submit(transcribe_file, path, out_path, **options): path
+            for path, out_path in jobs
+        }
+        for future in as_completed(futures):
+            try:
+                _, out_path, seconds, notes = future.result()
+            except Exception as exc:
+                failures += 1
+                click.echo(f'{futures[future]}: error: {exc}', err=True)
+                continue
+            audio_seconds += seconds
+            click.echo(f'{out_path}: {notes} notas, {seconds:.1f} s')
+
+    elapsed = time.perf_counter() - start
+    speed = audio_seconds / elapsed if elapsed > 0 else 0.0
+    click.echo(
+        f'{len(files) - failures}/{len(files)} archivos, {audio_seconds:.1f} s de audio '
+        f'en {elapsed:.1f} s ({speed:.1f} s de audio por segundo)'
     )
 
-    def callback(indata, frames, time, status):
-        if status:
-            print(status, flush=True)
-        samples = np.asarray(indata[:, 0], dtype=np.float32)
-        if debug:
-            amp = float(np.sqrt(np.dot(samples, samples) / len(samples)))
-            print(f"amp={amp:.4f}")
-        processor.process_block(samples)
-
-    with sd.InputStream(device=input_device, channels=1, callback=callback,
-                         blocksize=buffer_size, samplerate=samplerate):
-        click.echo('Grabando... Presiona Ctrl+C para detener')
-        try:
-            while True:
-                sd.sleep(1000)
-        except KeyboardInterrupt:
-            pass
-        finally:
-            processor.close()
-            click.echo('Grabación finalizada')
+
+@cli.command()
+@click.option('--timing', is_flag=True,
+              help='Mide el coste de importación de cada módulo en un intérprete nuevo')
+@click.option('--repeat', default=3, type=int,
+              help='Repeticiones por medida con --timing (se toma la menor)')
+def doctor(timing, repeat):
+    """Comprueba las dependencias y, con --timing, el tiempo de arranque."""
+    from .doctor import TIMED_MODULES, dependency_report, import_time, startup_time
+
+    for module, installed, use in dependency_report():
+        status = 'no instalado' if installed is None else (installed or 'instalado')
+        click.echo(f'{module:<12} {status:<14} {use}')
+    if not timing:
+        return
+    click.echo('')
+    click.echo('Importación en frío (mejor de {}):'.format(repeat))
+    for module in TIMED_MODULES:
+        seconds = import_time(module, repeat)
+        cost = 'no disponible' if seconds is None else f'{seconds * 1000:8.1f} ms'
+        click.echo(f'  {module:<28} {cost}')
+    seconds = startup_time(repeat)
+    cost = 'no disponible' if seconds is None else f'{seconds * 1000:8.1f} ms'
+    click.echo(f'  {"midiline --help (total)":<28} {cost}')
+
 
 if __name__ == '__main__':
     cli()
@@ -0,0 +1,104 @@
+"""Environment checks behind ``midiline doctor``.
+
+Nothing here imports the packages it reports on: availability comes from
+:func:`importlib.util.find_spec` and import costs are measured in fresh
+interpreters, so the figures match a cold start of the tool.
+"""
+
+from __future__ import annotations
+
+import importlib.util
+import os
+import subprocess
+import sys
+import time
+from importlib.metadata import PackageNotFoundError, version
+from typing import List, Optional, Tuple
+
+# (module, distribution, use)
+DEPENDENCIES = (
+    ("numpy", "numpy", "análisis"),
+    ("scipy", "scipy", "filtros, polifonía y lectura de WAV"),
+    ("mido", "mido", "salida MIDI"),
+    ("click", "click", "línea de comandos"),
+    ("sounddevice", "sounddevice", "captura en tiempo real"),
+    ("aubio", "aubio", "motores aubio-*"),
+    ("soundfile", "soundfile", "lectura de FLAC"),
+    ("pyaudio", "PyAudio", "AudioInput"),
+    ("PyQt5", "PyQt5", "interfaz gráfica"),
+)
+
+PACKAGE = __package__ or "midiline"
+
+# Modules timed by ``doctor --timing``; each figure includes its own imports.
+TIMED_MODULES = (
+    "click",
+    "numpy",
+    "scipy.signal",
+    "scipy.sparse",
+    "mido",
+    "sounddevice",
+    f"{PACKAGE}.cli",
+    f"{PACKAGE}.realtime",
+    f"{PACKAGE}.polyphonic",
+    f"{PACKAGE}.transcribe",
+)
+
+_TIMER = (
+    "import time; start = time.perf_counter(); import {module}; "
+    "print(time.perf_counter() - start)"
+)
+
+
+def dependency_report() -> List[Tuple[str, Optional[str], str]]:
+    """``(module, version, use)`` per dependency; version is ``None`` when missing.
+
+    Installed modules whose version cannot be read report ``""``.
+    """
+    report = []
+    for module, distribution, use in DEPENDENCIES:
+        installed = None
+        if importlib.util.find_spec(module) is not None:
+            try:
+                installed = version(distribution)
+            except PackageNotFoundError:
+                installed = ""
+        report.append((module, installed, use))
+    return report
+
+
+def _child_env() -> dict:
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(path for path in sys.path if path)
+    return env
+
+
+def _run(args: List[str]) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        [sys.executable, *args], capture_output=True, text=True, env=_child_env()
+    )
+
+
+def import_time(module: str, repeat: int = 3) -> Optional[float]:
+    """Best of ``repeat`` cold imports of ``module`` in seconds, ``None`` if it fails."""
+    best = None
+    for _ in range(max(1, int(repeat))):
+        result = _run(["-c", _TIMER.format(module=module)])
+        if result.returncode != 0:
+            return None
+        seconds = float(result.stdout.strip().splitlines()[-1])
+        best = seconds if best is None else min(best, seconds)
+    return best
+
+
+def startup_time(repeat: int = 3) -> Optional[float]:
+    """Best wall time of ``midiline --help`` in a new interpreter, in seconds."""
+    best = None
+    for _ in range(max(1, int(repeat))):
+        start = time.perf_counter()
+        result = _run(["-m", f"{PACKAGE}.cli", "--help"])
+        elapsed = time.perf_counter() - start
+        if result.returncode != 0:
+            return None
+        best = elapsed if best is None else min(best, elapsed)
+    return best
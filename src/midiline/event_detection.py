@@ -1,6 +1,7 @@
 from __future__ import annotations
 
-from typing import List
+from collections import deque
+from typing import Deque, List, Optional, Tuple
 
 import numpy as np
 
@@ -8,12 +9,21 @@ from .preprocess import frame_audio
 from .events import NoteEvent
 
 
+def _as_float(audio: np.ndarray) -> np.ndarray:
+    """Return ``audio`` as floating point, keeping float32 input as is."""
+    audio = np.asarray(audio)
+    if not np.issubdtype(audio.dtype, np.floating):
+        audio = audio.astype(float)
+    return audio
+
+
 def _frame_rms(frames: np.ndarray) -> np.ndarray:
-    """Root mean square energy for each frame."""
-    frames = np.asarray(frames, dtype=float)
+    """Root mean square energy for each frame, in the frames' float dtype."""
+    frames = _as_float(frames)
     if frames.ndim == 1:
         frames = frames[None, :]
-    return np.sqrt(np.mean(frames ** 2, axis=1))
+    power = np.einsum("ij,ij->i", frames, frames) / frames.shape[1]
+    return np.sqrt(power)
 
 
 def _frame_pitch(frames: np.ndarray, sample_rate: int) -> np.ndarray:
@@ -21,8 +31,8 @@ def _frame_pitch(frames: np.ndarray, sample_rate: int) -> np.ndarray:
     frames = np.asarray(frames)
     if frames.ndim == 1:
         frames = frames[None, :]
-    crossings = np.abs(np.diff(np.signbit(frames), axis=1))
-    counts = np.sum(crossings, axis=1)
+    signs = np.signbit(frames)
+    counts = np.count_nonzero(signs[:, 1:] != signs[:, :-1], axis=1)
     freqs = np.where(
         counts >= 2, sample_rate * counts / (2 * frames.shape[1]), 0.0
     )
@@ -59,7 +69,7 @@ def detect_note_events(
     if len(signal) < frame_size:
         return []
 
-    signal = np.asarray(signal, dtype=float)
+    signal = _as_float(signal)
     frames = frame_audio(signal, frame_size, hop_size)
     if len(frames) == 0:
         return []
@@ -99,3 +109,112 @@ def detect_note_events(
         events.append(NoteEvent(start_time, end_time, amplitude))
 
     return events
+
+
+class NoteEventDetector:
+    """Incremental counterpart of :func:`detect_note_events`.
+
+    Audio is passed in chunks of any size through :meth:`feed`, which returns
+    the events that closed within that chunk. Instead of the global maximum,
+    thresholds are relative to a running peak energy that decays with
+    ``peak_half_life`` seconds and looks ``lookahead`` frames ahead, so
+    decisions are delayed by ``lookahead * hop_size`` samples and memory use
+    depends only on the chunk and frame sizes.
+    """
+
+    def __init__(
+        self,
+        sample_rate: int,
+        frame_size: int = 1024,
+        hop_size: int = 512,
+        energy_threshold: float = 0.2,
+        pitch_tolerance: float = 30.0,
+        lookahead: int = 8,
+        peak_half_life: float = 2.0,
+    ) -> None:
+        self.sample_rate = sample_rate
+        self.frame_size = int(frame_size)
+        self.hop_size = int(hop_size)
+        self.energy_threshold = float(energy_threshold)
+        self.pitch_tolerance = float(pitch_tolerance)
+        self.lookahead = max(0, int(lookahead))
+        hop_seconds = self.hop_size / sample_rate
+        self.peak_decay = 0.5 ** (hop_seconds / peak_half_life) if peak_half_life > 0 else 1.0
+        self.reset()
+
+    def reset(self) -> None:
+        self._carry: Optional[np.ndarray] = None
+        self._pending: Deque[Tuple[float, float]] = deque()
+        self._frame_index = 0
+        self._peak = 0.0
+        self._prev_active = False
+        self._last_pitch: Optional[float] = None
+        self._onset: Optional[int] = None
+        self._event_peak = 0.0
+        self._event_ref = 0.0
+
+    def feed(self, chunk: np.ndarray) -> List[NoteEvent]:
+        """Analyse the next chunk of the signal."""
+        chunk = _as_float(chunk)
+        carry = chunk[:0] if self._carry is None else self._carry
+        data = np.concatenate([carry, chunk])
+        frames = frame_audio(data, self.frame_size, self.hop_size)
+        self._carry = data[len(frames) * self.hop_size:].copy()
+        if len(frames) == 0:
+            return []
+
+        events: List[NoteEvent] = []
+        energies = _frame_rms(frames)
+        pitches = _frame_pitch(frames, self.sample_rate)
+        for energy, pitch in zip(energies, pitches):
+            self._pending.append((float(energy), float(pitch)))
+            if len(self._pending) > self.lookahead:
+                self._step(events)
+        return events
+
+    def finish(self) -> List[NoteEvent]:
+        """Flush frames held for look-ahead and close any open event."""
+        events: List[NoteEvent] = []
+        while self._pending:
+            self._step(events)
+        if self._onset is not None:
+            self._close(self._frame_index, events)
+        self.reset()
+        return events
+
+    def _step(self, events: List[NoteEvent]) -> None:
+        energy, pitch = self._pending[0]
+        ahead = max(e for e, _ in self._pending)
+        self._peak = max(self._peak * self.peak_decay, ahead)
+        self._pending.popleft()
+        threshold = self.energy_threshold * self._peak
+        active = energy > threshold
+        i = self._frame_index
+
+        if self._last_pitch is None:
+            if active:
+                self._onset = i
+        elif self._onset is None:
+            if active and (
+                not self._prev_active
+                or abs(pitch - self._last_pitch) > self.pitch_tolerance
+            ):
+                self._onset = i
+        elif not active or abs(pitch - self._last_pitch) > self.pitch_tolerance:
+            self._close(i, events)
+
+        if self._onset is not None and energy >= self._event_peak:
+            self._event_peak = energy
+            self._event_ref = self._peak
+        self._prev_active = active
+        self._last_pitch = pitch
+        self._frame_index = i + 1
+
+    def _close(self, end_frame: int, events: List[NoteEvent]) -> None:
+        start_time = self._onset * self.hop_size / self.sample_rate
+        end_time = end_frame * self.hop_size / self.sample_rate
+        amplitude = self._event_peak / self._event_ref if self._event_ref > 0 else 0.0
+        events.append(NoteEvent(start_time, end_time, float(amplitude)))
+        self._onset = None
+        self._event_peak = 0.0
+        self._event_ref = 0.0
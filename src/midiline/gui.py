@@ -1,7 +1,13 @@
+import queue
 import sys
 import threading
+import mido
+import numpy as np
 import sounddevice as sd
-from .realtime import RealTimeProcessor
+from .capture_process import CaptureProcess, apply_parameter
+from .midi_sender import MidiSender
+from .pitch_engines import available_engines
+from .realtime import RealTimeProcessor, adc_time
 from PyQt5.QtWidgets import (
     QApplication,
     QWidget,
@@ -11,11 +17,24 @@ from PyQt5.QtWidgets import (
     QSlider,
     QComboBox,
     QLineEdit,
+    QCheckBox,
 )
-from PyQt5.QtCore import Qt
+from PyQt5.QtCore import Qt, QTimer
 
 
 class RecorderThread(threading.Thread):
+    """Capture from one input and play the detected notes on a MIDI port.
+
+    :meth:`set` changes a :class:`Parameters` field of the running
+    processor. :meth:`reconfigure` changes settings that need a new
+    processor or stream (:data:`STRUCTURAL`): the replacement is built on
+    this thread with its own stream and only primed until its window is
+    full, while the current one keeps playing; then it takes over and the
+    old one ends its notes. The MIDI port and sender stay open throughout.
+    """
+
+    STRUCTURAL = ('device', 'buffer_size', 'samplerate', 'input_channel', 'pitch_engine')
+
     def __init__(
         self,
         device,
@@ -25,6 +44,7 @@ class RecorderThread(threading.Thread):
         pitch_threshold,
         samplerate=44100,
         input_channel=0,
+        pitch_engine='yin',
     ):
         super().__init__(daemon=True)
         self.device = device
@@ -34,36 +54,135 @@ class RecorderThread(threading.Thread):
         self.amp_threshold = amp_threshold
         self.pitch_threshold = pitch_threshold
         self.input_channel = int(input_channel)
+        self.pitch_engine = pitch_engine
+        self.processor = None
+        self.sender = None
+        self.level = 0.0
+        self._incoming = None
+        self._params = {}
+        self._changes = queue.SimpleQueue()
         self._stop_event = threading.Event()
 
     def stop(self):
         self._stop_event.set()
+        if self.is_alive():
+            self.join()
 
-    def run(self):
+    def set(self, name, value):
+        self._params[name] = value
+        if self.processor is not None:
+            apply_parameter(self.processor, name, value)
+
+    def reconfigure(self, **changes):
+        unknown = set(changes) - set(self.STRUCTURAL)
+        if unknown:
+            raise ValueError(f"unknown setting: {sorted(unknown)[0]!r}")
+        self._changes.put(changes)
+
+    def meter(self):
+        processor = self.processor
+        if processor is None:
+            return None
+        note = processor.last_note if processor.last_note is not None else -1
+        return {'time': processor.position, 'level': self.level,
+                'pitch': processor.smoothed_pitch, 'note': note}
+
+    def _build(self):
         processor = RealTimeProcessor(
-            midi_port=self.midi_port,
             buffer_size=self.buffer_size,
             samplerate=self.samplerate,
             pitch_threshold=self.pitch_threshold,
             amp_threshold=self.amp_threshold,
+            pitch_engine=self.pitch_engine,
+            sender=self.sender,
         )
+        if self._params:
+            processor.update(**self._params)
+        return processor
+
+    def _open(self, processor):
+        input_channel = self.input_channel
+        samplerate = processor.samplerate
 
         def callback(indata, frames, time, status):
             if status:
                 print(status, flush=True)
-            samples = indata[:, self.input_channel].copy()
-            processor.process_block(samples)
+            samples = indata[:, input_channel].copy()
+            if processor is not self.processor:
+                if processor is self._incoming:
+                    processor.prime(samples)
+                    if processor.warm:
+                        self.processor = processor
+                        self._incoming = None
+                else:
+                    # Replaced: end our notes before the successor starts its own.
+                    processor._release_notes()
+                return
+            processor.process_block(samples, time=adc_time(time, frames, samplerate))
+            self.level = float(np.sqrt(np.dot(samples, samples) / max(1, frames)))
 
-        with sd.InputStream(
+        stream = sd.InputStream(
             device=self.device,
-            channels=self.input_channel + 1,
+            channels=input_channel + 1,
             callback=callback,
             blocksize=self.buffer_size,
-            samplerate=self.samplerate,
-        ):
+            samplerate=samplerate,
+        )
+        stream.start()
+        return stream
+
+    def _switch(self, stream, changes):
+        """Replace the running processor and return the stream now in use."""
+        old = self.processor
+        for name, value in changes.items():
+            setattr(self, name, value)
+        incoming = self._build()
+        self._incoming = incoming
+        try:
+            new_stream = self._open(incoming)
+        except sd.PortAudioError:
+            # The device allows a single stream: switch with a short gap.
+            self._incoming = None
+            stream.close()
+            old.close()
+            self.processor = incoming
+            return self._open(incoming)
+        while self._incoming is incoming and not self._stop_event.wait(0.01):
+            pass
+        if self._incoming is incoming:
+            # Stopped while warming up. With the new stream closed the
+            # callback can no longer hand over, so unless it just did, drop
+            # the replacement and leave the old pair for run() to close.
+            new_stream.close()
+            if self._incoming is incoming:
+                self._incoming = None
+                incoming.close()
+                return stream
+        stream.close()
+        old.close()
+        return new_stream
+
+    def run(self):
+        try:
+            port = mido.open_output(self.midi_port, virtual=True)
+        except IOError:
+            port = mido.open_output(self.midi_port)
+        self.sender = MidiSender(port)
+        self.sender.start()
+        self.processor = self._build()
+        stream = self._open(self.processor)
+        try:
             while not self._stop_event.is_set():
-                sd.sleep(100)
-            processor.close()
+                try:
+                    changes = self._changes.get(timeout=0.1)
+                except queue.Empty:
+                    continue
+                stream = self._switch(stream, changes)
+        finally:
+            stream.close()
+            self.processor.close()
+            self.sender.stop()
+            port.close()
 
 
 class MidiLineGUI(QWidget):
@@ -102,6 +221,16 @@ class MidiLineGUI(QWidget):
         buf_layout.addWidget(self.buffer_combo)
         layout.addLayout(buf_layout)
 
+        # Pitch engine
+        engine_layout = QHBoxLayout()
+        engine_layout.addWidget(QLabel('Motor de tono'))
+        self.engine_combo = QComboBox()
+        for name in available_engines():
+            self.engine_combo.addItem(name, name)
+        self.engine_combo.setCurrentIndex(self.engine_combo.findData('yin'))
+        engine_layout.addWidget(self.engine_combo)
+        layout.addLayout(engine_layout)
+
         # Amplitude threshold slider
         amp_layout = QHBoxLayout()
         amp_layout.addWidget(QLabel('Amplitud [1-10]%'))
@@ -112,6 +241,8 @@ class MidiLineGUI(QWidget):
         amp_layout.addWidget(self.amp_slider)
         self.amp_value = QLabel('1')
         self.amp_slider.valueChanged.connect(lambda v: self.amp_value.setText(str(v)))
+        self.amp_slider.valueChanged.connect(
+            lambda v: self.worker and self.worker.set('amp_threshold', v / 100.0))
         amp_layout.addWidget(self.amp_value)
         layout.addLayout(amp_layout)
 
@@ -134,11 +265,34 @@ class MidiLineGUI(QWidget):
         layout.addLayout(port_layout)
 
 
+        # Capture in a child process, away from the GUI's GIL
+        self.process_check = QCheckBox('Captura en proceso separado')
+        self.process_check.toggled.connect(self._restart_recorder)
+        layout.addWidget(self.process_check)
+
+        self.meter_label = QLabel('Nivel: -  Nota: -')
+        layout.addWidget(self.meter_label)
+        self.meter_timer = QTimer(self)
+        self.meter_timer.timeout.connect(self._poll_recorder)
+        self.meter_timer.start(100)
+
         self.setLayout(layout)
         # Adjust initial size and reduce width by 20%
         self.adjustSize()
         self.resize(int(self.width() * 0.8), self.height())
 
+        # Structural changes rebuild the processor while it keeps running
+        self.device_combo.currentIndexChanged.connect(
+            lambda _: self._reconfigure(device=self.device_combo.currentData()))
+        self.input_channel_combo.currentIndexChanged.connect(
+            lambda _: self._reconfigure(input_channel=self.input_channel_combo.currentData()))
+        self.buffer_combo.currentIndexChanged.connect(
+            lambda _: self._reconfigure(buffer_size=self.buffer_combo.currentData()))
+        self.sr_combo.currentIndexChanged.connect(
+            lambda _: self._reconfigure(samplerate=self.sr_combo.currentData()))
+        self.engine_combo.currentIndexChanged.connect(
+            lambda _: self._reconfigure(pitch_engine=self.engine_combo.currentData()))
+
         # Start recording automatically
         self._start_recorder()
 
@@ -150,21 +304,66 @@ class MidiLineGUI(QWidget):
         samplerate = self.sr_combo.currentData()
         port = self.port_edit.text()
         input_channel = self.input_channel_combo.currentData()
-        self.worker = RecorderThread(
-            device,
-            buffer_size,
-            port,
-            amp_threshold,
-            0.1,
-            samplerate=samplerate,
-            input_channel=input_channel,
-        )
+        pitch_engine = self.engine_combo.currentData()
+        if self.process_check.isChecked():
+            self.worker = CaptureProcess({
+                'device': device,
+                'input_channel': input_channel,
+                'processor': dict(
+                    midi_port=port,
+                    buffer_size=buffer_size,
+                    samplerate=samplerate,
+                    pitch_threshold=0.1,
+                    amp_threshold=amp_threshold,
+                    pitch_engine=pitch_engine,
+                ),
+            })
+        else:
+            self.worker = RecorderThread(
+                device,
+                buffer_size,
+                port,
+                amp_threshold,
+                0.1,
+                samplerate=samplerate,
+                input_channel=input_channel,
+                pitch_engine=pitch_engine,
+            )
         self.worker.start()
 
-    def closeEvent(self, event):
-        if self.worker and self.worker.is_alive():
+    def _stop_recorder(self) -> None:
+        if self.worker is not None:
             self.worker.stop()
-            self.worker.join()
+            self.worker = None
+
+    def _restart_recorder(self) -> None:
+        self._stop_recorder()
+        self._start_recorder()
+
+    def _reconfigure(self, **changes) -> None:
+        """Hand structural changes to the running recorder."""
+        if isinstance(self.worker, RecorderThread):
+            self.worker.reconfigure(**changes)
+        elif self.worker is not None:
+            self._restart_recorder()
+
+    def _poll_recorder(self) -> None:
+        """Restart a dead capture process and refresh the meter."""
+        worker = self.worker
+        if worker is None:
+            return
+        if isinstance(worker, CaptureProcess) and worker.check():
+            print(f'Proceso de captura reiniciado ({worker.restarts})', flush=True)
+        meter = worker.meter()
+        if meter is not None:
+            note = int(meter['note'])
+            self.meter_label.setText(
+                f"Nivel: {meter['level']:.3f}  Nota: {note if note >= 0 else '-'}"
+            )
+
+    def closeEvent(self, event):
+        self.meter_timer.stop()
+        self._stop_recorder()
         event.accept()
 
 
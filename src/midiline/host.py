@@ -0,0 +1,334 @@
+"""Host the processors of a whole stage in one process.
+
+A stage is described by a JSON file with global settings and a list of
+instances, each an input channel of some device analysed by its own
+:class:`RealTimeProcessor` and sent to a MIDI port::
+
+    {
+        "samplerate": 48000,
+        "buffer_size": 256,
+        "workers": 4,
+        "defaults": {"amp_threshold": 0.02},
+        "instances": [
+            {"name": "voz", "device": 2, "input_channel": 1, "midi_port": "Voz"},
+            {"name": "bajo", "device": 2, "input_channel": 2, "midi_port": "Banda",
+             "midi_channel": 2, "cutoff": 40},
+            {"name": "guitarra", "device": "USB", "midi_port": "Banda", "polyphonic": true}
+        ]
+    }
+
+Channels are 1-based as on the command line and ``latency`` is in ms.
+Every other instance key is passed to the processor. Instances on the same
+device share one input stream and those on the same MIDI port share one
+:class:`MidiSender`. An optional top-level ``record_dir`` also saves what
+each port plays to ``<record_dir>/<port>.mid``.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+from dataclasses import fields
+from concurrent.futures import ThreadPoolExecutor
+from time import perf_counter, thread_time
+from typing import Dict, List, Optional
+
+import mido
+import numpy as np
+
+from .instrumentation import LatencyHistogram
+from .midi_sender import MidiSender
+from .pitch_engines import engine_names
+from .polyphonic import PolyphonicProcessor
+from .realtime import Parameters, RealTimeProcessor
+from .recorder import MidiFileRecorder
+
+# Instance keys applied with ``processor.update`` once the processor exists.
+PARAMETER_OPTIONS = tuple(field.name for field in fields(Parameters) if field.name != "channel")
+
+# Instance keys handed to the processor: constructor arguments and parameters.
+PROCESSOR_OPTIONS = PARAMETER_OPTIONS + (
+    "pitch_engine", "window_size", "hop_size", "onset_frames", "release_frames",
+)
+
+# Processor options that are counts; the other numeric ones are floats.
+INTEGER_OPTIONS = ("velocity", "window_size", "hop_size", "onset_frames", "release_frames")
+
+# Options that may be null to keep the processor's default or turn a stage off.
+OPTIONAL_OPTIONS = ("cutoff", "window_size", "hop_size")
+
+INSTANCE_KEYS = (
+    "name", "device", "input_channel", "midi_port", "midi_channel", "polyphonic", "latency",
+) + PROCESSOR_OPTIONS
+
+
+def load_config(path: str) -> dict:
+    """Read a stage description and return it checked by :func:`normalize_config`."""
+    with open(path, encoding="utf-8") as handle:
+        return normalize_config(json.load(handle))
+
+
+def _number(name: str, key: str, value, kind=float):
+    try:
+        return kind(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"{name}: {key} must be a number, not {value!r}") from None
+
+
+def _option(name: str, key: str, value):
+    if key == "pitch_engine":
+        if value not in engine_names():
+            raise ValueError(f"{name}: unknown pitch_engine {value!r}")
+        return value
+    if value is None and key in OPTIONAL_OPTIONS:
+        return None
+    return _number(name, key, value, int if key in INTEGER_OPTIONS else float)
+
+
+def normalize_config(config: dict) -> dict:
+    """Validate a stage description and fill in its defaults.
+
+    The result has ``samplerate``, ``buffer_size``, ``workers`` and a list
+    of ``instances`` with 0-based channels, latency in seconds (``None``
+    when off) and the processor settings under ``options``; those in
+    :data:`PARAMETER_OPTIONS` are applied with ``update`` after construction.
+    Option values are converted and checked here, so a bad entry is
+    reported before any port or stream is opened. Raises
+    :class:`ValueError` describing the first problem found.
+    """
+    entries = config.get("instances")
+    if not entries:
+        raise ValueError("the configuration has no instances")
+    unknown = set(config) - {
+        "samplerate", "buffer_size", "workers", "defaults", "instances", "record_dir",
+    }
+    if unknown:
+        raise ValueError(f"unknown setting: {sorted(unknown)[0]!r}")
+    defaults = dict(config.get("defaults", {}))
+    workers = config.get("workers")
+    result = {
+        "samplerate": _number("config", "samplerate", config.get("samplerate", 44100), int),
+        "buffer_size": _number("config", "buffer_size", config.get("buffer_size", 256), int),
+        "workers": None if workers is None else max(1, _number("config", "workers", workers, int)),
+        "record_dir": config.get("record_dir"),
+        "instances": [],
+    }
+
+    names = set()
+    latencies: Dict[str, Optional[float]] = {}
+    for index, entry in enumerate(entries):
+        entry = dict(defaults, **entry)
+        name = str(entry.get("name", f"entrada{index + 1}"))
+        unknown = set(entry) - set(INSTANCE_KEYS)
+        if unknown:
+            raise ValueError(f"{name}: unknown key {sorted(unknown)[0]!r}")
+        if name in names:
+            raise ValueError(f"duplicate instance name: {name!r}")
+        names.add(name)
+        input_channel = _number(name, "input_channel", entry.get("input_channel", 1), int) - 1
+        if input_channel < 0:
+            raise ValueError(f"{name}: input_channel starts at 1")
+        midi_channel = _number(name, "midi_channel", entry.get("midi_channel", 1), int) - 1
+        if not 0 <= midi_channel < 16:
+            raise ValueError(f"{name}: midi_channel must be between 1 and 16")
+        latency = _number(name, "latency", entry.get("latency", 0.0))
+        latency = latency / 1000.0 if latency > 0 else None
+        port = str(entry.get("midi_port", "MidiLine"))
+        if latencies.setdefault(port, latency) != latency:
+            raise ValueError(f"{name}: instances on port {port!r} need the same latency")
+        result["instances"].append({
+            "name": name,
+            "device": entry.get("device"),
+            "input_channel": input_channel,
+            "midi_port": port,
+            "midi_channel": midi_channel,
+            "polyphonic": bool(entry.get("polyphonic", False)),
+            "latency": latency,
+            "options": {
+                key: _option(name, key, entry[key]) for key in PROCESSOR_OPTIONS if key in entry
+            },
+        })
+    return result
+
+
+class Instance:
+    """One configured input and the CPU time its analysis has used."""
+
+    def __init__(self, name: str, input_channel: int, processor: RealTimeProcessor) -> None:
+        self.name = name
+        self.input_channel = input_channel
+        self.processor = processor
+        self.cpu_time = 0.0
+        self.audio_time = 0.0
+
+    def process_block(self, samples: np.ndarray, status, time: float) -> None:
+        start = thread_time()
+        self.processor.process_block(samples, status, time)
+        self.cpu_time += thread_time() - start
+        self.audio_time += len(samples) / self.processor.samplerate
+
+    @property
+    def cpu(self) -> float:
+        """CPU time used per second of audio (0.01 is 1 % of one core)."""
+        return self.cpu_time / self.audio_time if self.audio_time else 0.0
+
+    def stats(self) -> dict:
+        return dict(self.processor.stats(), name=self.name, cpu=self.cpu)
+
+    def reset_stats(self) -> None:
+        self.processor.reset_stats()
+        self.cpu_time = 0.0
+        self.audio_time = 0.0
+
+
+class DeviceGroup:
+    """Instances fed from the same input stream.
+
+    :meth:`process_block` copies each instance's channel out of the
+    interleaved block, runs the first instance on the calling thread and
+    the others on the host's shared pool, and returns when all are done.
+    """
+
+    def __init__(self, device, instances: List[Instance], buffer_size: int,
+                 pool: Optional[ThreadPoolExecutor]) -> None:
+        self.device = device
+        self.instances = instances
+        self.channels = max(instance.input_channel for instance in instances) + 1
+        self.samplerate = instances[0].processor.samplerate
+        self._pool = pool
+        self._rows = np.zeros((len(instances), buffer_size), dtype=np.float32)
+        self.callback_time = LatencyHistogram()
+
+    def process_block(self, indata: np.ndarray, status=None, time: float | None = None) -> None:
+        start = perf_counter()
+        frames = len(indata)
+        if time is None:
+            time = start - frames / self.samplerate
+        if frames > self._rows.shape[1]:
+            self._rows = np.zeros((len(self.instances), frames), dtype=np.float32)
+        rows = self._rows
+        for row, instance in enumerate(self.instances):
+            rows[row, :frames] = indata[:, instance.input_channel]
+
+        if self._pool is None:
+            for row, instance in enumerate(self.instances):
+                instance.process_block(rows[row, :frames], status, time)
+        else:
+            futures = [
+                self._pool.submit(instance.process_block, rows[row, :frames], status, time)
+                for row, instance in enumerate(self.instances[1:], 1)
+            ]
+            self.instances[0].process_block(rows[0, :frames], status, time)
+            for future in futures:
+                future.result()
+        self.callback_time.record(perf_counter() - start)
+
+
+class StageHost:
+    """Build and run every instance of a normalized stage description.
+
+    Each stream callback analyses one of its instances itself and hands
+    the rest to a pool of ``workers - 1`` threads shared by all devices,
+    so at most ``workers`` analyses run at once per callback; by default
+    ``workers`` is the number of instances, capped at the CPU count. With
+    ``threaded_output=False`` the senders are not started, as for
+    :class:`RealTimeProcessor`. If building any instance fails, whatever
+    was already opened is closed before the error propagates.
+    """
+
+    def __init__(self, config: dict, threaded_output: bool = True) -> None:
+        self.samplerate = config["samplerate"]
+        self.buffer_size = config["buffer_size"]
+        self.record_dir = config.get("record_dir")
+        self.ports: Dict[str, object] = {}
+        self.senders: Dict[str, MidiSender] = {}
+        self.recorders: Dict[str, MidiFileRecorder] = {}
+        self.instances: List[Instance] = []
+        self.groups: List[DeviceGroup] = []
+        self._pool: Optional[ThreadPoolExecutor] = None
+        try:
+            self._build(config)
+        except BaseException:
+            self.close()
+            raise
+        if threaded_output:
+            for sender in self.senders.values():
+                sender.start()
+
+    def _build(self, config: dict) -> None:
+        for entry in config["instances"]:
+            sender = self._sender(entry["midi_port"], entry["latency"])
+            options = dict(entry["options"])
+            params = {key: options.pop(key) for key in PARAMETER_OPTIONS if key in options}
+            processor_class = PolyphonicProcessor if entry["polyphonic"] else RealTimeProcessor
+            processor = processor_class(
+                buffer_size=self.buffer_size,
+                samplerate=self.samplerate,
+                channel=entry["midi_channel"],
+                sender=sender,
+                **options,
+            )
+            if params:
+                processor.update(**params)
+            self.instances.append(Instance(entry["name"], entry["input_channel"], processor))
+
+        workers = config.get("workers")
+        if workers is None:
+            workers = min(len(self.instances), os.cpu_count() or 1)
+        self.workers = max(1, min(int(workers), len(self.instances)))
+        self._pool = (
+            ThreadPoolExecutor(self.workers - 1, thread_name_prefix="midiline-host")
+            if self.workers > 1
+            else None
+        )
+
+        by_device: Dict[object, List[Instance]] = {}
+        for entry, instance in zip(config["instances"], self.instances):
+            by_device.setdefault(entry["device"], []).append(instance)
+        self.groups = [
+            DeviceGroup(device, instances, self.buffer_size, self._pool)
+            for device, instances in by_device.items()
+        ]
+
+    def _sender(self, name: str, latency: Optional[float]) -> MidiSender:
+        if name not in self.senders:
+            try:
+                port = mido.open_output(name, virtual=True)
+            except IOError:
+                port = mido.open_output(name)
+            self.ports[name] = port
+            self.senders[name] = MidiSender(port, latency=latency)
+            if self.record_dir:
+                os.makedirs(self.record_dir, exist_ok=True)
+                recorder = MidiFileRecorder(os.path.join(self.record_dir, f"{name}.mid"))
+                recorder.start()
+                self.senders[name].add_sink(recorder)
+                self.recorders[name] = recorder
+        return self.senders[name]
+
+    def stats(self) -> dict:
+        return {
+            "instances": [instance.stats() for instance in self.instances],
+            "devices": [
+                {"device": group.device, "callback": group.callback_time.summary()}
+                for group in self.groups
+            ],
+        }
+
+    def reset_stats(self) -> None:
+        for instance in self.instances:
+            instance.reset_stats()
+        for group in self.groups:
+            group.callback_time.reset()
+
+    def close(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+        for instance in self.instances:
+            instance.processor.close()
+        for sender in self.senders.values():
+            sender.stop()
+        for recorder in self.recorders.values():
+            recorder.stop()
+        for port in self.ports.values():
+            port.close()
@@ -0,0 +1,84 @@
+"""Low-overhead timing histograms for the real-time path."""
+
+from __future__ import annotations
+
+from typing import Dict
+
+import numpy as np
+
+
+class LatencyHistogram:
+    """Fixed-size histogram of durations with power-of-two microsecond bins.
+
+    Bin ``k`` counts durations below ``2**k`` microseconds (the last bin is
+    open-ended). There is a single writer, usually the audio thread, and
+    readers only take snapshots, so no lock is involved.
+    """
+
+    BINS = 32
+
+    def __init__(self) -> None:
+        self.counts = np.zeros(self.BINS, dtype=np.int64)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, seconds: float) -> None:
+        micros = int(seconds * 1e6)
+        self.counts[min(micros.bit_length(), self.BINS - 1)] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def percentile(self, q: float) -> float:
+        """Upper bound in seconds of the bin holding the ``q``-th percentile."""
+        counts = self.counts.copy()
+        total = int(counts.sum())
+        if total == 0:
+            return 0.0
+        rank = np.searchsorted(np.cumsum(counts), q / 100.0 * total)
+        return min(float(2 ** int(rank)) * 1e-6, self.max)
+
+    def summary(self) -> Dict[str, float]:
+        count = self.count
+        return {
+            "count": count,
+            "mean_us": self.total / count * 1e6 if count else 0.0,
+            "p50_us": self.percentile(50) * 1e6,
+            "p99_us": self.percentile(99) * 1e6,
+            "max_us": self.max * 1e6,
+        }
+
+    def reset(self) -> None:
+        self.counts[:] = 0
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+
+def format_stats(stats: dict) -> str:
+    """One-line human readable rendering of ``RealTimeProcessor.stats()``."""
+    parts = [
+        f"bloques={stats['blocks']}",
+        f"excesos={stats['overruns']}",
+        f"overflows={stats['input_overflows']}",
+        f"omitidos={stats['skipped']}",
+    ]
+    for name, stage in stats["stages"].items():
+        if stage["count"]:
+            parts.append(f"{name}={stage['p50_us']:.0f}/{stage['p99_us']:.0f}us")
+    pitch = stats.get("pitch")
+    if pitch and pitch.get("tracked"):
+        fallbacks = sum(v for k, v in pitch.items() if k not in ("full", "tracked"))
+        parts.append(f"seguimiento={pitch['tracked']}/{pitch['full']} recaídas={fallbacks}")
+    midi = stats.get("midi")
+    if midi:
+        send = midi["send"]
+        if send["count"]:
+            parts.append(f"midi_send={send['p50_us']:.0f}/{send['p99_us']:.0f}us")
+        late = midi.get("late")
+        if late and late["count"]:
+            parts.append(f"retraso={late['p50_us']:.0f}/{late['p99_us']:.0f}us")
+        parts.append(f"cola={midi['queue_depth']} descartes={midi['dropped']}")
+    return " ".join(parts)
@@ -1,35 +1,109 @@
 from typing import Iterable
+import heapq
+import itertools
+import threading
 import time
 import mido
 
 from .events import NoteEvent
 
+# At equal times note-offs go first so a repeated note is retriggered; the
+# off of a zero-length note still follows its own on.
+_OFF_PRIORITY = 0
+_ON_PRIORITY = 1
+_ZERO_LENGTH_OFF_PRIORITY = 2
+
+
 class MidiOutput:
-    """Send NoteOn/NoteOff messages to a MIDI output port."""
+    """Send NoteOn/NoteOff messages to a MIDI output port.
+
+    Note-ons and note-offs share a single priority queue keyed by their
+    deadline, so overlapping notes play concurrently and timing does not
+    drift with the number of events. Deadlines are measured on
+    :func:`time.perf_counter` from the start of :meth:`play`.
+    """
 
     def __init__(self, port_name: str = "MidiLine Output"):
         # Create a virtual output so DAWs can connect.
         self.port = mido.open_output(port_name, virtual=True)
+        self._heap = []
+        self._order = itertools.count()
+        self._cond = threading.Condition()
+        self._stopped = False
+        self._start = None
+
+    def schedule(self, events: Iterable[NoteEvent]) -> None:
+        """Add events to the queue.
+
+        May be called from another thread while :meth:`play` is running;
+        event times stay relative to the start of that playback.
+        """
+        with self._cond:
+            for event in events:
+                start = float(event.start)
+                end = max(float(event.end), start)
+                note_on = mido.Message(
+                    'note_on', note=event.note, velocity=event.velocity, channel=event.channel
+                )
+                note_off = mido.Message(
+                    'note_off', note=event.note, velocity=0, channel=event.channel
+                )
+                heapq.heappush(self._heap, (start, _ON_PRIORITY, next(self._order), note_on))
+                off_priority = _OFF_PRIORITY if end > start else _ZERO_LENGTH_OFF_PRIORITY
+                heapq.heappush(self._heap, (end, off_priority, next(self._order), note_off))
+            self._cond.notify()
+
+    def play(self, events: Iterable[NoteEvent] = (), hold: bool = False):
+        """Play a sequence of NoteEvents in real time.
+
+        Returns once every scheduled message has been sent. With ``hold`` the
+        playback keeps waiting for events added through :meth:`schedule`
+        until :meth:`stop` is called.
+        """
+        with self._cond:
+            self._stopped = False
+            self._start = time.perf_counter()
+        self.schedule(events)
+        sounding = {}
+        due = []
+        while True:
+            with self._cond:
+                while not self._stopped:
+                    if not self._heap:
+                        if not hold:
+                            break
+                        self._cond.wait()
+                        continue
+                    wait = self._start + self._heap[0][0] - time.perf_counter()
+                    if wait <= 0:
+                        break
+                    self._cond.wait(wait)
+                if self._stopped or not self._heap:
+                    break
+                now = time.perf_counter() - self._start
+                while self._heap and self._heap[0][0] <= now:
+                    due.append(heapq.heappop(self._heap)[3])
+            for msg in due:
+                key = (msg.channel, msg.note)
+                if msg.type == 'note_on':
+                    sounding[key] = sounding.get(key, 0) + 1
+                elif sounding.get(key):
+                    sounding[key] -= 1
+                self.port.send(msg)
+            due.clear()
+
+        for (channel, note), count in sounding.items():
+            if count:
+                self.port.send(mido.Message('note_off', note=note, velocity=0, channel=channel))
+        with self._cond:
+            self._heap.clear()
+            self._start = None
 
-    def play(self, events: Iterable[NoteEvent]):
-        """Play a sequence of NoteEvents in real time."""
-        start_time = time.time()
-        for event in sorted(events, key=lambda e: e.start):
-            now = time.time()
-            wait = event.start - (now - start_time)
-            if wait > 0:
-                time.sleep(wait)
-            note_on = mido.Message(
-                'note_on', note=event.note, velocity=event.velocity, channel=event.channel
-            )
-            self.port.send(note_on)
-            duration = max(event.end - event.start, 0)
-            if duration > 0:
-                time.sleep(duration)
-            note_off = mido.Message(
-                'note_off', note=event.note, velocity=0, channel=event.channel
-            )
-            self.port.send(note_off)
+    def stop(self):
+        """Interrupt :meth:`play`, releasing any notes still sounding."""
+        with self._cond:
+            self._stopped = True
+            self._cond.notify()
 
     def close(self):
         if self.port:
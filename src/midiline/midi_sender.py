@@ -0,0 +1,195 @@
+import heapq
+import threading
+import time
+from typing import List, Optional, Tuple
+
+import mido
+import numpy as np
+
+from .instrumentation import LatencyHistogram
+
+NOTE_OFF = 0
+NOTE_ON = 1
+
+NOTE_RECORD = np.dtype([
+    ("kind", np.uint8),
+    ("note", np.uint8),
+    ("velocity", np.uint8),
+    ("channel", np.uint8),
+    ("time", np.float64),
+])
+
+
+class NoteQueue:
+    """Bounded single-producer/single-consumer queue of note records.
+
+    Records are stored in a preallocated structured array. Only the producer
+    advances ``_head`` and only the consumer advances ``_tail``, so pushing
+    from the audio callback never takes a lock. When the queue is full the
+    record is dropped and counted instead of blocking. ``time`` is the
+    event's position on the :func:`time.perf_counter` clock.
+    """
+
+    def __init__(self, capacity: int = 1024) -> None:
+        self.capacity = int(capacity)
+        if self.capacity <= 0:
+            raise ValueError("capacity must be positive")
+        self._records = np.zeros(self.capacity, dtype=NOTE_RECORD)
+        self._head = 0
+        self._tail = 0
+        self.dropped = 0
+
+    def __len__(self) -> int:
+        return self._head - self._tail
+
+    def push(self, kind: int, note: int, velocity: int, channel: int,
+             time: float = 0.0) -> bool:
+        """Append a record. Returns ``False`` if it had to be dropped."""
+        head = self._head
+        if head - self._tail >= self.capacity:
+            self.dropped += 1
+            return False
+        self._records[head % self.capacity] = (kind, note, velocity, channel, time)
+        self._head = head + 1
+        return True
+
+    def pop(self):
+        """Return the oldest record as a tuple, or ``None`` if empty."""
+        tail = self._tail
+        if tail == self._head:
+            return None
+        record = self._records[tail % self.capacity].item()
+        self._tail = tail + 1
+        return record
+
+
+class MidiSender(threading.Thread):
+    """Background thread that turns queued note records into MIDI messages.
+
+    Several producers can share one port by each registering its own queue
+    with :meth:`add_queue`; every queue keeps a single producer.
+
+    Without ``latency`` records are sent as soon as they are popped. With a
+    ``latency`` in seconds each record is held until its timestamp plus
+    ``latency``, which turns the variable processing delay into a constant
+    one; how late each send actually was is kept in :attr:`lateness`.
+
+    Sinks added with :meth:`add_sink` receive every record right after it is
+    sent, on the sender's thread, e.g. a :class:`MidiFileRecorder`.
+    """
+
+    def __init__(self, port, queue: Optional[NoteQueue] = None,
+                 poll_interval: float = 0.001, latency: Optional[float] = None) -> None:
+        super().__init__(daemon=True)
+        self.port = port
+        self.queue = queue
+        self.queues = [] if queue is None else [queue]
+        self.sinks = []
+        self.poll_interval = float(poll_interval)
+        self.latency = latency
+        self.sent = 0
+        self.max_depth = 0
+        self.send_time = LatencyHistogram()
+        self.lateness = LatencyHistogram()
+        self._pending: List[Tuple[float, int, tuple]] = []
+        self._seq = 0
+        self._stop_event = threading.Event()
+
+    def run(self) -> None:
+        while not self._stop_event.is_set():
+            if not self.drain():
+                wait = self.poll_interval
+                if self._pending:
+                    wait = min(wait, self._pending[0][0] - time.perf_counter())
+                if wait > 0:
+                    time.sleep(wait)
+        self.flush()
+
+    def add_queue(self, queue: NoteQueue) -> None:
+        """Also drain ``queue``. Safe to call while the thread runs."""
+        self.queues = self.queues + [queue]
+
+    def add_sink(self, sink) -> None:
+        """Also pass every sent record to ``sink.push``. Safe while running."""
+        self.sinks = self.sinks + [sink]
+
+    def remove_queue(self, queue: NoteQueue) -> None:
+        """Stop draining ``queue`` once what it holds has been taken.
+
+        Waits for the running thread to empty it, or drains it directly
+        when the thread is not running.
+        """
+        while len(queue) and self.is_alive():
+            time.sleep(self.poll_interval)
+        if len(queue):
+            self.drain()
+        self.queues = [other for other in self.queues if other is not queue]
+
+    def depth(self) -> int:
+        return sum(len(queue) for queue in self.queues) + len(self._pending)
+
+    def _send(self, record: tuple) -> None:
+        kind, note, velocity, channel, _ = record
+        msg_type = "note_on" if kind == NOTE_ON else "note_off"
+        start = time.perf_counter()
+        self.port.send(mido.Message(msg_type, note=note, velocity=velocity, channel=channel))
+        self.send_time.record(time.perf_counter() - start)
+        for sink in self.sinks:
+            sink.push(record)
+
+    def drain(self) -> int:
+        """Send every record that is due and return how many were sent."""
+        depth = self.depth()
+        if depth > self.max_depth:
+            self.max_depth = depth
+        count = 0
+        if self.latency is None:
+            for queue in self.queues:
+                record = queue.pop()
+                while record is not None:
+                    self._send(record)
+                    count += 1
+                    record = queue.pop()
+        else:
+            pending = self._pending
+            for queue in self.queues:
+                record = queue.pop()
+                while record is not None:
+                    heapq.heappush(pending, (record[4] + self.latency, self._seq, record))
+                    self._seq += 1
+                    record = queue.pop()
+            now = time.perf_counter()
+            while pending and pending[0][0] <= now:
+                due, _, record = heapq.heappop(pending)
+                self.lateness.record(max(0.0, time.perf_counter() - due))
+                self._send(record)
+                count += 1
+        self.sent += count
+        return count
+
+    def flush(self) -> int:
+        """Send everything queued or held, ignoring the latency schedule."""
+        count = self.drain()
+        while self._pending:
+            self._send(heapq.heappop(self._pending)[2])
+            count += 1
+            self.sent += 1
+        return count
+
+    def stop(self) -> None:
+        """Stop the thread after sending whatever is still queued."""
+        self._stop_event.set()
+        if self.is_alive():
+            self.join()
+        else:
+            self.flush()
+
+    def stats(self) -> dict:
+        return {
+            "queue_depth": self.depth(),
+            "max_queue_depth": self.max_depth,
+            "sent": self.sent,
+            "dropped": sum(queue.dropped for queue in self.queues),
+            "send": self.send_time.summary(),
+            "late": self.lateness.summary(),
+        }
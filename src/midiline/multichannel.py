@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
+from time import perf_counter
+from typing import List, Sequence
+
+import mido
+import numpy as np
+
+from .instrumentation import LatencyHistogram
+from .midi_sender import MidiSender
+from .realtime import RealTimeProcessor
+
+
+class MultiChannelProcessor:
+    """Analyse several channels of one input stream in parallel.
+
+    Each entry of ``input_channels`` (0-based device channels) gets its own
+    ``processor_class`` instance (:class:`RealTimeProcessor` by default)
+    sending on the MIDI channel with the same position in
+    ``midi_channels``. All processors share one MIDI port and
+    sender thread, which applies ``latency`` as in
+    :class:`RealTimeProcessor`. :meth:`process_block` takes the interleaved
+    ``(frames, channels)`` block of a single stream callback, copies each
+    channel into a preallocated contiguous row and runs the analyses on a
+    thread pool; NumPy and the FFT release the GIL, so channels overlap.
+    """
+
+    def __init__(
+        self,
+        input_channels: Sequence[int],
+        midi_port: str = "MidiLine",
+        buffer_size: int = 1024,
+        samplerate: int = 44100,
+        midi_channels: Sequence[int] | None = None,
+        workers: int | None = None,
+        threaded_output: bool = True,
+        processor_class: type = RealTimeProcessor,
+        latency: float | None = None,
+        **processor_options,
+    ) -> None:
+        self.input_channels = [int(ch) for ch in input_channels]
+        if not self.input_channels:
+            raise ValueError("at least one input channel is required")
+        if midi_channels is None:
+            midi_channels = range(len(self.input_channels))
+        midi_channels = [int(ch) for ch in midi_channels]
+        if len(midi_channels) != len(self.input_channels):
+            raise ValueError("midi_channels must match input_channels")
+
+        try:
+            self.out_port = mido.open_output(midi_port, virtual=True)
+        except IOError:
+            self.out_port = mido.open_output(midi_port)
+        self.sender = MidiSender(self.out_port, latency=latency)
+        self.processors: List[RealTimeProcessor] = [
+            processor_class(
+                buffer_size=buffer_size,
+                samplerate=samplerate,
+                channel=midi_channel,
+                sender=self.sender,
+                **processor_options,
+            )
+            for midi_channel in midi_channels
+        ]
+        if threaded_output:
+            self.sender.start()
+
+        self._channels = np.zeros((len(self.input_channels), buffer_size), dtype=np.float32)
+        if workers is None:
+            workers = len(self.processors)
+        self.workers = max(0, min(int(workers), len(self.processors)))
+        self._pool = (
+            ThreadPoolExecutor(self.workers, thread_name_prefix="midiline-channel")
+            if self.workers > 1
+            else None
+        )
+        self.callback_time = LatencyHistogram()
+
+    @property
+    def num_device_channels(self) -> int:
+        """Number of channels the input stream must be opened with."""
+        return max(self.input_channels) + 1
+
+    def _run(self, index: int, frames: int, status, time: float) -> None:
+        self.processors[index].process_block(self._channels[index, :frames], status, time)
+
+    def process_block(self, indata: np.ndarray, status=None, time: float | None = None) -> None:
+        """De-interleave one ``(frames, channels)`` block and analyse it.
+
+        ``time`` is the block's capture time, as for
+        :meth:`RealTimeProcessor.process_block`.
+        """
+        start = perf_counter()
+        frames = len(indata)
+        if time is None:
+            time = start - frames / self.processors[0].samplerate
+        if frames > self._channels.shape[1]:
+            self._channels = np.zeros((len(self.input_channels), frames), dtype=np.float32)
+        for row, channel in enumerate(self.input_channels):
+            self._channels[row, :frames] = indata[:, channel]
+
+        if self._pool is None:
+            for index in range(len(self.processors)):
+                self._run(index, frames, status, time)
+        else:
+            futures = [
+                self._pool.submit(self._run, index, frames, status, time)
+                for index in range(len(self.processors))
+            ]
+            for future in futures:
+                future.result()
+        self.callback_time.record(perf_counter() - start)
+
+    def stats(self) -> dict:
+        return {
+            "callback": self.callback_time.summary(),
+            "channels": [processor.stats() for processor in self.processors],
+            "midi": self.sender.stats(),
+        }
+
+    def close(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+        for processor in self.processors:
+            processor.close()
+        self.sender.stop()
+        self.out_port.close()
@@ -1,59 +1,480 @@
+from __future__ import annotations
+
 import numpy as np
-from scipy.signal import medfilt
+
+from .preprocess import design_decimator, frame_audio
+
+
+_RFFT_HAS_OUT = int(np.__version__.split(".")[0]) >= 2
+
+
+def _next_pow2(n: int) -> int:
+    return 1 << max(0, int(n) - 1).bit_length()
+
+
+class DifferenceFunction:
+    """YIN difference function for every lag at once.
+
+    ``d(tau) = E(0) + E(tau) - 2 r(tau)``, where ``r`` is the autocorrelation
+    obtained from a single FFT product and ``E`` are window energies read
+    from a prefix sum of squares. All work buffers are allocated once for
+    ``frame_size``, so an instance must not be shared between threads.
+    """
+
+    def __init__(self, frame_size: int) -> None:
+        self.frame_size = int(frame_size)
+        self.max_tau = self.frame_size // 2
+        self.n_fft = _next_pow2(2 * self.max_tau)
+        span = 2 * self.max_tau
+        self._signal = np.zeros(self.n_fft, dtype=np.float64)
+        self._kernel = np.zeros(self.n_fft, dtype=np.float64)
+        self._spec = np.zeros(self.n_fft // 2 + 1, dtype=np.complex128)
+        self._kernel_spec = np.zeros(self.n_fft // 2 + 1, dtype=np.complex128)
+        self._acf = np.zeros(self.n_fft, dtype=np.float64)
+        self._squares = np.zeros(span, dtype=np.float64)
+        self._energy = np.zeros(span + 1, dtype=np.float64)
+
+    def __call__(self, frame: np.ndarray, out: np.ndarray | None = None) -> np.ndarray:
+        """Return ``d(tau)`` for ``tau`` in ``[0, max_tau)``.
+
+        ``frame`` shorter than ``frame_size`` is treated as zero padded.
+        """
+        max_tau = self.max_tau
+        if out is None:
+            out = np.zeros(max_tau, dtype=np.float64)
+        if max_tau == 0:
+            return out
+
+        span = 2 * max_tau
+        x = self._signal
+        m = min(len(frame), span)
+        x[:m] = frame[:m]
+        x[m:] = 0.0
+        self._kernel[:max_tau] = x[:max_tau]
+
+        if _RFFT_HAS_OUT:
+            np.fft.rfft(x, out=self._spec)
+            np.fft.rfft(self._kernel, out=self._kernel_spec)
+        else:
+            self._spec[:] = np.fft.rfft(x)
+            self._kernel_spec[:] = np.fft.rfft(self._kernel)
+        np.conjugate(self._kernel_spec, out=self._kernel_spec)
+        np.multiply(self._spec, self._kernel_spec, out=self._spec)
+        if _RFFT_HAS_OUT:
+            np.fft.irfft(self._spec, n=self.n_fft, out=self._acf)
+        else:
+            self._acf[:] = np.fft.irfft(self._spec, n=self.n_fft)
+
+        np.square(x[:span], out=self._squares)
+        energy = self._energy
+        np.cumsum(self._squares, out=energy[1:])
+
+        acf = self._acf[:max_tau]
+        np.subtract(energy[max_tau:span], energy[:max_tau], out=out)
+        out += energy[max_tau]
+        acf *= 2.0
+        out -= acf
+        np.maximum(out, 0.0, out=out)
+        out[0] = 0.0
+        return out
+
+
+def cumulative_mean_normalized(
+    diffs: np.ndarray, out: np.ndarray | None = None, lags: np.ndarray | None = None
+) -> np.ndarray:
+    """Cumulative mean normalized difference of ``diffs`` along the last axis.
+
+    ``lags`` may hold a cached ``arange(1, diffs.shape[-1])`` to avoid
+    allocating it on every call.
+    """
+    if out is None:
+        out = np.empty(diffs.shape, dtype=np.float64)
+    max_tau = diffs.shape[-1]
+    if max_tau == 0:
+        return out
+    if lags is None:
+        lags = np.arange(1, max_tau, dtype=np.float64)
+    out[..., 0] = 1.0
+    running = out[..., 1:]
+    np.cumsum(diffs[..., 1:], axis=-1, out=running)
+    # A zero running sum only happens while every difference so far is zero,
+    # so the quotient below is 0 * inf = nan exactly where YIN defines 1.
+    with np.errstate(divide="ignore", invalid="ignore"):
+        np.divide(lags, running, out=running)
+        np.multiply(running, diffs[..., 1:], out=running)
+    np.nan_to_num(running, copy=False, nan=1.0)
+    return out
+
+
+def _best_period(cmnd: np.ndarray, threshold: float) -> float:
+    """Pick the YIN period from ``cmnd`` with parabolic refinement."""
+    max_tau = len(cmnd)
+    if max_tau < 2:
+        return 0.0
+    below = (cmnd[1:-1] < threshold) & (cmnd[1:-1] <= cmnd[2:])
+    first = int(np.argmax(below)) if below.size else 0
+    if below.size and below[first]:
+        tau = first + 1
+    else:
+        tau = int(np.argmin(cmnd[1:]) + 1)
+
+    better_tau = float(tau)
+    if 1 <= tau < max_tau - 1:
+        x0, x1, x2 = cmnd[tau - 1], cmnd[tau], cmnd[tau + 1]
+        denom = 2 * (2 * x1 - x2 - x0)
+        if denom != 0:
+            better_tau = tau + (x2 - x0) / denom
+    return better_tau
+
+
+def _lag_differences(x: np.ndarray, width: int, lo: int, hi: int,
+                     energy: np.ndarray) -> np.ndarray:
+    """Direct YIN difference ``d(tau)`` for ``tau`` in ``[lo, hi]``.
+
+    ``energy`` must hold the prefix sum of ``x ** 2`` with a leading zero.
+    Cheaper than the FFT path when only a narrow band of lags is needed.
+    """
+    diffs = np.correlate(x[lo:hi + width], x[:width], mode="valid")
+    diffs *= -2.0
+    diffs += energy[lo + width:hi + width + 1]
+    diffs -= energy[lo:hi + 1]
+    diffs += energy[width]
+    np.maximum(diffs, 0.0, out=diffs)
+    return diffs
 
 
 class FastYin:
-    """Stateful YIN pitch detector with minimal allocations."""
+    """Stateful YIN pitch detector with minimal allocations.
 
-    def __init__(self, frame_size: int, sr: int, threshold: float = 0.1) -> None:
+    With ``tracking`` enabled, a confident estimate is followed on the next
+    frames by evaluating the difference function only for lags within
+    ``track_cents`` of the previous period. A full search is used again on
+    an energy onset, when the aperiodicity at the tracked minimum exceeds
+    ``threshold``, when the minimum sits on the edge of the window or when
+    the half period is also periodic (octave jump). :attr:`counters`
+    records how often each path was taken.
+    """
+
+    FALLBACKS = ("onset", "confidence", "edge", "octave")
+
+    def __init__(
+        self,
+        frame_size: int,
+        sr: int,
+        threshold: float = 0.1,
+        tracking: bool = False,
+        track_cents: float = 200.0,
+        onset_ratio: float = 4.0,
+    ) -> None:
         self.sr = sr
         self.threshold = float(threshold)
         self.frame_size = frame_size
         self.max_tau = frame_size // 2
-        self.diffs = np.zeros(self.max_tau, dtype=np.float32)
-        self.cmnd = np.zeros(self.max_tau, dtype=np.float32)
+        self.difference = DifferenceFunction(frame_size)
+        self.diffs = np.zeros(self.max_tau, dtype=np.float64)
+        self.cmnd = np.zeros(self.max_tau, dtype=np.float64)
+        self._lags = np.arange(1, self.max_tau, dtype=np.float64)
+
+        self.tracking = bool(tracking)
+        self.track_ratio = 2.0 ** (float(track_cents) / 1200.0)
+        self.onset_ratio = float(onset_ratio)
+        self._frame = np.zeros(2 * self.max_tau, dtype=np.float64)
+        self._energy = np.zeros(2 * self.max_tau + 1, dtype=np.float64)
+        self.counters = dict.fromkeys(("full", "tracked") + self.FALLBACKS, 0)
+        self.reset()
+
+    def reset(self) -> None:
+        """Forget the tracked period so the next frame gets a full search."""
+        self._period = 0.0
+        self._frame_energy = 0.0
 
     def __call__(self, frame: np.ndarray) -> float:
-        frame = np.asarray(frame, dtype=np.float32)
-        if len(frame) < self.frame_size:
-            frame = np.pad(frame, (0, self.frame_size - len(frame)))
-        else:
-            frame = frame[: self.frame_size]
+        if self.tracking:
+            better_tau = self._track(frame)
+            if better_tau > 0:
+                self.counters["tracked"] += 1
+                return float(self.sr) / better_tau
 
-        max_tau = self.max_tau
-        diffs = self.diffs
-        for tau in range(1, max_tau):
-            delta = frame[:max_tau] - frame[tau : tau + max_tau]
-            diffs[tau] = float(np.dot(delta, delta))
-
-        cmnd = self.cmnd
-        cmnd[0] = 1.0
-        running_sum = 0.0
-        for tau in range(1, max_tau):
-            running_sum += diffs[tau]
-            cmnd[tau] = diffs[tau] * tau / running_sum if running_sum != 0 else 1.0
-
-        tau_est = 0
-        for i in range(1, max_tau - 1):
-            if cmnd[i] < self.threshold and cmnd[i] <= cmnd[i + 1]:
-                tau_est = i
-                break
-
-        if tau_est == 0:
-            tau_est = int(np.argmin(cmnd[1:]) + 1)
-        if tau_est == 0:
+        self.counters["full"] += 1
+        self.difference(frame, out=self.diffs)
+        cmnd_values = cumulative_mean_normalized(self.diffs, out=self.cmnd, lags=self._lags)
+        better_tau = _best_period(cmnd_values, self.threshold)
+        if better_tau <= 0:
             return 0.0
+        if self.tracking:
+            tau = int(round(better_tau))
+            confident = 0 < tau < self.max_tau and cmnd_values[tau] < self.threshold
+            self._period = better_tau if confident else 0.0
+        return float(self.sr) / better_tau
+
+    def _aperiodicity(self, x: np.ndarray, lo: int, hi: int) -> np.ndarray:
+        """``d(tau) / (E(0) + E(tau))`` for lags ``lo..hi``, a cheap CMND proxy."""
+        width = self.max_tau
+        energy = self._energy
+        diffs = _lag_differences(x, width, lo, hi, energy)
+        norm = energy[lo + width:hi + width + 1] - energy[lo:hi + 1] + energy[width]
+        np.maximum(norm, 1e-20, out=norm)
+        diffs /= norm
+        return diffs
+
+    def _track(self, frame: np.ndarray) -> float:
+        """Search around the previous period; return 0.0 to request a full search."""
+        period = self._period
+        x = self._frame
+        m = min(len(frame), len(x))
+        x[:m] = frame[:m]
+        x[m:] = 0.0
+        np.cumsum(np.square(x), out=self._energy[1:])
+        frame_energy = self._energy[self.max_tau]
+        previous_energy = self._frame_energy
+        self._frame_energy = frame_energy
+        if period <= 0:
+            return 0.0
+        if frame_energy > self.onset_ratio * previous_energy:
+            return self._fallback("onset")
+
+        lo = max(2, int(period / self.track_ratio))
+        hi = min(self.max_tau - 2, int(np.ceil(period * self.track_ratio)))
+        if hi - lo < 2:
+            return self._fallback("edge")
+        values = self._aperiodicity(x, lo - 1, hi + 1)
+        k = int(np.argmin(values[1:-1])) + 1
+        if k == 1 or k == len(values) - 2:
+            return self._fallback("edge")
+        if values[k] >= self.threshold:
+            return self._fallback("confidence")
+        tau = lo - 1 + k
+        half = tau // 2
+        if half >= 2 and self._aperiodicity(x, half, half)[0] < self.threshold:
+            return self._fallback("octave")
+
+        better_tau = float(tau)
+        x0, x1, x2 = values[k - 1], values[k], values[k + 1]
+        denom = 2 * (2 * x1 - x2 - x0)
+        if denom != 0:
+            better_tau += (x2 - x0) / denom
+        self._period = better_tau
+        return better_tau
+
+    def _fallback(self, reason: str) -> float:
+        self.counters[reason] += 1
+        self._period = 0.0
+        return 0.0
+
+
+class CoarseToFineYin:
+    """Two-stage YIN: coarse search on a decimated frame, full-rate refinement.
+
+    The frame is decimated by ``decimation`` through a cached FIR anti-alias
+    filter evaluated only at the retained samples. YIN then runs on the
+    decimated signal over the lags up to ``min_freq`` and picks its period
+    among the lags down to ``max_freq``. Finally the difference function is
+    evaluated at full rate only for the ``2 * decimation + 1`` lags around
+    the candidate and its minimum is refined parabolically.
+    """
 
-        better_tau = float(tau_est)
-        if 1 <= tau_est < max_tau - 1:
-            x0, x1, x2 = cmnd[tau_est - 1], cmnd[tau_est], cmnd[tau_est + 1]
+    def __init__(
+        self,
+        frame_size: int,
+        sr: int,
+        threshold: float = 0.1,
+        min_freq: float = 60.0,
+        max_freq: float = 1500.0,
+        decimation: int = 4,
+    ) -> None:
+        self.sr = sr
+        self.threshold = float(threshold)
+        self.frame_size = frame_size
+        self.max_tau = frame_size // 2
+        self.decimation = max(1, int(decimation))
+        coarse_sr = sr / self.decimation
+        self.fir = design_decimator(self.decimation) if self.decimation > 1 else np.ones(1)
+        self.coarse_size = frame_size // self.decimation
+        self.coarse_width = self.coarse_size // 2
+        max_freq = min(float(max_freq), 0.4 * coarse_sr)
+        self.lag_min = max(1, int(coarse_sr / max_freq))
+        self.lag_max = min(
+            self.coarse_width - 2, int(np.ceil(coarse_sr / float(min_freq))) + 1
+        )
+        self.cmnd = np.zeros(self.lag_max + 2, dtype=np.float64)
+        self._lags = np.arange(1, self.lag_max + 2, dtype=np.float64)
+
+        # Zero tail so the FIR can run past the last retained sample.
+        self._padded = np.zeros(frame_size + len(self.fir), dtype=np.float64)
+        self._frame = self._padded[:frame_size]
+        stride = self._padded.strides[0]
+        self._taps = np.lib.stride_tricks.as_strided(
+            self._padded,
+            shape=(self.coarse_size, len(self.fir)),
+            strides=(self.decimation * stride, stride),
+            writeable=False,
+        )
+        self._decimated = np.zeros(self.coarse_size, dtype=np.float64)
+        self._coarse_energy = np.zeros(self.coarse_size + 1, dtype=np.float64)
+        self._energy = np.zeros(frame_size + 1, dtype=np.float64)
+
+    def reset(self) -> None:
+        """No state is carried between frames."""
+
+    def _coarse_lag(self) -> int:
+        """Decimated lag of the first dip below threshold within the lag window."""
+        lo, hi = self.lag_min, self.lag_max
+        if hi <= lo:
+            return 0
+        y = self._decimated
+        np.dot(self._taps, self.fir, out=y)
+        energy = self._coarse_energy
+        np.cumsum(np.square(y), out=energy[1:])
+        diffs = _lag_differences(y, self.coarse_width, 0, hi + 1, energy)
+        diffs[0] = 0.0
+        cmnd = cumulative_mean_normalized(diffs, out=self.cmnd, lags=self._lags)
+
+        window = cmnd[lo:hi + 2]
+        below = (window[:-1] < self.threshold) & (window[:-1] <= window[1:])
+        first = int(np.argmax(below))
+        if below[first]:
+            return lo + first
+        return lo + int(np.argmin(window[:-1]))
+
+    def __call__(self, frame: np.ndarray) -> float:
+        x = self._frame
+        m = min(len(frame), self.frame_size)
+        x[:m] = frame[:m]
+        x[m:] = 0.0
+
+        candidate = self._coarse_lag() * self.decimation
+        if candidate == 0:
+            return 0.0
+        width = self.max_tau
+        lo = max(1, candidate - self.decimation)
+        hi = min(width - 1, candidate + self.decimation)
+        if hi < lo:
+            return 0.0
+        span = width + hi
+        energy = self._energy
+        np.cumsum(np.square(x[:span]), out=energy[1:span + 1])
+        diffs = _lag_differences(x, width, lo, hi, energy)
+
+        k = int(np.argmin(diffs))
+        better_tau = float(lo + k)
+        if 0 < k < len(diffs) - 1:
+            x0, x1, x2 = diffs[k - 1], diffs[k], diffs[k + 1]
             denom = 2 * (2 * x1 - x2 - x0)
             if denom != 0:
-                better_tau = tau_est + (x2 - x0) / denom
-
+                better_tau += (x2 - x0) / denom
         return float(self.sr) / better_tau
 
 
+class HarmonicProductSpectrum:
+    """Harmonic product spectrum detector.
+
+    The magnitude spectrum of the windowed, zero-padded frame is multiplied
+    by copies of itself decimated by ``2..harmonics``, and the strongest
+    product bin between ``min_freq`` and ``max_freq`` is refined with a
+    parabola on the log product. Magnitudes are floored at ``floor`` times
+    the spectral peak; when the winning bin has no energy of its own above
+    that floor the plain spectral peak is used instead. ``threshold`` is only
+    accepted for interface compatibility.
+    """
+
+    def __init__(
+        self,
+        frame_size: int,
+        sr: int,
+        threshold: float = 0.1,
+        min_freq: float = 60.0,
+        max_freq: float = 2000.0,
+        harmonics: int = 4,
+        zero_pad: int = 2,
+        floor: float = 0.03,
+    ) -> None:
+        self.frame_size = int(frame_size)
+        self.sr = sr
+        self.harmonics = max(1, int(harmonics))
+        self.floor = float(floor)
+        self.n_fft = _next_pow2(self.frame_size * max(1, int(zero_pad)))
+        self.window = np.hanning(self.frame_size)
+        self._buffer = np.zeros(self.n_fft, dtype=np.float64)
+        self._spec = np.zeros(self.n_fft // 2 + 1, dtype=np.complex128)
+        self._mag = np.zeros(self.n_fft // 2 + 1, dtype=np.float64)
+        self._length = len(self._mag) // self.harmonics
+        self._product = np.zeros(self._length, dtype=np.float64)
+        bin_hz = sr / self.n_fft
+        self.lo_bin = max(1, int(np.ceil(min_freq / bin_hz)))
+        self.hi_bin = min(self._length - 2, int(max_freq / bin_hz))
+
+    def reset(self) -> None:
+        """No state is carried between frames."""
+
+    def __call__(self, frame: np.ndarray) -> float:
+        m = min(len(frame), self.frame_size)
+        buffer = self._buffer
+        np.multiply(frame[:m], self.window[:m], out=buffer[:m])
+        buffer[m:] = 0.0
+        if _RFFT_HAS_OUT:
+            np.fft.rfft(buffer, out=self._spec)
+        else:
+            self._spec[:] = np.fft.rfft(buffer)
+        mag = self._mag
+        np.abs(self._spec, out=mag)
+        # Clamping at the floor keeps a missing harmonic from zeroing the
+        # product of an otherwise clean candidate.
+        limit = self.floor * mag.max()
+        if limit <= 0.0:
+            return 0.0
+        np.maximum(mag, limit, out=mag)
+
+        product = self._product
+        product[:] = mag[:self._length]
+        for h in range(2, self.harmonics + 1):
+            product *= mag[::h][:self._length]
+
+        lo, hi = self.lo_bin, self.hi_bin
+        if hi <= lo:
+            return 0.0
+        k = lo + int(np.argmax(product[lo:hi + 1]))
+        curve = product
+        if mag[k - 1:k + 2].max() <= limit:
+            # Nothing at the candidate fundamental: a pure tone tied with its
+            # subharmonics, so the spectral peak itself is the answer.
+            k = lo + int(np.argmax(mag[lo:hi + 1]))
+            curve = mag
+        x0, x1, x2 = np.log(curve[k - 1:k + 2])
+        denom = 2 * (2 * x1 - x2 - x0)
+        shift = (x2 - x0) / denom if denom > 0 else 0.0
+        return (k + shift) * self.sr / self.n_fft
+
+
+class AubioPitch:
+    """Adapter for aubio's C pitch detectors (``yinfft``, ``yinfast``...).
+
+    ``tolerance`` means something different for each aubio method (yinfft
+    expects about 0.85, yin and yinfast about 0.15), so it is left at
+    aubio's default for the method unless given.
+    """
+
+    def __init__(self, frame_size: int, sr: int, tolerance: float | None = None,
+                 method: str = "yinfft") -> None:
+        import aubio
+
+        self.frame_size = int(frame_size)
+        self.method = method
+        self._detector = aubio.pitch(method, self.frame_size, self.frame_size, int(sr))
+        self._detector.set_unit("Hz")
+        if tolerance is not None:
+            self._detector.set_tolerance(float(tolerance))
+        self._buffer = np.zeros(self.frame_size, dtype=aubio.float_type)
+
+    def reset(self) -> None:
+        """aubio keeps no state that matters between frames."""
+
+    def __call__(self, frame: np.ndarray) -> float:
+        m = min(len(frame), self.frame_size)
+        self._buffer[:m] = frame[:m]
+        self._buffer[m:] = 0.0
+        return float(self._detector(self._buffer)[0])
+
+
 def yin(frame: np.ndarray, sr: int, threshold: float = 0.1) -> float:
     """Estimate fundamental frequency of an audio frame using the YIN algorithm.
 
@@ -72,54 +493,119 @@ def yin(frame: np.ndarray, sr: int, threshold: float = 0.1) -> float:
         Estimated fundamental frequency in Hz. Returns 0.0 if no pitch is
         found.
     """
-    frame = frame.astype(float)
+    frame = np.asarray(frame, dtype=float)
     n = len(frame)
     if n == 0:
         return 0.0
 
-    max_tau = n // 2
-    diffs = np.zeros(max_tau)
-    for tau in range(1, max_tau):
-        delta = frame[:max_tau] - frame[tau:tau + max_tau]
-        diffs[tau] = np.sum(delta * delta)
-
-    cmnd = np.zeros_like(diffs)
-    cmnd[0] = 1
-    running_sum = 0.0
-    for tau in range(1, max_tau):
-        running_sum += diffs[tau]
-        cmnd[tau] = diffs[tau] * tau / running_sum if running_sum != 0 else 1
-
-    tau = 0
-    for i in range(1, max_tau - 1):
-        if cmnd[i] < threshold and cmnd[i] <= cmnd[i + 1]:
-            tau = i
-            break
-    if tau == 0:
-        tau = np.argmin(cmnd[1:]) + 1
-
-    if tau == 0:
+    diffs = DifferenceFunction(n)(frame)
+    better_tau = _best_period(cumulative_mean_normalized(diffs), threshold)
+    if better_tau <= 0:
         return 0.0
+    return float(sr) / better_tau
 
-    better_tau = float(tau)
-    if 1 <= tau < max_tau - 1:
-        x0, x1, x2 = cmnd[tau - 1], cmnd[tau], cmnd[tau + 1]
-        denom = 2 * (2 * x1 - x2 - x0)
-        if denom != 0:
-            better_tau = tau + (x2 - x0) / denom
 
-    return float(sr) / better_tau
+def _difference_batch(frames: np.ndarray, max_tau: int) -> np.ndarray:
+    """:class:`DifferenceFunction` applied to every row of ``frames``."""
+    span = 2 * max_tau
+    n_fft = _next_pow2(span)
+    x = np.asarray(frames[:, :span], dtype=np.float64)
+    spec = np.fft.rfft(x, n=n_fft, axis=1)
+    kernel = np.fft.rfft(x[:, :max_tau], n=n_fft, axis=1)
+    np.conjugate(kernel, out=kernel)
+    spec *= kernel
+    acf = np.fft.irfft(spec, n=n_fft, axis=1)[:, :max_tau]
+
+    energy = np.zeros((len(x), span + 1))
+    np.cumsum(np.square(x), axis=1, out=energy[:, 1:])
+    diffs = energy[:, max_tau:span] - energy[:, :max_tau]
+    diffs += energy[:, max_tau:max_tau + 1]
+    acf *= 2.0
+    diffs -= acf
+    np.maximum(diffs, 0.0, out=diffs)
+    diffs[:, 0] = 0.0
+    return diffs
+
+
+def _best_periods(cmnd: np.ndarray, threshold: float) -> np.ndarray:
+    """Row-wise :func:`_best_period` for a ``(num_frames, max_tau)`` array."""
+    num_frames, max_tau = cmnd.shape
+    if max_tau < 2:
+        return np.zeros(num_frames)
+    rows = np.arange(num_frames)
+    if max_tau > 2:
+        inner = cmnd[:, 1:-1]
+        below = (inner < threshold) & (inner <= cmnd[:, 2:])
+        found = below.any(axis=1)
+        first = np.argmax(below, axis=1) + 1
+    else:
+        found = np.zeros(num_frames, dtype=bool)
+        first = np.ones(num_frames, dtype=np.intp)
+    tau = np.where(found, first, np.argmin(cmnd[:, 1:], axis=1) + 1)
+
+    refine = (tau >= 1) & (tau < max_tau - 1)
+    left = np.clip(tau - 1, 0, max_tau - 1)
+    right = np.clip(tau + 1, 0, max_tau - 1)
+    x0 = cmnd[rows, left]
+    x1 = cmnd[rows, tau]
+    x2 = cmnd[rows, right]
+    denom = 2 * (2 * x1 - x2 - x0)
+    refine &= denom != 0
+    shift = np.zeros(num_frames)
+    np.divide(x2 - x0, denom, out=shift, where=refine)
+    return tau + shift
+
+
+def yin_frames(frames: np.ndarray, sr: int, threshold: float = 0.1) -> np.ndarray:
+    """Vectorized :func:`yin` over the rows of a ``(num_frames, frame_size)`` array."""
+    frames = np.atleast_2d(frames)
+    max_tau = frames.shape[1] // 2
+    if len(frames) == 0 or frames.shape[1] == 0:
+        return np.zeros(len(frames))
+    cmnd = cumulative_mean_normalized(_difference_batch(frames, max_tau))
+    periods = _best_periods(cmnd, threshold)
+    pitches = np.zeros(len(frames))
+    np.divide(float(sr), periods, out=pitches, where=periods > 0)
+    return pitches
 
 
 def pitch_track(signal: np.ndarray, sr: int, frame_size: int = 2048,
                 hop_size: int = 512, threshold: float = 0.1,
-                smooth: int = 5) -> np.ndarray:
-    """Track pitch over time using YIN and apply median smoothing."""
-    pitches = []
-    for start in range(0, len(signal) - frame_size + 1, hop_size):
-        frame = signal[start:start + frame_size]
-        pitches.append(yin(frame, sr, threshold))
-    pitches = np.array(pitches)
-    if smooth > 1:
+                smooth: int = 5, chunk_frames: int = 256, search: str = "full",
+                min_freq: float = 60.0, max_freq: float = 1500.0) -> np.ndarray:
+    """Track pitch over time using YIN and apply median smoothing.
+
+    Frames are analysed ``chunk_frames`` at a time with :func:`yin_frames`,
+    which bounds peak memory regardless of the signal length. With
+    ``search="coarse"`` each frame goes through :class:`CoarseToFineYin`
+    limited to ``[min_freq, max_freq]`` instead, and with ``search="track"``
+    through a tracking :class:`FastYin`.
+    """
+    if search == "full":
+        detector = None
+    elif search == "coarse":
+        detector = CoarseToFineYin(frame_size, sr, threshold, min_freq=min_freq,
+                                   max_freq=max_freq)
+    elif search == "track":
+        detector = FastYin(frame_size, sr, threshold, tracking=True)
+    else:
+        raise ValueError(f"unknown pitch search: {search!r}")
+    signal = np.asarray(signal)
+    num_frames = max(0, 1 + (len(signal) - frame_size) // hop_size)
+    pitches = np.zeros(num_frames)
+    chunk_frames = max(1, int(chunk_frames))
+    for first in range(0, num_frames, chunk_frames):
+        count = min(chunk_frames, num_frames - first)
+        start = first * hop_size
+        segment = signal[start:start + (count - 1) * hop_size + frame_size]
+        frames = frame_audio(segment, frame_size, hop_size)
+        if detector is None:
+            pitches[first:first + count] = yin_frames(frames, sr, threshold)
+        else:
+            for i, frame in enumerate(frames):
+                pitches[first + i] = detector(frame)
+    if smooth > 1 and num_frames:
+        from scipy.signal import medfilt
+
         pitches = medfilt(pitches, kernel_size=smooth)
     return pitches
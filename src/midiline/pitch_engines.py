@@ -0,0 +1,112 @@
+"""Registry of interchangeable pitch detectors.
+
+Every engine is built as ``factory(frame_size, sr, threshold, min_freq,
+max_freq)`` and follows the :class:`PitchDetector` interface. Engines keep
+their work buffers from one call to the next, so an instance belongs to a
+single audio stream. The detectors themselves live in
+:mod:`midiline.pitch_detection` and are only imported when an engine is
+created, so listing engines stays cheap.
+"""
+
+from __future__ import annotations
+
+import importlib.util
+from functools import partial
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Tuple
+
+try:  # Python >= 3.8
+    from typing import Protocol
+except ImportError:  # pragma: no cover
+    Protocol = object
+
+if TYPE_CHECKING:
+    import numpy as np
+
+
+class PitchDetector(Protocol):
+    """Callable mapping one frame to a frequency in Hz (0.0 if none)."""
+
+    frame_size: int
+
+    def __call__(self, frame: np.ndarray) -> float: ...
+
+    def reset(self) -> None: ...
+
+
+Factory = Callable[[int, int, float, float, float], PitchDetector]
+_ENGINES: Dict[str, Tuple[Factory, Optional[str]]] = {}
+
+
+def register_engine(name: str, factory: Factory, requires: Optional[str] = None) -> None:
+    """Register ``factory`` under ``name``.
+
+    ``requires`` names a module that must be importable for the engine to be
+    listed by :func:`available_engines`.
+    """
+    _ENGINES[name] = (factory, requires)
+
+
+def engine_names() -> List[str]:
+    return sorted(_ENGINES)
+
+
+def engine_requirement(name: str) -> Optional[str]:
+    """Module the engine ``name`` needs, or ``None`` if it has no extra dependency."""
+    return _ENGINES[name][1]
+
+
+def available_engines() -> List[str]:
+    """Registered engines whose optional dependency is installed."""
+    return [
+        name for name, (_, requires) in sorted(_ENGINES.items())
+        if requires is None or importlib.util.find_spec(requires) is not None
+    ]
+
+
+def create_engine(name: str, frame_size: int, sr: int, threshold: float = 0.1,
+                  min_freq: float = 60.0, max_freq: float = 2000.0) -> PitchDetector:
+    try:
+        factory, _ = _ENGINES[name]
+    except KeyError:
+        raise ValueError(f"unknown pitch engine: {name!r}") from None
+    return factory(frame_size, sr, threshold, min_freq, max_freq)
+
+
+def _yin(n, sr, threshold, lo, hi, tracking=False):
+    from .pitch_detection import FastYin
+
+    return FastYin(n, sr, threshold, tracking=tracking)
+
+
+def _yin_coarse(n, sr, threshold, lo, hi):
+    from .pitch_detection import CoarseToFineYin
+
+    return CoarseToFineYin(n, sr, threshold, min_freq=lo, max_freq=hi)
+
+
+def _hps(n, sr, threshold, lo, hi):
+    from .pitch_detection import HarmonicProductSpectrum
+
+    return HarmonicProductSpectrum(n, sr, threshold, min_freq=lo, max_freq=hi)
+
+
+# aubio methods whose tolerance is a YIN threshold; the others keep aubio's default.
+_AUBIO_YIN_METHODS = ("yin", "yinfast")
+
+
+def _aubio(method):
+    def factory(n, sr, threshold, lo, hi):
+        from .pitch_detection import AubioPitch
+
+        tolerance = threshold if method in _AUBIO_YIN_METHODS else None
+        return AubioPitch(n, sr, tolerance, method=method)
+
+    return factory
+
+
+register_engine("yin", _yin)
+register_engine("yin-track", partial(_yin, tracking=True))
+register_engine("yin-coarse", _yin_coarse)
+register_engine("hps", _hps)
+register_engine("aubio-yinfft", _aubio("yinfft"), requires="aubio")
+register_engine("aubio-yinfast", _aubio("yinfast"), requires="aubio")
@@ -0,0 +1,400 @@
+"""Polyphonic analysis by harmonic summation over MIDI notes.
+
+Each frame's magnitude spectrum is matched against sparse harmonic
+templates, one row per MIDI note, and notes are picked greedily: after the
+most salient note is accepted its harmonics are removed from the spectrum
+before the next search. :class:`PolyNoteTracker` turns the per-frame note
+sets into onsets and offsets with per-note hysteresis.
+"""
+
+from __future__ import annotations
+
+from functools import lru_cache
+from time import perf_counter
+from typing import TYPE_CHECKING, Dict, List, NamedTuple, Tuple
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from scipy import sparse
+
+from .events import NoteEvent
+from .midi_sender import NOTE_ON
+from .pitch_detection import _RFFT_HAS_OUT, _next_pow2
+from .preprocess import frame_audio
+from .realtime import RealTimeProcessor
+
+
+def midi_to_hz(note):
+    return 440.0 * 2.0 ** ((np.asarray(note, dtype=float) - 69) / 12.0)
+
+
+@lru_cache(maxsize=None)
+def stft_window(size: int) -> np.ndarray:
+    """Cached read-only Hann window of ``size`` samples."""
+    window = np.hanning(size)
+    window.setflags(write=False)
+    return window
+
+
+class HarmonicTemplates(NamedTuple):
+    """Precomputed per-note spectral templates, see :func:`harmonic_templates`."""
+
+    salience: sparse.csr_matrix
+    fundamental: sparse.csr_matrix
+    bins: Tuple[np.ndarray, ...]
+    starts: Tuple[np.ndarray, ...]
+    lengths: Tuple[np.ndarray, ...]
+
+
+@lru_cache(maxsize=None)
+def harmonic_templates(
+    n_fft: int,
+    sr: int,
+    min_note: int,
+    max_note: int,
+    harmonics: int = 8,
+    decay: float = 0.85,
+) -> HarmonicTemplates:
+    """Sparse harmonic templates for the notes ``min_note..max_note``.
+
+    Row ``i`` of ``salience`` weights the FFT bins around the first
+    ``harmonics`` partials of note ``min_note + i`` with ``decay ** (h - 1)``,
+    spread over a triangular quarter-tone band; ``fundamental`` holds the
+    first partial alone. ``bins[i]`` lists, partial by partial, the bins
+    covering the Hann main lobe of each partial of note ``i`` and
+    ``starts[i]`` and ``lengths[i]`` where each partial sits in that list.
+    """
+    from scipy import sparse
+
+    size = n_fft // 2 + 1
+    bin_hz = sr / n_fft
+    lobe = 4  # Hann main lobe half-width for a frame zero-padded by two
+    rows, cols, weights = [], [], []
+    f0_rows, f0_cols, f0_weights = [], [], []
+    note_bins, note_lengths = [], []
+    for row, note in enumerate(range(min_note, max_note + 1)):
+        f0 = float(midi_to_hz(note))
+        partials = []
+        for h in range(1, harmonics + 1):
+            centre = h * f0 / bin_hz
+            if centre >= size - 1:
+                break
+            width = max(1.0, centre * (2.0 ** (1 / 24) - 1))
+            band = np.arange(int(np.ceil(centre - width)), int(centre + width) + 1)
+            band = band[(band > 0) & (band < size)]
+            tri = 1.0 - np.abs(band - centre) / (width + 1.0)
+            tri /= tri.sum()
+            rows.extend([row] * len(band))
+            cols.extend(band)
+            weights.extend(decay ** (h - 1) * tri)
+            if h == 1:
+                f0_rows.extend([row] * len(band))
+                f0_cols.extend(band)
+                f0_weights.extend(tri)
+            reach = max(width, lobe)
+            partials.append(np.arange(
+                max(1, int(np.ceil(centre - reach))), min(size, int(centre + reach) + 1)
+            ))
+        note_bins.append(np.concatenate(partials) if partials else np.zeros(0, dtype=int))
+        note_lengths.append(np.array([len(p) for p in partials], dtype=int))
+    shape = (max_note - min_note + 1, size)
+    return HarmonicTemplates(
+        sparse.csr_matrix((weights, (rows, cols)), shape=shape),
+        sparse.csr_matrix((f0_weights, (f0_rows, f0_cols)), shape=shape),
+        tuple(note_bins),
+        tuple(np.concatenate(([0], np.cumsum(n)[:-1])).astype(int) for n in note_lengths),
+        tuple(note_lengths),
+    )
+
+
+class PolyphonicDetector:
+    """Multi-pitch estimator for one audio stream.
+
+    ``__call__`` returns a boolean mask over :attr:`notes`. Candidates whose
+    fundamental is weaker than ``min_fundamental`` times the strongest
+    fundamental band are ignored, which rules out subharmonics explaining a
+    whole chord. A note is accepted while its salience on the residual
+    spectrum stays above ``threshold`` times the salience of the first note
+    found, up to ``max_polyphony`` notes per frame.
+
+    Accepted notes are removed following the spectral smoothness principle:
+    each partial loses at most the average of itself and its neighbouring
+    partials, so energy shared with a note an octave or a fifth above stays
+    in the residual.
+    """
+
+    def __init__(
+        self,
+        frame_size: int,
+        sr: int,
+        min_note: int = 40,
+        max_note: int = 88,
+        threshold: float = 0.2,
+        max_polyphony: int = 6,
+        harmonics: int = 8,
+        decay: float = 0.85,
+        min_fundamental: float = 0.25,
+    ) -> None:
+        self.frame_size = int(frame_size)
+        self.sr = sr
+        self.n_fft = _next_pow2(2 * self.frame_size)
+        self.notes = np.arange(min_note, max_note + 1)
+        self.threshold = float(threshold)
+        self.max_polyphony = int(max_polyphony)
+        self.min_fundamental = float(min_fundamental)
+        self.templates = harmonic_templates(
+            self.n_fft, int(sr), int(min_note), int(max_note), int(harmonics), float(decay)
+        )
+        self.window = stft_window(self.frame_size)
+        self.salience = np.zeros(len(self.notes))
+        self._buffer = np.zeros(self.n_fft)
+        self._spec = np.zeros(self.n_fft // 2 + 1, dtype=np.complex128)
+        self._mag = np.zeros(self.n_fft // 2 + 1)
+        self._mask = np.zeros(len(self.notes), dtype=bool)
+
+    def reset(self) -> None:
+        """No state is carried between frames."""
+
+    def spectrum(self, frame: np.ndarray) -> np.ndarray:
+        """Magnitude spectrum of ``frame``, returned in an internal buffer."""
+        m = min(len(frame), self.frame_size)
+        np.multiply(frame[-m:], self.window[:m], out=self._buffer[:m])
+        self._buffer[m:] = 0.0
+        if _RFFT_HAS_OUT:
+            np.fft.rfft(self._buffer, out=self._spec)
+        else:
+            self._spec[:] = np.fft.rfft(self._buffer)
+        return np.abs(self._spec, out=self._mag)
+
+    def _remove(self, mag: np.ndarray, index: int) -> None:
+        bins = self.templates.bins[index]
+        if not len(bins):
+            return
+        values = mag[bins]
+        peaks = np.maximum.reduceat(values, self.templates.starts[index])
+        padded = np.concatenate((peaks[:1], peaks, peaks[-1:]))
+        smooth = 0.5 * (padded[:-2] + padded[2:])
+        smooth[0] = peaks[0]
+        keep = np.divide(
+            peaks - np.minimum(peaks, smooth), peaks,
+            out=np.zeros_like(peaks), where=peaks > 0,
+        )
+        mag[bins] = values * np.repeat(keep, self.templates.lengths[index])
+
+    def pick(self, mag: np.ndarray, out: np.ndarray | None = None) -> np.ndarray:
+        """Greedy note selection on one magnitude spectrum.
+
+        ``mag`` is used as the residual and is modified in place.
+        """
+        mask = self._mask if out is None else out
+        mask[:] = False
+        templates = self.templates
+        first = 0.0
+        for i in range(self.max_polyphony):
+            salience = templates.salience @ mag
+            fundamental = templates.fundamental @ mag
+            salience[fundamental < self.min_fundamental * fundamental.max()] = 0.0
+            if i == 0:
+                self.salience[:] = salience
+            k = int(np.argmax(salience))
+            if salience[k] <= 0.0 or mask[k]:
+                break
+            if i == 0:
+                first = salience[k]
+            elif salience[k] < self.threshold * first:
+                break
+            mask[k] = True
+            self._remove(mag, k)
+        return mask
+
+    def __call__(self, frame: np.ndarray) -> np.ndarray:
+        return self.pick(self.spectrum(frame))
+
+    def detect_frames(self, frames: np.ndarray) -> np.ndarray:
+        """Note masks for a ``(n_frames, frame_size)`` batch.
+
+        The windowed FFT of the whole batch is computed in one call; only
+        the greedy selection runs frame by frame.
+        """
+        frames = np.asarray(frames)
+        mags = np.abs(np.fft.rfft(frames * self.window, n=self.n_fft, axis=1))
+        masks = np.zeros((len(frames), len(self.notes)), dtype=bool)
+        for i in range(len(frames)):
+            self.pick(mags[i], out=masks[i])
+        return masks
+
+
+class PolyNoteTracker:
+    """Per-note onset/offset hysteresis over a fixed range of MIDI notes.
+
+    A note starts after ``onset_frames`` consecutive detections and stops
+    after ``release_frames`` consecutive misses; all notes are updated with
+    array operations.
+    """
+
+    def __init__(self, notes: np.ndarray, onset_frames: int = 2, release_frames: int = 3) -> None:
+        self.notes = np.asarray(notes)
+        self.onset_frames = max(1, int(onset_frames))
+        self.release_frames = max(1, int(release_frames))
+        self.on_count = np.zeros(len(self.notes), dtype=np.int64)
+        self.off_count = np.zeros(len(self.notes), dtype=np.int64)
+        self.active = np.zeros(len(self.notes), dtype=bool)
+
+    def update(self, mask: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Feed one frame's detections; return ``(started, stopped)`` indices."""
+        np.multiply(self.on_count + 1, mask, out=self.on_count)
+        np.multiply(self.off_count + 1, ~mask, out=self.off_count)
+        started = np.flatnonzero(~self.active & (self.on_count >= self.onset_frames))
+        stopped = np.flatnonzero(self.active & (self.off_count >= self.release_frames))
+        self.active[started] = True
+        self.active[stopped] = False
+        return started, stopped
+
+    def release_all(self) -> np.ndarray:
+        """Stop every sounding note and return their indices."""
+        stopped = np.flatnonzero(self.active)
+        self.reset()
+        return stopped
+
+    def reset(self) -> None:
+        self.on_count[:] = 0
+        self.off_count[:] = 0
+        self.active[:] = False
+
+
+def transcribe_polyphonic(
+    signal: np.ndarray,
+    sample_rate: int,
+    frame_size: int = 4096,
+    hop_size: int = 512,
+    energy_threshold: float = 0.2,
+    threshold: float = 0.2,
+    min_duration: float = 0.05,
+    channel: int = 0,
+    min_note: int = 40,
+    max_note: int = 88,
+    max_polyphony: int = 6,
+    onset_frames: int = 2,
+    release_frames: int = 3,
+    chunk_frames: int = 256,
+) -> List[NoteEvent]:
+    """Detect overlapping note events in ``signal``.
+
+    Frames whose RMS is below ``energy_threshold`` times the loudest frame
+    are treated as silent. Velocities follow the loudest frame of each note
+    relative to the loudest frame of the signal. Returned events are sorted
+    by start time and may overlap.
+    """
+    signal = np.asarray(signal, dtype=float)
+    if len(signal) < frame_size:
+        return []
+    frames = frame_audio(signal, frame_size, hop_size)
+    rms = np.sqrt(np.einsum("ij,ij->i", frames, frames) / frame_size)
+    peak = float(rms.max())
+    if peak <= 0.0:
+        return []
+    voiced = rms >= energy_threshold * peak
+
+    detector = PolyphonicDetector(
+        frame_size, sample_rate, min_note=min_note, max_note=max_note,
+        threshold=threshold, max_polyphony=max_polyphony,
+    )
+    tracker = PolyNoteTracker(detector.notes, onset_frames, release_frames)
+    hop = hop_size / sample_rate
+    open_events: Dict[int, NoteEvent] = {}
+    events: List[NoteEvent] = []
+
+    def finish(index: int, end: float) -> None:
+        event = open_events.pop(index)
+        event.end = end
+        if event.end - event.start >= min_duration:
+            event.velocity = int(np.clip(round(event.amplitude / peak * 127), 1, 127))
+            events.append(event)
+
+    for first in range(0, len(frames), chunk_frames):
+        last = min(first + chunk_frames, len(frames))
+        masks = detector.detect_frames(frames[first:last])
+        masks &= voiced[first:last, None]
+        for offset, mask in enumerate(masks):
+            i = first + offset
+            started, stopped = tracker.update(mask)
+            for index in stopped:
+                finish(index, (i - tracker.release_frames + 1) * hop)
+            for index in started:
+                open_events[index] = NoteEvent(
+                    (i - tracker.onset_frames + 1) * hop, i * hop, 0.0,
+                    note=int(detector.notes[index]), channel=channel,
+                )
+            for event in open_events.values():
+                event.amplitude = max(event.amplitude, float(rms[i]))
+    for index in tracker.release_all():
+        finish(index, (len(frames) - 1) * hop + frame_size / sample_rate)
+    events.sort(key=lambda event: (event.start, event.note))
+    return events
+
+
+class PolyphonicProcessor(RealTimeProcessor):
+    """:class:`RealTimeProcessor` emitting several simultaneous notes.
+
+    The analysis window defaults to ``max(4096, 2 * buffer_size)`` samples
+    so low notes keep enough spectral resolution. Every hop the detector's
+    note mask goes through a :class:`PolyNoteTracker`; each started note is
+    sent with a velocity derived from the hop amplitude.
+    """
+
+    def __init__(
+        self,
+        buffer_size: int = 1024,
+        window_size: int | None = None,
+        min_note: int = 40,
+        max_note: int = 88,
+        poly_threshold: float = 0.2,
+        max_polyphony: int = 6,
+        **options,
+    ) -> None:
+        window_size = window_size or max(4096, 2 * buffer_size)
+        super().__init__(buffer_size=buffer_size, window_size=window_size, **options)
+        self.detector = PolyphonicDetector(
+            self.window_size, self.samplerate, min_note=min_note, max_note=max_note,
+            threshold=poly_threshold, max_polyphony=max_polyphony,
+        )
+        self.tracker = PolyNoteTracker(
+            self.detector.notes, self.onset_frames, self.release_frames
+        )
+        self._silent = np.zeros(len(self.detector.notes), dtype=bool)
+
+    def _analyze(self, amplitude: float) -> None:
+        start = perf_counter()
+        self._track_rise(amplitude)
+        window = self.ring.view()
+        activity = self.activity
+        if activity is not None and not activity.update(amplitude, window[-self.hop_size:]):
+            self.skipped += 1
+            mask = self._silent
+            detected = perf_counter()
+        elif amplitude <= self.amp_threshold:
+            mask = self._silent
+            detected = perf_counter()
+        else:
+            mask = self.detector(window)
+            detected = perf_counter()
+            self.timings["yin"].record(detected - start)
+
+        started, stopped = self.tracker.update(mask)
+        notes = self.detector.notes
+        for index in stopped:
+            self._push_off(int(notes[index]), self.position)
+        if len(started):
+            velocity = int(np.clip(amplitude / self.amp_threshold * self.velocity, 1, 127))
+            onset = self._onset_time()
+            for index in started:
+                self.events.push(NOTE_ON, int(notes[index]), velocity, self.channel, onset)
+        self.timings["notes"].record(perf_counter() - detected)
+
+    def _set_pitch_threshold(self, threshold: float) -> None:
+        """The harmonic detector uses ``poly_threshold`` instead."""
+
+    def _release_notes(self) -> None:
+        for index in self.tracker.release_all():
+            self._push_off(int(self.detector.notes[index]), self.position)
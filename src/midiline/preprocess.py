@@ -1,5 +1,9 @@
+from functools import lru_cache
+
 import numpy as np
-from scipy.signal import butter, lfilter
+
+# scipy.signal is imported where it is used: loading it costs more than the
+# rest of the package and most runs never build a filter.
 
 
 def normalize(audio):
@@ -17,26 +21,92 @@ def normalize(audio):
     return audio / max_val
 
 
+@lru_cache(maxsize=64)
+def design_highpass(cutoff, fs=44100, order=5):
+    """Return cached second-order sections of a Butterworth high-pass.
+
+    The result is shared between callers and must not be modified.
+    """
+    from scipy.signal import butter
+
+    nyq = 0.5 * fs
+    return butter(order, cutoff / nyq, btype='high', analog=False, output='sos')
+
+
+@lru_cache(maxsize=16)
+def design_decimator(factor, taps_per_phase=8):
+    """Return a cached FIR anti-alias filter for decimation by ``factor``."""
+    from scipy.signal import firwin
+
+    numtaps = taps_per_phase * factor + 1
+    return firwin(numtaps, 0.8 / factor)
+
+
 def highpass_filter(audio, cutoff, fs=44100, order=5):
     """Apply a Butterworth high-pass filter preserving float32 precision."""
+    from scipy.signal import sosfilt
+
     audio = np.asarray(audio, dtype=np.float32)
-    nyq = 0.5 * fs
-    norm_cutoff = cutoff / nyq
-    b, a = butter(order, norm_cutoff, btype='high', analog=False)
-    filtered = lfilter(b, a, audio)
+    sos = design_highpass(float(cutoff), float(fs), int(order))
+    filtered = sosfilt(sos, audio)
     return filtered.astype(np.float32, copy=False)
 
 
-def frame_audio(audio, frame_size, hop_size):
-    """Split audio into overlapped frames."""
+class HighPassFilter:
+    """Butterworth high-pass stage that carries its state across blocks.
+
+    The filter design comes from :func:`design_highpass`, so building a new
+    stage for a ``(cutoff, fs, order)`` seen before costs no design work.
+    """
+
+    def __init__(self, cutoff, fs=44100, order=5):
+        from scipy.signal import sosfilt, sosfilt_zi
+
+        self._sosfilt = sosfilt
+        self.cutoff = float(cutoff)
+        self.fs = float(fs)
+        self.order = int(order)
+        self.sos = design_highpass(self.cutoff, self.fs, self.order)
+        self.zi = np.zeros((self.sos.shape[0], 2))
+        self._steady_zi = sosfilt_zi(self.sos)
+        self.level = 0.0
+
+    def process(self, audio):
+        """Filter one block, continuing from the previous block's state."""
+        audio = np.asarray(audio, dtype=np.float32)
+        filtered, self.zi = self._sosfilt(self.sos, audio, zi=self.zi)
+        if len(audio):
+            # What the filter removed from the last sample: the input's low
+            # frequency level, where a replacement stage can settle.
+            self.level = float(audio[-1] - filtered[-1])
+        return filtered.astype(np.float32, copy=False)
+
+    def reset(self):
+        """Forget the carried state, e.g. after a gap in the input."""
+        self.zi[:] = 0.0
+        self.level = 0.0
+
+    def settle(self, value):
+        """Set the state to the steady response to a constant ``value``.
+
+        A stage that replaces another one mid-stream starts from the old
+        stage's :attr:`level`, so an input offset does not enter as a step
+        out of silence and ring.
+        """
+        np.multiply(self._steady_zi, value, out=self.zi)
+        self.level = float(value)
+
+
+def frame_audio(audio, frame_size, hop_size, copy=False):
+    """Split audio into overlapped frames.
+
+    By default the result is a read-only strided view of ``audio`` that
+    shares its memory and dtype; pass ``copy=True`` for a writeable array.
+    """
     audio = np.asarray(audio)
     if len(audio) < frame_size:
-        return np.empty((0, frame_size))
-    num_frames = 1 + (len(audio) - frame_size) // hop_size
-    shape = (num_frames, frame_size)
-    frames = np.lib.stride_tricks.as_strided(
-        audio,
-        shape=shape,
-        strides=(hop_size * audio.strides[0], audio.strides[0])
-    )
-    return frames.copy()
+        return np.empty((0, frame_size), dtype=audio.dtype)
+    frames = np.lib.stride_tricks.sliding_window_view(audio, frame_size)[::hop_size]
+    if copy:
+        return frames.copy()
+    return frames
@@ -1,30 +1,235 @@
+import threading
+import time
+from dataclasses import dataclass, replace
+from time import perf_counter
+from typing import Optional
+
 import numpy as np
 import mido
 
-from .preprocess import highpass_filter
-from .pitch_detection import FastYin
+from .instrumentation import LatencyHistogram
+from .preprocess import HighPassFilter
+from .midi_sender import NOTE_OFF, NOTE_ON, MidiSender, NoteQueue
+from .pitch_engines import create_engine
+from .ringbuffer import RingBuffer
+
+
+def _one_pole(ms: float, samplerate: float) -> float:
+    """Feedback coefficient of a one-pole smoother with an ``ms`` time constant."""
+    return float(np.exp(-1000.0 / (ms * samplerate))) if ms > 0 else 0.0
+
+
+class _OnePole:
+    """One-pole smoother run in closed form into caller-owned buffers.
+
+    ``y[i] = pole * y[i - 1] + (1 - pole) * x[i]`` for a block is
+    ``pole**i * (1 - pole) * cumsum(x * pole**-i)`` plus the decayed state,
+    evaluated from cached powers. Blocks are cut into chunks short enough
+    for ``pole**-i`` to stay finite, so the loop depends only on the block
+    size and the time constant. Inputs must not be negative.
+    """
+
+    def __init__(self, ms: float, samplerate: float, size: int) -> None:
+        self.pole = _one_pole(ms, samplerate)
+        self.state = 0.0
+        if self.pole > 0.0:
+            # Keep pole**-i below 1e100 within a chunk.
+            size = max(1, min(size, int(230.0 / -np.log(self.pole))))
+            steps = np.arange(size)
+            self._powers = self.pole ** steps
+            self._inverse = self.pole ** -steps.astype(float)
+
+    def process(self, x: np.ndarray, out: np.ndarray) -> np.ndarray:
+        pole = self.pole
+        if pole == 0.0:
+            np.copyto(out, x)
+            self.state = float(out[-1])
+            return out
+        size = len(self._powers)
+        for start in range(0, len(x), size):
+            chunk = out[start:start + size]
+            m = len(chunk)
+            np.multiply(x[start:start + m], self._inverse[:m], out=chunk)
+            # The previous output enters as a term before the first sample.
+            chunk[0] += self.state * pole / (1.0 - pole)
+            np.cumsum(chunk, out=chunk)
+            chunk *= self._powers[:m]
+            chunk *= 1.0 - pole
+            self.state = float(chunk[-1])
+        return out
 
 
 class NoiseGate:
-    """Simple noise gate with attack and release fade."""
+    """Noise gate with a per-sample envelope and gain curve.
+
+    The level is the mean square of the input smoothed by a one-pole filter
+    with a ``detector`` ms time constant. Samples whose level reaches
+    ``threshold`` (an RMS value) have a gain target of 1, the others 0. The
+    target is smoothed twice, with the ``attack`` and with the ``release``
+    time constant (in ms), and the gain is the larger of the two: it rises
+    with the attack and falls with the release. Every stage keeps its state
+    across blocks, so the gate behaves the same at any block size, and runs
+    in buffers allocated for ``block_size`` samples.
 
-    def __init__(self, threshold: float, attack: int, release: int) -> None:
+    :meth:`process` returns a view of an internal buffer that is overwritten
+    by the next call.
+    """
+
+    def __init__(
+        self,
+        threshold: float,
+        attack: float = 5.0,
+        release: float = 50.0,
+        samplerate: int = 44100,
+        detector: float = 10.0,
+        block_size: int = 1024,
+    ) -> None:
         self.threshold = float(threshold)
-        self.attack = max(1, int(attack))
-        self.release = max(1, int(release))
+        self.attack = max(0.0, float(attack))
+        self.release = max(0.0, float(release))
+        self.detector = float(detector)
+        self.samplerate = samplerate
+        self._level = self.threshold * self.threshold
         self.gain = 0.0
+        self._envelope = _OnePole(self.detector, samplerate, block_size)
+        self._rise = _OnePole(self.attack, samplerate, block_size)
+        self._fall = _OnePole(self.release, samplerate, block_size)
+        self._resize(block_size)
+
+    def _resize(self, size: int) -> None:
+        self._square = np.empty(size)
+        self._target = np.empty(size)
+        self._rising = np.empty(size)
+        self._gain = np.empty(size)
+        self._out = np.empty(size, dtype=np.float32)
+
+    def reset(self) -> None:
+        for stage in (self._envelope, self._rise, self._fall):
+            stage.state = 0.0
+        self.gain = 0.0
+
+    def follow(self, other: "NoiseGate") -> None:
+        """Continue from the envelope and gain of ``other``, e.g. after new settings."""
+        self._envelope.state = other._envelope.state
+        self._rise.state = other._rise.state
+        self._fall.state = other._fall.state
+        self.gain = other.gain
 
     def process(self, frame: np.ndarray) -> np.ndarray:
-        rms = float(np.sqrt(np.dot(frame, frame) / len(frame)))
-        if rms >= self.threshold:
-            self.gain = min(1.0, self.gain + 1.0 / self.attack)
-        else:
-            self.gain = max(0.0, self.gain - 1.0 / self.release)
-        return frame * self.gain
+        n = len(frame)
+        if n == 0:
+            return self._out[:0]
+        if n > len(self._gain):
+            self._resize(n)
+        square = np.multiply(frame, frame, out=self._square[:n])
+        level = self._envelope.process(square, square)
+        target = np.greater_equal(level, self._level, out=self._target[:n])
+        rising = self._rise.process(target, self._rising[:n])
+        gain = np.maximum(rising, self._fall.process(target, self._gain[:n]), out=self._gain[:n])
+        self.gain = float(gain[-1])
+        return np.multiply(frame, gain, out=self._out[:n], casting="unsafe")
+
+
+class ActivityGate:
+    """Hysteresis gate deciding whether a window is worth pitch analysis.
+
+    The gate opens when the hop energy reaches ``open_threshold`` and the
+    zero-crossing rate is low enough to be pitched, and closes after
+    ``hold`` consecutive hops below ``close_threshold`` or too noisy.
+    """
+
+    def __init__(
+        self,
+        open_threshold: float,
+        close_threshold: float | None = None,
+        max_zcr: float = 0.4,
+        hold: int = 2,
+    ) -> None:
+        self.open_threshold = float(open_threshold)
+        self.close_threshold = float(
+            open_threshold * 0.5 if close_threshold is None else close_threshold
+        )
+        self.max_zcr = float(max_zcr)
+        self.hold = max(0, int(hold))
+        self.is_open = False
+        self._quiet = 0
+
+    @staticmethod
+    def zero_crossing_rate(samples: np.ndarray) -> float:
+        signs = np.signbit(samples)
+        return np.count_nonzero(signs[1:] != signs[:-1]) / max(1, len(samples) - 1)
+
+    def update(self, amplitude: float, samples: np.ndarray) -> bool:
+        """Feed the latest hop and return whether the gate is open."""
+        threshold = self.close_threshold if self.is_open else self.open_threshold
+        if amplitude >= threshold and self.zero_crossing_rate(samples) <= self.max_zcr:
+            self.is_open = True
+            self._quiet = 0
+        elif self.is_open:
+            self._quiet += 1
+            if self._quiet >= self.hold:
+                self.is_open = False
+        return self.is_open
+
+
+def adc_time(time_info, frames: int, samplerate: int) -> float:
+    """Capture time of a sounddevice callback block on the ``perf_counter`` clock.
+
+    ``time_info`` is the callback's ``time`` argument. Its stream-clock
+    timestamps are shifted by the offset between ``currentTime`` and
+    :func:`time.perf_counter`, both read at callback entry. Backends that
+    report no timestamps fall back to the arrival time minus the block
+    duration.
+    """
+    now = perf_counter()
+    current = getattr(time_info, "currentTime", 0.0)
+    captured = getattr(time_info, "inputBufferAdcTime", 0.0)
+    if current and captured:
+        return now - (current - captured)
+    return now - frames / samplerate
+
+
+@dataclass(frozen=True)
+class Parameters:
+    """Processor settings that can change while audio is running."""
+
+    amp_threshold: float = 0.01
+    pitch_threshold: float = 0.1
+    cutoff: Optional[float] = None
+    velocity: int = 64
+    channel: int = 0
+    smoothing: float = 0.4
+    gate_threshold: float = 0.0
+    gate_attack: float = 5.0
+    gate_release: float = 50.0
 
 
 class RealTimeProcessor:
-    """Convert incoming audio blocks to MIDI messages with smoothing."""
+    """Convert incoming audio blocks to MIDI messages with smoothing.
+
+    :meth:`process_block` only pushes compact note records onto
+    :attr:`events`; a :class:`MidiSender` thread builds and sends the MIDI
+    messages so a slow MIDI backend cannot stall the audio callback. With
+    ``threaded_output=False`` the thread is not started and the caller sends
+    queued notes with ``sender.drain()``, which makes offline runs
+    deterministic. Passing an existing ``sender`` shares its port and
+    thread; its owner is then responsible for stopping it. ``pitch_engine``
+    names the detector in :mod:`midiline.pitch_engines`. ``latency`` (in
+    seconds) makes the sender play each note that long after its capture
+    timestamp instead of as soon as it is detected. ``gate_attack`` and
+    ``gate_release`` are the :class:`NoiseGate` times in milliseconds.
+
+    Each stage of the callback is timed into a :class:`LatencyHistogram`;
+    :meth:`stats` reports them together with overrun and overflow counters.
+
+    The :class:`Parameters` fields can be changed at any time with
+    :meth:`update`. New values, with any filter or gate they need, are
+    prepared by the calling thread and published as one immutable block
+    that :meth:`process_block` picks up at its next call, so the callback
+    never waits for a lock or sees half an update.
+    """
+
+    STAGES = ("filter", "gate", "yin", "notes", "block")
 
     def __init__(
         self,
@@ -38,46 +243,306 @@ class RealTimeProcessor:
         velocity: int = 64,
         channel: int = 0,
         gate_threshold: float = 0.0,
-        gate_attack: int = 2,
-        gate_release: int = 10,
+        gate_attack: float = 5.0,
+        gate_release: float = 50.0,
         onset_frames: int = 2,
+        window_size: int | None = None,
+        hop_size: int | None = None,
+        queue_size: int = 256,
+        threaded_output: bool = True,
+        activity_gate: bool = True,
+        sender: MidiSender | None = None,
+        pitch_engine: str = "yin",
+        latency: float | None = None,
     ) -> None:
-        self.detector = FastYin(buffer_size * 2, samplerate, threshold=pitch_threshold)
-        self.smoothing = 0.4
-        self.smoothed_pitch = 0.0
+        self.buffer_size = int(buffer_size)
+        self.window_size = int(window_size or buffer_size * 2)
+        self.hop_size = int(hop_size or buffer_size)
+        if not 0 < self.hop_size <= self.window_size:
+            raise ValueError("hop_size must be between 1 and window_size")
         self.min_freq = 60.0
         self.max_freq = 10000.0
-        self.amp_threshold = amp_threshold
+        self.pitch_engine = pitch_engine
+        self.detector = create_engine(
+            pitch_engine, self.window_size, samplerate, threshold=pitch_threshold,
+            min_freq=self.min_freq, max_freq=self.max_freq,
+        )
+        self.ring = RingBuffer(self.window_size)
+        self._hop_fill = 0
+        self._hop_energy = 0.0
+        self.smoothed_pitch = 0.0
         self.release_frames = release_frames
-        self.cutoff = cutoff
         self.samplerate = samplerate
-        self.velocity = int(velocity)
-        self.channel = int(channel)
-        self.gate = (
-            NoiseGate(gate_threshold, gate_attack, gate_release)
-            if gate_threshold > 0.0
-            else None
-        )
         self.onset_frames = max(1, int(onset_frames))
         self.onset_count = 0
+        self.activity = ActivityGate(amp_threshold) if activity_gate else None
+        self.skipped = 0
+
+        params = Parameters(
+            amp_threshold=amp_threshold, pitch_threshold=pitch_threshold, cutoff=cutoff,
+            velocity=int(velocity), channel=int(channel), gate_threshold=gate_threshold,
+            gate_attack=gate_attack, gate_release=gate_release,
+        )
+        self._update_lock = threading.Lock()
+        self._staged = (params, self._build_highpass(params, None), self._build_gate(params, None))
+        self._applied = None
+        self.params = params
+        self.channel = params.channel
 
-        try:
-            self.out_port = mido.open_output(midi_port, virtual=True)
-        except IOError:
-            self.out_port = mido.open_output(midi_port)
+        self.events = NoteQueue(queue_size)
+        self._owns_sender = sender is None
+        if sender is None:
+            try:
+                self.out_port = mido.open_output(midi_port, virtual=True)
+            except IOError:
+                self.out_port = mido.open_output(midi_port)
+            self.sender = MidiSender(self.out_port, self.events, latency=latency)
+            if threaded_output:
+                self.sender.start()
+        else:
+            self.out_port = sender.port
+            self.sender = sender
+            sender.add_queue(self.events)
 
         self.last_note: int | None = None
         self.release_count = 0
+        self._unsent_offs: list = []
+        self.highpass = None
+        self.gate = None
+        self._apply_staged()
+        self.position = 0.0
+        self._last_amplitude = 0.0
+        self._rise: float | None = None
+        self._last_onset = float("-inf")
+
+        self.timings = {name: LatencyHistogram() for name in self.STAGES}
+        self.blocks = 0
+        self.overruns = 0
+        self.input_overflows = 0
+        self.input_underflows = 0
+
+    def stats(self) -> dict:
+        """Snapshot of stage timings, overrun counters and MIDI queue state.
+
+        Safe to call from any thread while audio is running.
+        """
+        return {
+            "blocks": self.blocks,
+            "overruns": self.overruns,
+            "input_overflows": self.input_overflows,
+            "input_underflows": self.input_underflows,
+            "skipped": self.skipped,
+            "pitch": dict(getattr(self.detector, "counters", {})),
+            "stages": {name: hist.summary() for name, hist in self.timings.items()},
+            "midi": self.sender.stats(),
+        }
+
+    def reset_stats(self) -> None:
+        for hist in self.timings.values():
+            hist.reset()
+        self.sender.send_time.reset()
+        self.sender.lateness.reset()
+        self.blocks = 0
+        self.overruns = 0
+        self.input_overflows = 0
+        self.input_underflows = 0
+        self.skipped = 0
+
+    def _build_highpass(self, params: Parameters, current: Optional[Parameters]):
+        if current is not None and current.cutoff == params.cutoff:
+            return self._staged[1]
+        return HighPassFilter(params.cutoff, self.samplerate) if params.cutoff else None
+
+    def _build_gate(self, params: Parameters, current: Optional[Parameters]):
+        fields = ("gate_threshold", "gate_attack", "gate_release")
+        if current is not None and all(
+            getattr(current, name) == getattr(params, name) for name in fields
+        ):
+            return self._staged[2]
+        if params.gate_threshold <= 0.0:
+            return None
+        return NoiseGate(
+            params.gate_threshold, params.gate_attack, params.gate_release,
+            samplerate=self.samplerate, block_size=self.buffer_size,
+        )
+
+    def update(self, **changes) -> Parameters:
+        """Stage new :class:`Parameters` values from any thread.
+
+        Filters and gates whose settings change are rebuilt here, outside
+        the audio callback; unchanged ones keep their state. The change
+        takes effect at the start of the next :meth:`process_block`.
+        """
+        with self._update_lock:
+            current = self._staged[0]
+            params = replace(current, **changes)
+            self._staged = (
+                params,
+                self._build_highpass(params, current),
+                self._build_gate(params, current),
+            )
+        return params
+
+    def set_cutoff(self, cutoff: float | None) -> None:
+        """Change the high-pass cutoff from a control thread."""
+        self.update(cutoff=cutoff)
+
+    def _apply_staged(self) -> None:
+        staged = self._staged
+        params, highpass, gate = staged
+        # Replaced stages continue where the old ones were instead of
+        # starting from silence, which would click or reopen the gate.
+        if highpass is not None and self.highpass is not None and highpass is not self.highpass:
+            highpass.settle(self.highpass.level)
+        if gate is not None and self.gate is not None and gate is not self.gate:
+            gate.follow(self.gate)
+        self.highpass = highpass
+        self.gate = gate
+        if params.channel != self.channel:
+            # Notes already sounding must end on the channel they started on.
+            self._release_notes()
+        self.amp_threshold = params.amp_threshold
+        self.cutoff = params.cutoff
+        self.velocity = params.velocity
+        self.channel = params.channel
+        self.smoothing = params.smoothing
+        self._set_pitch_threshold(params.pitch_threshold)
+        if self.activity is not None:
+            self.activity.open_threshold = params.amp_threshold
+            self.activity.close_threshold = 0.5 * params.amp_threshold
+        self.params = params
+        self._applied = staged
+
+    def _set_pitch_threshold(self, threshold: float) -> None:
+        if hasattr(self.detector, "threshold"):
+            self.detector.threshold = threshold
+
+    @property
+    def warm(self) -> bool:
+        """Whether the analysis window has been filled at least once."""
+        return self.ring.total >= self.window_size
+
+    def prime(self, samples: np.ndarray) -> None:
+        """Filter ``samples`` into the analysis window without detecting notes.
+
+        Used to warm up a replacement processor while the one it replaces
+        keeps playing.
+        """
+        if self._staged is not self._applied:
+            self._apply_staged()
+        if self.highpass is not None:
+            samples = self.highpass.process(samples)
+        if self.gate:
+            samples = self.gate.process(samples)
+        self.ring.write(samples)
+
+    def process_block(self, samples: np.ndarray, status=None, time: float | None = None) -> None:
+        """Process one block of audio samples.
+
+        Samples are appended to the analysis window and the detector runs
+        once every ``hop_size`` samples, independently of the block size.
+        ``status`` is the sounddevice callback flags, used for the overflow
+        counters reported by :meth:`stats`. ``time`` is the capture time of
+        the block's first sample on the :func:`time.perf_counter` clock (see
+        :func:`adc_time`); it defaults to the arrival time minus the block
+        duration. Note records are stamped relative to it, so their
+        timestamps do not depend on when processing happens to finish.
+        """
+        block_start = perf_counter()
+        n = len(samples)
+        if time is None:
+            time = block_start - n / self.samplerate
+        if status:
+            if getattr(status, "input_overflow", False):
+                self.input_overflows += 1
+            if getattr(status, "input_underflow", False):
+                self.input_underflows += 1
+        timings = self.timings
+        if self._staged is not self._applied:
+            self._apply_staged()
+        if self._unsent_offs:
+            self._retry_offs()
 
-    def process_block(self, samples: np.ndarray) -> None:
-        """Process one block of audio samples."""
-        if self.cutoff:
-            samples = highpass_filter(samples, self.cutoff, self.samplerate)
+        highpass = self.highpass
+        if highpass is not None:
+            samples = highpass.process(samples)
+            filtered = perf_counter()
+            timings["filter"].record(filtered - block_start)
+        else:
+            filtered = block_start
         if self.gate:
             samples = self.gate.process(samples)
+            timings["gate"].record(perf_counter() - filtered)
+
+        offset = 0
+        while offset < n:
+            take = min(self.hop_size - self._hop_fill, n - offset)
+            chunk = samples[offset:offset + take]
+            self.ring.write(chunk)
+            self._hop_energy += float(np.dot(chunk, chunk))
+            self._hop_fill += take
+            offset += take
+            if self._hop_fill >= self.hop_size:
+                amplitude = float(np.sqrt(self._hop_energy / self.hop_size))
+                self._hop_fill = 0
+                self._hop_energy = 0.0
+                self.position = time + offset / self.samplerate
+                self._analyze(amplitude)
+
+        elapsed = perf_counter() - block_start
+        timings["block"].record(elapsed)
+        self.blocks += 1
+        if elapsed * self.samplerate > n:
+            self.overruns += 1
+
+    def _analyze(self, amplitude: float) -> None:
+        """Run pitch detection on the current window and update note state.
+
+        When the activity gate is closed the detector is skipped and the
+        window is handled like one where no pitch was found.
+        """
+        start = perf_counter()
+        self._track_rise(amplitude)
+        window = self.ring.view()
+        activity = self.activity
+        if activity is not None and not activity.update(amplitude, window[-self.hop_size:]):
+            # Resume with a full search once the gate opens again.
+            self.detector.reset()
+            self.skipped += 1
+            pitch = 0.0
+            detected = perf_counter()
+        else:
+            pitch = float(self.detector(window))
+            detected = perf_counter()
+            self.timings["yin"].record(detected - start)
+        self._update_notes(pitch, amplitude)
+        self.timings["notes"].record(perf_counter() - detected)
+
+    def _track_rise(self, amplitude: float) -> None:
+        """Remember the first sample above ``amp_threshold`` after silence."""
+        if amplitude > self.amp_threshold >= self._last_amplitude:
+            hop = self.ring.view()[-self.hop_size:]
+            first = int(np.argmax(np.abs(hop) > self.amp_threshold))
+            self._rise = self.position - (self.hop_size - first) / self.samplerate
+        self._last_amplitude = amplitude
+
+    def _onset_time(self) -> float:
+        """Capture time of the note confirmed at :attr:`position`.
 
-        amplitude = float(np.sqrt(np.dot(samples, samples) / len(samples)))
-        pitch = float(self.detector(samples))
+        This is the sample where the signal last rose out of silence, as
+        long as that happened within the analysis window and after the
+        previous onset. Otherwise (a legato pitch change) it is the start
+        of the hops that confirmed the note.
+        """
+        onset = self.position - self.onset_frames * self.hop_size / self.samplerate
+        rise = self._rise
+        if rise is not None and rise > self._last_onset and \
+                self.position - rise <= self.window_size / self.samplerate:
+            onset = rise
+        self._last_onset = onset
+        return onset
+
+    def _update_notes(self, pitch: float, amplitude: float) -> None:
         if pitch > 0.0:
             self.smoothed_pitch = (
                 self.smoothing * pitch + (1.0 - self.smoothing) * self.smoothed_pitch
@@ -101,23 +566,10 @@ class RealTimeProcessor:
             self.onset_count = 0
             self.release_count = 0
             if self.last_note is None or midi_note != self.last_note:
+                onset = self._onset_time()
                 if self.last_note is not None:
-                    self.out_port.send(
-                        mido.Message(
-                            "note_off",
-                            note=self.last_note,
-                            velocity=0,
-                            channel=self.channel,
-                        )
-                    )
-                self.out_port.send(
-                    mido.Message(
-                        "note_on",
-                        note=midi_note,
-                        velocity=velocity,
-                        channel=self.channel,
-                    )
-                )
+                    self._push_off(self.last_note, onset)
+                self.events.push(NOTE_ON, midi_note, velocity, self.channel, onset)
                 self.last_note = midi_note
         else:
             if amplitude <= self.amp_threshold:
@@ -125,19 +577,39 @@ class RealTimeProcessor:
             else:
                 self.release_count = 0
             if self.last_note is not None and self.release_count >= self.release_frames:
-                self.out_port.send(
-                    mido.Message(
-                        "note_off",
-                        note=self.last_note,
-                        velocity=0,
-                        channel=self.channel,
-                    )
-                )
+                self._push_off(self.last_note, self.position)
                 self.last_note = None
 
-    def close(self) -> None:
+    def _push_off(self, note: int, time: float) -> None:
+        if not self.events.push(NOTE_OFF, note, 0, self.channel, time):
+            # A lost note-off leaves the note hanging, so retry it next block.
+            self._unsent_offs.append((note, self.channel))
+
+    def _retry_offs(self) -> None:
+        # Only push into free space, so a retry is not counted as another drop.
+        pending = self._unsent_offs
+        events = self.events
+        while pending and len(events) < events.capacity:
+            note, channel = pending.pop(0)
+            events.push(NOTE_OFF, note, 0, channel, self.position)
+
+    def _release_notes(self) -> None:
+        """Send note-offs for everything sounding on the current channel."""
         if self.last_note is not None:
-            self.out_port.send(
-                mido.Message("note_off", note=self.last_note, velocity=0, channel=self.channel)
-            )
-        self.out_port.close()
+            self._push_off(self.last_note, self.position)
+            self.last_note = None
+        self.onset_count = 0
+
+    def close(self) -> None:
+        self._release_notes()
+        while self._unsent_offs:
+            if self.sender.is_alive():
+                time.sleep(self.sender.poll_interval)
+            else:
+                self.sender.drain()
+            self._retry_offs()
+        if self._owns_sender:
+            self.sender.stop()
+            self.out_port.close()
+        else:
+            self.sender.remove_queue(self.events)
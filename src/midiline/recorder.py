@@ -0,0 +1,171 @@
+"""Record the live note stream to a Standard MIDI File while it plays.
+
+:class:`MidiFileRecorder` is a :class:`MidiSender` sink: the sender thread
+hands it every record it sends, so the audio callback does no more than
+its usual :class:`NoteQueue` push. A writer thread appends the notes to a
+type 0 file and rewrites the track length and end-of-track marker on every
+flush, so the file on disk is always complete up to the last flush.
+"""
+
+from __future__ import annotations
+
+import os
+import struct
+import threading
+import time
+from itertools import chain
+from typing import Optional
+
+import mido
+
+from .midi_sender import NOTE_OFF, NOTE_ON, NoteQueue
+
+_HEADER_SIZE = 14
+_TRACK_LENGTH_OFFSET = _HEADER_SIZE + 4
+_END_OF_TRACK = b"\x00\xff\x2f\x00"
+
+
+def _variable_length(value: int) -> bytes:
+    """Encode ``value`` as a MIDI variable-length quantity."""
+    out = [value & 0x7F]
+    value >>= 7
+    while value:
+        out.append(0x80 | (value & 0x7F))
+        value >>= 7
+    return bytes(reversed(out))
+
+
+class MidiFileRecorder:
+    """Append note records to ``path`` from a background thread.
+
+    Record times are :func:`time.perf_counter` capture timestamps; the file
+    starts at :meth:`start`. Records are written in the order they were sent,
+    each no earlier than the one before, so a note-off never lands ahead of
+    the note-on it ends. Every ``flush_interval`` seconds the file is synced
+    to disk, so a crash loses at most that much.
+
+    :meth:`push` must be called from a single thread, normally the
+    :class:`MidiSender` the recorder is attached to with
+    :meth:`MidiSender.add_sink`. When the writer falls behind by more than
+    ``queue_size`` records, new note-ons are dropped and counted, but
+    note-offs are held until there is room, and :meth:`stop` ends any note
+    still sounding, so the file never keeps a note hanging.
+    """
+
+    def __init__(self, path: str, flush_interval: float = 2.0, ticks_per_beat: int = 480,
+                 tempo: int = 500000, queue_size: int = 4096) -> None:
+        self.path = path
+        self.flush_interval = float(flush_interval)
+        self.ticks_per_beat = int(ticks_per_beat)
+        self.tempo = int(tempo)
+        self.events = NoteQueue(queue_size)
+        self.written = 0
+        self.origin = None
+        self._last_tick = 0
+        self._unsent_offs: list = []
+        self._sounding = set()
+        self._file = None
+        self._track_size = 0
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def dropped(self) -> int:
+        return self.events.dropped
+
+    def push(self, record: tuple) -> None:
+        """Queue one sent note record for writing."""
+        events = self.events
+        unsent = self._unsent_offs
+        while unsent and len(events) < events.capacity:
+            events.push(*unsent.pop(0))
+        # Nothing may overtake a held note-off: it could end a later note.
+        if not unsent and len(events) < events.capacity:
+            events.push(*record)
+        elif record[0] == NOTE_ON:
+            events.dropped += 1
+        else:
+            unsent.append(record)
+
+    def start(self) -> None:
+        """Create the file and start the writer thread."""
+        self._file = open(self.path, "wb")
+        header = struct.pack(">4sLHHH", b"MThd", 6, 0, 1, self.ticks_per_beat)
+        tempo = mido.MetaMessage("set_tempo", tempo=self.tempo).bytes()
+        self._file.write(header + b"MTrk" + struct.pack(">L", 0) + b"\x00" + bytes(tempo))
+        self._track_size = 1 + len(tempo)
+        self.origin = time.perf_counter()
+        self._flush()
+        self._thread = threading.Thread(target=self._run, name="midiline-recorder", daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stop_event.wait(self.flush_interval):
+            self._flush()
+
+    def _queued(self):
+        record = self.events.pop()
+        while record is not None:
+            yield record
+            record = self.events.pop()
+
+    def _flush(self, extra=()) -> int:
+        """Write every queued record, then ``extra``, and sync the file.
+
+        Returns how many records were written.
+        """
+        data = bytearray()
+        count = 0
+        for record in chain(self._queued(), extra):
+            kind, note, velocity, channel, stamp = record
+            seconds = max(0.0, stamp - self.origin)
+            tick = max(self._last_tick, int(round(
+                mido.second2tick(seconds, self.ticks_per_beat, self.tempo)
+            )))
+            if kind == NOTE_ON and velocity > 0:
+                self._sounding.add((channel, note))
+            else:
+                self._sounding.discard((channel, note))
+            msg_type = "note_on" if kind == NOTE_ON else "note_off"
+            msg = mido.Message(msg_type, note=note, velocity=velocity, channel=channel)
+            data += _variable_length(tick - self._last_tick)
+            data += bytes(msg.bytes())
+            self._last_tick = tick
+            count += 1
+
+        handle = self._file
+        # Overwrite the previous end-of-track marker, then close the track
+        # again and fix its length so the file stays valid after every flush.
+        handle.seek(_HEADER_SIZE + 8 + self._track_size)
+        handle.write(bytes(data) + _END_OF_TRACK)
+        self._track_size += len(data)
+        handle.seek(_TRACK_LENGTH_OFFSET)
+        handle.write(struct.pack(">L", self._track_size + len(_END_OF_TRACK)))
+        handle.flush()
+        os.fsync(handle.fileno())
+        self.written += count
+        return count
+
+    def stop(self) -> None:
+        """Stop the writer, write what is left and close the file.
+
+        Call it once the sender feeding :meth:`push` has stopped. Notes the
+        file leaves sounding get a note-off at its end.
+        """
+        if self._file is None:
+            return
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+        self._flush(self._unsent_offs)
+        self._unsent_offs = []
+        if self._sounding:
+            self._flush([
+                (NOTE_OFF, note, 0, channel, self.origin)
+                for channel, note in sorted(self._sounding)
+            ])
+        self._file.close()
+        self._file = None
+
+    def stats(self) -> dict:
+        return {"written": self.written, "dropped": self.dropped}
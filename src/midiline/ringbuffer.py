@@ -0,0 +1,58 @@
+import numpy as np
+
+
+class RingBuffer:
+    """Circular buffer that keeps the most recent ``size`` samples.
+
+    Every sample is stored twice, ``size`` positions apart, so the latest
+    ``size`` samples are always available as one contiguous slice and
+    :meth:`view` never copies or allocates.
+    """
+
+    def __init__(self, size: int, dtype=np.float32) -> None:
+        self.size = int(size)
+        if self.size <= 0:
+            raise ValueError("size must be positive")
+        self._data = np.zeros(2 * self.size, dtype=dtype)
+        self._pos = 0
+        self.total = 0
+
+    def write(self, samples: np.ndarray) -> None:
+        """Append ``samples``, discarding the oldest ones."""
+        n = len(samples)
+        if n == 0:
+            return
+        size = self.size
+        data = self._data
+        self.total += n
+        if n >= size:
+            data[:size] = samples[n - size:]
+            data[size:] = samples[n - size:]
+            self._pos = 0
+            return
+
+        pos = self._pos
+        end = pos + n
+        if end <= size:
+            data[pos:end] = samples
+            data[pos + size:end + size] = samples
+        else:
+            first = size - pos
+            data[pos:size] = samples[:first]
+            data[pos + size:] = samples[:first]
+            data[:n - first] = samples[first:]
+            data[size:size + n - first] = samples[first:]
+        self._pos = end % size
+
+    def view(self) -> np.ndarray:
+        """Return the latest ``size`` samples, oldest first.
+
+        The result is a view into the buffer and is only valid until the next
+        :meth:`write`.
+        """
+        return self._data[self._pos:self._pos + self.size]
+
+    def clear(self) -> None:
+        self._data[:] = 0
+        self._pos = 0
+        self.total = 0
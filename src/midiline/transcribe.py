@@ -0,0 +1,140 @@
+"""Offline transcription of audio files to Standard MIDI Files."""
+
+from __future__ import annotations
+
+import os
+from typing import Iterable, Iterator, List, Tuple
+
+import mido
+import numpy as np
+
+from .event_detection import detect_note_events
+from .events import NoteEvent
+from .pitch_detection import pitch_track
+from .polyphonic import transcribe_polyphonic
+
+AUDIO_EXTENSIONS = (".wav", ".flac")
+
+
+def load_audio(path: str) -> Tuple[np.ndarray, int]:
+    """Decode a WAV or FLAC file into a mono float32 signal in ``[-1, 1]``."""
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".wav":
+        from scipy.io import wavfile
+
+        sr, data = wavfile.read(path)
+    elif ext == ".flac":
+        try:
+            import soundfile
+        except ImportError as exc:
+            raise RuntimeError("Reading FLAC files requires the 'soundfile' package") from exc
+        data, sr = soundfile.read(path, dtype="float32", always_2d=False)
+    else:
+        raise ValueError(f"Unsupported audio format: {path}")
+
+    if data.dtype == np.uint8:
+        data = (data.astype(np.float32) - 128.0) / 128.0
+    elif np.issubdtype(data.dtype, np.integer):
+        data = data.astype(np.float32) / float(-np.iinfo(data.dtype).min)
+    data = np.asarray(data, dtype=np.float32)
+    if data.ndim > 1:
+        data = data.mean(axis=1, dtype=np.float32)
+    return data, int(sr)
+
+
+def iter_audio_files(paths: Iterable[str]) -> Iterator[str]:
+    """Yield audio files from ``paths``, descending into directories."""
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _dirs, files in os.walk(path):
+                for name in sorted(files):
+                    if name.lower().endswith(AUDIO_EXTENSIONS):
+                        yield os.path.join(root, name)
+        else:
+            yield path
+
+
+def transcribe_signal(
+    signal: np.ndarray,
+    sample_rate: int,
+    frame_size: int = 2048,
+    hop_size: int = 512,
+    energy_threshold: float = 0.2,
+    pitch_threshold: float = 0.1,
+    min_duration: float = 0.05,
+    channel: int = 0,
+) -> List[NoteEvent]:
+    """Detect note events in ``signal`` and label them with MIDI notes.
+
+    Event boundaries come from :func:`detect_note_events` and each event's
+    note is the median of the YIN pitches of the frames it spans. Events
+    shorter than ``min_duration`` seconds, typically fragments around note
+    transitions, are discarded.
+    """
+    events = detect_note_events(
+        signal, sample_rate, frame_size=frame_size, hop_size=hop_size,
+        energy_threshold=energy_threshold,
+    )
+    if not events:
+        return []
+    pitches = pitch_track(
+        signal, sample_rate, frame_size=frame_size, hop_size=hop_size,
+        threshold=pitch_threshold,
+    )
+
+    notes: List[NoteEvent] = []
+    for event in events:
+        if event.end - event.start < min_duration:
+            continue
+        first = int(round(event.start * sample_rate / hop_size))
+        last = max(first + 1, int(round(event.end * sample_rate / hop_size)))
+        voiced = pitches[first:last]
+        voiced = voiced[voiced > 0]
+        if voiced.size == 0:
+            continue
+        freq = float(np.median(voiced))
+        event.note = int(np.clip(round(69 + 12 * np.log2(freq / 440.0)), 0, 127))
+        event.velocity = int(np.clip(round(event.amplitude * 127), 1, 127))
+        event.channel = channel
+        notes.append(event)
+    return notes
+
+
+def write_midi(events: Iterable[NoteEvent], path: str, ticks_per_beat: int = 480,
+               tempo: int = 500000) -> None:
+    """Write ``events`` to a type 0 Standard MIDI File."""
+    messages = []
+    for event in events:
+        messages.append((event.start, 1, mido.Message(
+            "note_on", note=event.note, velocity=event.velocity, channel=event.channel)))
+        messages.append((event.end, 0, mido.Message(
+            "note_off", note=event.note, velocity=0, channel=event.channel)))
+    messages.sort(key=lambda item: (item[0], item[1]))
+
+    midi = mido.MidiFile(type=0, ticks_per_beat=ticks_per_beat)
+    track = mido.MidiTrack()
+    midi.tracks.append(track)
+    track.append(mido.MetaMessage("set_tempo", tempo=tempo, time=0))
+    last_tick = 0
+    for seconds, _, msg in messages:
+        tick = int(round(mido.second2tick(seconds, ticks_per_beat, tempo)))
+        track.append(msg.copy(time=tick - last_tick))
+        last_tick = tick
+    track.append(mido.MetaMessage("end_of_track", time=0))
+    midi.save(path)
+
+
+def transcribe_file(path: str, out_path: str, polyphonic: bool = False,
+                    **options) -> Tuple[str, str, float, int]:
+    """Transcribe one audio file into ``out_path``.
+
+    ``options`` go to :func:`transcribe_signal`, or to
+    :func:`~midiline.polyphonic.transcribe_polyphonic` when ``polyphonic`` is
+    set. Returns ``(path, out_path, audio_seconds, note_count)``. Defined at
+    module level so it can be dispatched to a process pool.
+    """
+    signal, sr = load_audio(path)
+    transcribe = transcribe_polyphonic if polyphonic else transcribe_signal
+    events = transcribe(signal, sr, **options)
+    write_midi(events, out_path)
+    return path, out_path, len(signal) / sr, len(events)
@@ -0,0 +1,43 @@
+import os, sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+import numpy as np
+import pytest
+
+pyaudio = pytest.importorskip("pyaudio")
+
+from src.midiline import audio_input
+
+
+class FakeStream:
+    def stop_stream(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class FakePyAudio:
+    def open(self, **kwargs):
+        return FakeStream()
+
+    def terminate(self):
+        pass
+
+
+def test_callback_mode_fills_ring_and_counts_overflows(monkeypatch):
+    monkeypatch.setattr(audio_input.pyaudio, "PyAudio", FakePyAudio)
+    ai = audio_input.AudioInput(buffer_size=4, callback=True, ring_blocks=2)
+    ai.open()
+    block = np.array([0, 16384, -32768, 32767], dtype=np.int16).tobytes()
+    times = {"current_time": 10.0, "input_buffer_adc_time": 9.99}
+    for _ in range(3):
+        ai._on_audio(block, 4, times, 0)
+    assert ai.overflows == 1
+
+    frames = ai.frames()
+    first = next(frames)
+    assert first.dtype == np.float32
+    assert np.allclose(first, [0.0, 0.5, -1.0, 32767 / 32768])
+    assert np.shares_memory(first, ai._ring)
+    next(frames)
+    ai.close()
@@ -0,0 +1,30 @@
+import os, sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+import pytest
+
+mido = pytest.importorskip("mido")
+
+from src.midiline.bench import signals
+from src.midiline.bench.replay import replay
+
+
+def test_replay_sines_reports_latency_and_timing():
+    original = mido.open_output
+    signal, truth = signals.sines(notes=(57, 69), sr=22050)
+    result = replay(signal, 22050, 256, truth=truth, window_size=2048)
+    summary = result.summary()
+    assert mido.open_output is original
+    assert summary["blocks"] == len(signal) // 256
+    assert summary["missed"] == 0
+    assert 0.0 <= summary["onset_latency_ms"] < 500.0
+    assert summary["realtime_factor"] > 1.0
+    assert result.stats["blocks"] == summary["blocks"]
+
+
+def test_replay_is_deterministic():
+    signal, truth = signals.plucks(notes=(45, 52), sr=22050)
+    first = replay(signal, 22050, 512, truth=truth, window_size=2048)
+    second = replay(signal, 22050, 512, truth=truth, window_size=2048)
+    assert [(t, m.bytes()) for t, m in first.messages] == [
+        (t, m.bytes()) for t, m in second.messages
+    ]
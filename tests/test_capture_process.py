@@ -0,0 +1,131 @@
+import os, sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+import time
+
+import numpy as np
+import pytest
+
+from src.midiline.capture_process import (
+    CaptureProcess, MeterRing, build_processor, drain_commands,
+)
+
+
+class FakeProcessor:
+    # Like RealTimeProcessor, the constructor takes only some parameters.
+    def __init__(self, amp_threshold=0.01, buffer_size=1024):
+        self.amp_threshold = amp_threshold
+        self.smoothing = 0.4
+        self.cutoff = None
+
+    def update(self, **changes):
+        for name, value in changes.items():
+            setattr(self, name, value)
+
+
+def fake_capture(config, meter_name, commands, stop):
+    meters = MeterRing(meter_name, capacity=config["meter_capacity"])
+    processor = build_processor(config, FakeProcessor)
+    step = 0
+    while not stop.is_set():
+        drain_commands(commands, processor)
+        meters.write(step, processor.amp_threshold, 440.0, 69)
+        step += 1
+        time.sleep(0.005)
+    meters.close()
+
+
+def wait_for(predicate, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def test_meter_ring_wraps():
+    ring = MeterRing(capacity=4)
+    try:
+        assert ring.latest() is None
+        for i in range(6):
+            ring.write(i, 0.1 * i, 440.0, 69)
+        assert ring.latest()["time"] == 5
+        assert list(ring.history()[:, 0]) == [2, 3, 4, 5]
+        reader = MeterRing(ring.name, capacity=4)
+        assert reader.latest() == ring.latest()
+        reader.close()
+    finally:
+        ring.close()
+        ring.unlink()
+
+
+def test_capture_process_commands_and_restart():
+    capture = CaptureProcess({"processor": {"amp_threshold": 0.01}}, target=fake_capture)
+    capture.start()
+    try:
+        assert wait_for(lambda: capture.meter() is not None)
+        capture.set("amp_threshold", 0.5)
+        assert wait_for(lambda: capture.meter()["level"] == 0.5)
+        with pytest.raises(ValueError):
+            capture.set("bogus", 1)
+        # Not a constructor argument: the restart must still come up.
+        capture.set("smoothing", 0.8)
+
+        capture._process.kill()
+        assert wait_for(lambda: not capture.is_alive())
+        assert capture.check()
+        assert capture.restarts == 1
+        count = capture.meters.count
+        assert wait_for(lambda: capture.meters.count > count)
+        # The restarted child keeps the parameters sent before the crash.
+        assert capture.meter()["level"] == 0.5
+        child = capture._process
+    finally:
+        capture.stop()
+    assert child.exitcode == 0
+
+
+def test_build_processor_applies_parameters_after_construction():
+    processor = build_processor(
+        {"processor": {"buffer_size": 256, "smoothing": 0.7}, "params": {"amp_threshold": 0.3}},
+        FakeProcessor,
+    )
+    assert (processor.smoothing, processor.amp_threshold) == (0.7, 0.3)
+
+
+def test_capture_process_keeps_parameters_out_of_constructor_options(monkeypatch):
+    started = []
+
+    class RecordingProcess:
+        def __init__(self, target, args, **kwargs):
+            started.append(args[0])
+
+        def start(self):
+            pass
+
+        def is_alive(self):
+            return False
+
+    capture = CaptureProcess({"processor": {"buffer_size": 256}}, target=fake_capture)
+    monkeypatch.setattr(capture._ctx, "Process", RecordingProcess)
+    try:
+        capture.set("gate_threshold", 0.1)
+        capture.start()
+    finally:
+        capture._process = None
+        capture.stop()
+    assert started[0]["processor"] == {"buffer_size": 256}
+    assert started[0]["params"] == {"gate_threshold": 0.1}
+
+
+def test_capture_process_child_uses_parent_meter_capacity():
+    capture = CaptureProcess({"processor": {}}, target=fake_capture, meter_capacity=4)
+    capture.start()
+    try:
+        assert wait_for(lambda: capture.meters.count > 10)
+        assert len(capture.meters.history()) == 4
+        # Consecutive steps: the child wraps at the same index as the reader.
+        # Three of four slots, so a write during the copy cannot land in them.
+        assert np.array_equal(np.diff(capture.meters.history(3)[:, 0]), [1, 1])
+    finally:
+        capture.stop()
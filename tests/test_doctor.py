@@ -0,0 +1,35 @@
+import os, sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+import subprocess
+
+from src.midiline import doctor
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+
+def test_cli_import_stays_light():
+    code = (
+        "import sys; import src.midiline.cli; "
+        "print(sorted(m for m in ('numpy', 'scipy', 'mido', 'sounddevice') if m in sys.modules))"
+    )
+    result = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == "[]"
+
+
+def test_processor_without_filters_skips_scipy():
+    code = (
+        "import sys; from src.midiline.pitch_engines import create_engine; "
+        "from src.midiline.realtime import NoiseGate; "
+        "create_engine('yin', 1024, 44100); print('scipy' in sys.modules)"
+    )
+    result = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == "False"
+
+
+def test_dependency_report_and_import_time():
+    report = {module: installed for module, installed, _ in doctor.dependency_report()}
+    assert report["numpy"]
+    assert doctor.import_time("json", repeat=1) > 0
+    assert doctor.import_time("midiline_no_such_module", repeat=1) is None
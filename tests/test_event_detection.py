@@ -21,3 +21,22 @@ def test_detect_note_events_simple():
     assert abs(events[0].start - 0.0) < 0.01
     assert abs(events[0].end - 0.5) < 0.05
     assert events[0].amplitude > events[1].amplitude
+
+
+def test_streaming_detector_matches_batch_boundaries():
+    from event_detection import NoteEventDetector
+
+    sr = 22050
+    t = np.linspace(0, 1.0, sr, endpoint=False)
+    tone = np.sin(2 * np.pi * 440 * t[: sr // 2])
+    signal = np.concatenate([tone, np.zeros(sr // 3), 0.5 * tone])
+
+    expected = detect_note_events(signal, sr, energy_threshold=0.1)
+    detector = NoteEventDetector(sr, energy_threshold=0.1)
+    events = []
+    for start in range(0, len(signal), 700):
+        events.extend(detector.feed(signal[start:start + 700]))
+    events.extend(detector.finish())
+
+    assert [(e.start, e.end) for e in events] == [(e.start, e.end) for e in expected]
+    assert all(0.0 < e.amplitude <= 1.0 for e in events)
@@ -0,0 +1,136 @@
+import os, sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+import json
+
+import numpy as np
+import pytest
+
+mido = pytest.importorskip("mido")
+
+from src.midiline import host
+
+
+class CapturePort:
+    def __init__(self, name):
+        self.name = name
+        self.messages = []
+
+    def send(self, msg):
+        self.messages.append(msg)
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def ports(monkeypatch):
+    opened = {}
+
+    def open_output(name, **kwargs):
+        return opened.setdefault(name, CapturePort(name))
+
+    monkeypatch.setattr(host.mido, "open_output", open_output)
+    return opened
+
+
+def test_normalize_config_checks_entries():
+    config = host.normalize_config({
+        "defaults": {"amp_threshold": 0.02, "latency": 5},
+        "instances": [
+            {"device": 1, "input_channel": 2, "midi_channel": 3, "cutoff": 40},
+            {"name": "b", "polyphonic": True},
+        ],
+    })
+    first, second = config["instances"]
+    assert first["name"] == "entrada1"
+    assert (first["input_channel"], first["midi_channel"]) == (1, 2)
+    assert first["options"] == {"amp_threshold": 0.02, "cutoff": 40}
+    assert first["latency"] == 0.005
+    assert second["polyphonic"] and second["device"] is None
+
+    with pytest.raises(ValueError, match="no instances"):
+        host.normalize_config({"instances": []})
+    with pytest.raises(ValueError, match="unknown key"):
+        host.normalize_config({"instances": [{"bogus": 1}]})
+    with pytest.raises(ValueError, match="duplicate"):
+        host.normalize_config({"instances": [{"name": "a"}, {"name": "a"}]})
+    with pytest.raises(ValueError, match="same latency"):
+        host.normalize_config({"instances": [{"name": "a", "latency": 5}, {"name": "b"}]})
+    with pytest.raises(ValueError, match="pitch_engine"):
+        host.normalize_config({"instances": [{"pitch_engine": "nope"}]})
+    with pytest.raises(ValueError, match="amp_threshold must be a number"):
+        host.normalize_config({"instances": [{"amp_threshold": "alto"}]})
+    options = host.normalize_config(
+        {"instances": [{"hop_size": "128", "cutoff": None, "gate_threshold": "0.1"}]}
+    )["instances"][0]["options"]
+    assert options == {"hop_size": 128, "cutoff": None, "gate_threshold": 0.1}
+
+
+def test_load_config_reads_example():
+    path = os.path.join(os.path.dirname(__file__), "..", "examples", "stage.json")
+    config = host.load_config(path)
+    assert [entry["name"] for entry in config["instances"]] == ["voz", "bajo", "guitarra"]
+
+
+def test_stage_host_groups_devices_and_shares_ports(ports, tmp_path):
+    path = tmp_path / "stage.json"
+    path.write_text(json.dumps({
+        "buffer_size": 256,
+        "workers": 2,
+        "instances": [
+            {"name": "a", "device": 1, "input_channel": 1, "midi_port": "X"},
+            {"name": "b", "device": 1, "input_channel": 3, "midi_port": "Y", "midi_channel": 2},
+            {"name": "c", "device": 2, "input_channel": 2, "midi_port": "X", "midi_channel": 3},
+        ],
+    }))
+    stage = host.StageHost(host.load_config(str(path)))
+    assert sorted(ports) == ["X", "Y"]
+    assert [group.channels for group in stage.groups] == [3, 2]
+    sr = 44100
+    t = np.arange(sr // 4) / sr
+    first = np.zeros((len(t), 3), dtype=np.float32)
+    first[:, 0] = 0.5 * np.sin(2 * np.pi * 220.0 * t)
+    first[:, 2] = 0.5 * np.sin(2 * np.pi * 440.0 * t)
+    second = np.zeros((len(t), 2), dtype=np.float32)
+    second[:, 1] = 0.5 * np.sin(2 * np.pi * 330.0 * t)
+    for start in range(0, len(t) - 255, 256):
+        stage.groups[0].process_block(first[start:start + 256])
+        stage.groups[1].process_block(second[start:start + 256])
+    stats = stage.stats()
+    stage.close()
+
+    last = {}
+    for port in ports.values():
+        for msg in port.messages:
+            if msg.type == "note_on":
+                last[(port.name, msg.channel)] = msg.note
+    assert last == {("X", 0): 57, ("Y", 1): 69, ("X", 2): 64}
+    assert [entry["name"] for entry in stats["instances"]] == ["a", "b", "c"]
+    assert all(entry["cpu"] > 0 for entry in stats["instances"])
+    assert stats["devices"][0]["callback"]["count"] == len(range(0, len(t) - 255, 256))
+
+
+def test_stage_host_closes_what_it_opened_on_failure(ports, monkeypatch):
+    closed = []
+    monkeypatch.setattr(CapturePort, "close", lambda self: closed.append(self.name))
+    config = host.normalize_config({
+        "instances": [
+            {"name": "a", "midi_port": "X"},
+            {"name": "b", "midi_port": "Y", "window_size": 128, "hop_size": 256},
+        ],
+    })
+    with pytest.raises(ValueError, match="hop_size"):
+        host.StageHost(config)
+    assert sorted(closed) == ["X", "Y"]
+
+
+def test_stage_host_applies_parameter_options(ports):
+    config = host.normalize_config({
+        "instances": [{"name": "a", "smoothing": 0.8, "gate_threshold": 0.02, "cutoff": 60}],
+    })
+    stage = host.StageHost(config, threaded_output=False)
+    processor = stage.instances[0].processor
+    processor.process_block(np.zeros(256, dtype=np.float32))
+    assert processor.smoothing == 0.8
+    assert processor.gate.threshold == 0.02 and processor.highpass.cutoff == 60.0
+    stage.close()
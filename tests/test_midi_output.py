@@ -0,0 +1,68 @@
+import os, sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+import threading
+import time
+
+import pytest
+
+mido = pytest.importorskip("mido")
+
+from src.midiline import midi_output
+from src.midiline.events import NoteEvent
+
+
+class CapturePort:
+    def __init__(self):
+        self.messages = []
+
+    def send(self, msg):
+        self.messages.append((time.perf_counter(), msg))
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def output(monkeypatch):
+    port = CapturePort()
+    monkeypatch.setattr(midi_output.mido, "open_output", lambda *a, **k: port)
+    return midi_output.MidiOutput()
+
+
+def test_overlapping_notes_play_concurrently(output):
+    events = [
+        NoteEvent(start=0.0, end=0.1, note=60, velocity=100),
+        NoteEvent(start=0.02, end=0.12, note=64, velocity=100),
+        NoteEvent(start=0.04, end=0.14, note=67, velocity=100),
+    ]
+    start = time.perf_counter()
+    output.play(events)
+    elapsed = time.perf_counter() - start
+    sent = [(m.type, m.note) for _, m in output.port.messages]
+    assert sent[:3] == [("note_on", 60), ("note_on", 64), ("note_on", 67)]
+    assert sent[3:] == [("note_off", 60), ("note_off", 64), ("note_off", 67)]
+    assert elapsed < 0.25
+
+
+def test_events_can_be_streamed_into_running_playback(output):
+    player = threading.Thread(target=output.play, kwargs={"hold": True})
+    player.start()
+    output.schedule([NoteEvent(start=0.0, end=0.01, note=60, velocity=90)])
+    time.sleep(0.03)
+    output.schedule([NoteEvent(start=0.04, end=0.05, note=62, velocity=90)])
+    time.sleep(0.05)
+    output.stop()
+    player.join(1.0)
+    notes = [m.note for _, m in output.port.messages if m.type == "note_on"]
+    assert notes == [60, 62]
+
+
+def test_zero_length_note_is_released_after_its_on(output):
+    output.play([
+        NoteEvent(start=0.01, end=0.01, note=60, velocity=100),
+        NoteEvent(start=0.0, end=0.01, note=64, velocity=100),
+    ])
+    sent = [(m.type, m.note) for _, m in output.port.messages]
+    assert sent == [
+        ("note_on", 64), ("note_off", 64), ("note_on", 60), ("note_off", 60),
+    ]
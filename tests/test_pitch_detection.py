@@ -2,6 +2,9 @@ import os, sys
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 import numpy as np
 from src.pitch_detection import yin, pitch_track
+from src.midiline.pitch_detection import (
+    CoarseToFineYin, DifferenceFunction, FastYin, pitch_track as pitch_track_pkg, yin as yin_pkg,
+)
 
 
 def generate_sine(freq: float, sr: int, duration: float) -> np.ndarray:
@@ -22,3 +25,67 @@ def test_pitch_track_smoothing():
     pitches = pitch_track(tone, sr, frame_size=1024, hop_size=512, smooth=7)
     median_pitch = np.median(pitches)
     assert abs(median_pitch - 220.0) < 1.0
+
+
+def test_difference_function_matches_direct_sum():
+    rng = np.random.default_rng(0)
+    frame = rng.standard_normal(1024)
+    max_tau = len(frame) // 2
+    expected = np.zeros(max_tau)
+    for tau in range(1, max_tau):
+        delta = frame[:max_tau] - frame[tau:tau + max_tau]
+        expected[tau] = np.dot(delta, delta)
+    assert np.allclose(DifferenceFunction(len(frame))(frame), expected)
+
+
+def test_fast_yin_matches_yin():
+    sr = 44100
+    tone = generate_sine(196.0, sr, 0.1)[:2048]
+    detector = FastYin(2048, sr)
+    assert abs(detector(tone.astype(np.float32)) - yin_pkg(tone, sr)) < 1e-3
+    assert abs(detector(tone) - 196.0) < 1.0
+
+
+def test_batched_pitch_track_matches_scalar_yin():
+    sr = 22050
+    rng = np.random.default_rng(3)
+    t = np.arange(sr) / sr
+    signal = np.sin(2 * np.pi * (150 + 40 * t) * t) + 0.05 * rng.standard_normal(sr)
+    expected = [yin_pkg(signal[s:s + 1024], sr) for s in range(0, sr - 1024 + 1, 256)]
+    pitches = pitch_track_pkg(signal, sr, frame_size=1024, hop_size=256, smooth=1,
+                              chunk_frames=7)
+    assert np.allclose(pitches, expected)
+
+
+def test_coarse_to_fine_matches_yin_on_guitar_range():
+    sr = 44100
+    detector = CoarseToFineYin(2048, sr, max_freq=1500.0)
+    t = np.arange(2048) / sr
+    errors = []
+    for freq in (82.41, 110.0, 146.83, 196.0, 246.94, 329.63, 659.26, 1318.5):
+        frame = np.sin(2 * np.pi * freq * t) + 0.5 * np.sin(4 * np.pi * freq * t + 1.0)
+        errors.append(abs(1200 * np.log2(detector(frame) / yin_pkg(frame, sr))))
+    assert max(errors) < 1.0
+
+
+def test_pitch_track_coarse_search():
+    sr = 22050
+    tone = generate_sine(220.0, sr, 1.0)
+    pitches = pitch_track_pkg(tone, sr, frame_size=1024, hop_size=512, search="coarse")
+    assert abs(np.median(pitches) - 220.0) < 1.0
+
+
+def test_tracking_yin_follows_vibrato_and_falls_back():
+    sr = 44100
+    t = np.arange(sr) / sr
+    freqs = 220.0 * 2 ** (0.3 * np.sin(2 * np.pi * 5 * t) / 12)
+    signal = np.sin(2 * np.pi * np.cumsum(freqs) / sr)
+    signal[sr // 2:] = np.sin(2 * np.pi * np.cumsum(2 * freqs)[sr // 2:] / sr)
+    tracker = FastYin(2048, sr, tracking=True)
+    full = FastYin(2048, sr)
+    for start in range(0, sr - 2048, 256):
+        frame = signal[start:start + 2048]
+        assert abs(1200 * np.log2(tracker(frame) / full(frame))) < 5.0
+    counters = tracker.counters
+    assert counters["tracked"] > 10 * counters["full"]
+    assert counters["confidence"] + counters["edge"] + counters["octave"] >= 1
@@ -0,0 +1,64 @@
+import os, sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+import numpy as np
+import pytest
+
+from src.midiline.pitch_engines import available_engines, create_engine, engine_names
+
+
+def harmonic_tone(freq: float, sr: int, size: int, harmonics: int = 5) -> np.ndarray:
+    t = np.arange(size) / sr
+    return sum(np.sin(2 * np.pi * freq * h * t) / h for h in range(1, harmonics + 1))
+
+
+def test_available_engines_agree_on_harmonic_tone():
+    sr = 44100
+    assert {"yin", "yin-coarse", "yin-track", "hps"} <= set(available_engines())
+    for name in available_engines():
+        engine = create_engine(name, 2048, sr, min_freq=60.0, max_freq=2000.0)
+        for freq in (110.0, 220.0, 440.0, 880.0):
+            f0 = engine(harmonic_tone(freq, sr, 2048))
+            assert abs(1200 * np.log2(f0 / freq)) < 30, (name, freq, f0)
+        engine.reset()
+
+
+def test_hps_handles_pure_tones_and_silence():
+    sr = 44100
+    engine = create_engine("hps", 2048, sr)
+    t = np.arange(2048) / sr
+    for freq in (82.4, 220.0, 880.0, 1318.5):
+        f0 = engine(np.sin(2 * np.pi * freq * t))
+        assert abs(1200 * np.log2(f0 / freq)) < 30
+    assert engine(np.zeros(2048)) == 0.0
+
+
+def test_unknown_or_missing_engine():
+    with pytest.raises(ValueError):
+        create_engine("nope", 1024, 44100)
+    for name in set(engine_names()) - set(available_engines()):
+        with pytest.raises(ImportError):
+            create_engine(name, 1024, 44100)
+
+
+@pytest.mark.parametrize("name", ["aubio-yinfft", "aubio-yinfast"])
+def test_aubio_engines_detect_sine_with_default_threshold(name):
+    pytest.importorskip("aubio")
+    sr = 44100
+    engine = create_engine(name, 2048, sr)
+    t = np.arange(2048) / sr
+    for freq in (110.0, 440.0, 880.0):
+        f0 = engine(0.5 * np.sin(2 * np.pi * freq * t))
+        assert abs(1200 * np.log2(f0 / freq)) < 30, (name, freq, f0)
+
+
+def test_cli_rejects_engine_without_its_backend():
+    import importlib.util
+
+    if importlib.util.find_spec("aubio") is not None:
+        pytest.skip("aubio is installed")
+    from click.testing import CliRunner
+    from src.midiline.cli import cli
+
+    result = CliRunner().invoke(cli, ["record", "--pitch-engine", "aubio-yinfft"])
+    assert result.exit_code == 2
+    assert "aubio" in result.output and "Traceback" not in result.output
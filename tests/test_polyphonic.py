@@ -0,0 +1,69 @@
+import os, sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+import numpy as np
+import pytest
+
+mido = pytest.importorskip("mido")
+
+from src.midiline.bench import signals
+from src.midiline.bench.replay import replay
+from src.midiline.polyphonic import (
+    PolyNoteTracker,
+    PolyphonicDetector,
+    PolyphonicProcessor,
+    midi_to_hz,
+    transcribe_polyphonic,
+)
+
+
+def harmonic_notes(notes, sr, duration):
+    t = np.arange(int(sr * duration)) / sr
+    out = np.zeros(len(t))
+    for note in notes:
+        for h in range(1, 7):
+            out += np.sin(2 * np.pi * midi_to_hz(note) * h * t) * 0.8 ** h
+    return out / (3 * len(notes))
+
+
+def test_detector_finds_triad_and_octave():
+    sr = 44100
+    detector = PolyphonicDetector(4096, sr)
+    mask = detector(harmonic_notes((60, 64, 67), sr, 0.1))
+    assert list(detector.notes[mask]) == [60, 64, 67]
+    mask = detector(harmonic_notes((45, 57), sr, 0.1))
+    assert list(detector.notes[mask]) == [45, 57]
+    assert not detector(np.zeros(4096)).any()
+
+
+def test_tracker_hysteresis():
+    tracker = PolyNoteTracker(np.arange(60, 63), onset_frames=2, release_frames=2)
+    on = np.array([True, False, True])
+    assert len(tracker.update(on)[0]) == 0
+    started, _ = tracker.update(on)
+    assert list(started) == [0, 2]
+    _, stopped = tracker.update(np.array([True, False, False]))
+    assert len(stopped) == 0
+    _, stopped = tracker.update(np.array([True, False, False]))
+    assert list(stopped) == [2]
+    assert list(tracker.release_all()) == [0]
+
+
+def test_transcribe_polyphonic_overlapping_notes():
+    sr = 22050
+    signal = harmonic_notes((60,), sr, 1.0)
+    signal[sr // 2:] += harmonic_notes((64,), sr, 0.5)
+    events = transcribe_polyphonic(signal, sr, frame_size=2048, hop_size=256)
+    notes = {event.note: event for event in events}
+    assert set(notes) == {60, 64}
+    assert notes[60].start < 0.1 and notes[60].end > 0.9
+    assert 0.4 < notes[64].start < 0.55
+    assert notes[64].start < notes[60].end
+
+
+def test_polyphonic_processor_plays_chords():
+    signal, truth = signals.chords(chords=((48, 52, 55),), sr=22050)
+    result = replay(signal, 22050, 512, truth=truth, processor_class=PolyphonicProcessor)
+    assert result.missed == 0
+    ons = [msg for _, msg in result.messages if msg.type == "note_on"]
+    offs = [msg for _, msg in result.messages if msg.type == "note_off"]
+    assert sorted(m.note for m in ons) == sorted(m.note for m in offs)
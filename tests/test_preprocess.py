@@ -4,6 +4,10 @@ import numpy as np
 import pytest
 
 from src.preprocess import normalize, frame_audio
+from src.preprocess import highpass_filter as hp_root
+from src.midiline.preprocess import HighPassFilter, design_highpass
+from src.midiline.preprocess import frame_audio as frame_pkg
+from src.midiline.preprocess import highpass_filter as hp_pkg
 
 
 def test_normalize_range():
@@ -18,9 +22,6 @@ def test_frame_audio_shape():
     assert frames.shape == (4, 4)
     assert np.all(frames[0] == np.array([0, 1, 2, 3]))
 
-from src.preprocess import highpass_filter as hp_root
-from src.midiline.preprocess import highpass_filter as hp_pkg
-
 
 def test_highpass_filter_preserves_dtype_root():
     audio = np.random.rand(1024).astype(np.float32)
@@ -32,3 +33,31 @@ def test_highpass_filter_preserves_dtype_pkg():
     audio = np.random.rand(1024).astype(np.float32)
     filt = hp_pkg(audio, cutoff=1000, fs=44100)
     assert filt.dtype == np.float32
+
+
+def test_highpass_stage_is_continuous_across_blocks():
+    audio = np.random.default_rng(1).standard_normal(4096).astype(np.float32)
+    whole = HighPassFilter(200, fs=44100).process(audio)
+    stage = HighPassFilter(200, fs=44100)
+    blocks = [stage.process(audio[i:i + 256]) for i in range(0, len(audio), 256)]
+    assert np.allclose(np.concatenate(blocks), whole, atol=1e-5)
+    assert stage.sos is design_highpass(200.0, 44100.0, 5)
+
+
+def test_highpass_stage_settles_on_a_constant():
+    stage = HighPassFilter(80, fs=44100)
+    stage.settle(0.25)
+    out = stage.process(np.full(256, 0.25, dtype=np.float32))
+    assert np.abs(out).max() < 1e-5
+
+
+def test_frame_audio_pkg_returns_read_only_view():
+    audio = np.arange(10, dtype=np.float32)
+    frames = frame_pkg(audio, frame_size=4, hop_size=2)
+    assert frames.shape == (4, 4)
+    assert frames.dtype == np.float32
+    assert np.shares_memory(frames, audio)
+    assert not frames.flags.writeable
+    copied = frame_pkg(audio, frame_size=4, hop_size=2, copy=True)
+    assert copied.flags.writeable and not np.shares_memory(copied, audio)
+    assert np.array_equal(copied, frames)
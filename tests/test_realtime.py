@@ -0,0 +1,314 @@
+import os, sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+import numpy as np
+import pytest
+
+mido = pytest.importorskip("mido")
+
+from src.midiline import realtime
+from src.midiline.ringbuffer import RingBuffer
+
+
+class CapturePort:
+    def __init__(self):
+        self.messages = []
+
+    def send(self, msg):
+        self.messages.append(msg)
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def port(monkeypatch):
+    capture = CapturePort()
+    monkeypatch.setattr(realtime.mido, "open_output", lambda *a, **k: capture)
+    return capture
+
+
+def test_ring_buffer_keeps_latest_samples():
+    ring = RingBuffer(5)
+    ring.write(np.arange(3))
+    ring.write(np.arange(3, 7))
+    assert np.array_equal(ring.view(), [2, 3, 4, 5, 6])
+    ring.write(np.arange(10, 20))
+    assert np.array_equal(ring.view(), [15, 16, 17, 18, 19])
+
+
+def test_small_blocks_use_full_window(port):
+    sr = 44100
+    processor = realtime.RealTimeProcessor(
+        buffer_size=64, samplerate=sr, window_size=2048, hop_size=256
+    )
+    t = np.arange(sr // 4) / sr
+    tone = (0.5 * np.sin(2 * np.pi * 440.0 * t)).astype(np.float32)
+    for start in range(0, len(tone), 64):
+        processor.process_block(tone[start:start + 64])
+    processor.close()
+    notes = [m.note for m in port.messages if m.type == "note_on"]
+    assert notes and notes[-1] == 69
+
+
+def test_note_queue_drops_when_full():
+    from src.midiline.midi_sender import NOTE_ON, NoteQueue
+
+    queue = NoteQueue(2)
+    assert queue.push(NOTE_ON, 60, 100, 0, 1.5)
+    assert queue.push(NOTE_ON, 62, 100, 0)
+    assert not queue.push(NOTE_ON, 64, 100, 0)
+    assert queue.dropped == 1
+    assert queue.pop() == (NOTE_ON, 60, 100, 0, 1.5)
+    assert len(queue) == 1
+
+
+def test_stats_report_stage_timings(port):
+    processor = realtime.RealTimeProcessor(buffer_size=256, samplerate=44100, cutoff=80.0)
+    block = (0.5 * np.sin(2 * np.pi * 440.0 * np.arange(256) / 44100)).astype(np.float32)
+    for _ in range(4):
+        processor.process_block(block)
+    stats = processor.stats()
+    processor.close()
+    assert stats["blocks"] == 4
+    assert stats["stages"]["yin"]["count"] == 4
+    assert stats["stages"]["filter"]["count"] == 4
+    assert stats["stages"]["gate"]["count"] == 0
+    assert stats["midi"]["dropped"] == 0
+
+
+def test_activity_gate_skips_silence(port):
+    sr = 44100
+    processor = realtime.RealTimeProcessor(buffer_size=256, samplerate=sr)
+    silence = np.zeros(256, dtype=np.float32)
+    tone = (0.5 * np.sin(2 * np.pi * 220.0 * np.arange(256 * 20) / sr)).astype(np.float32)
+    for _ in range(10):
+        processor.process_block(silence)
+    for start in range(0, len(tone), 256):
+        processor.process_block(tone[start:start + 256])
+    for _ in range(10):
+        processor.process_block(silence)
+    stats = processor.stats()
+    processor.close()
+    assert stats["skipped"] >= 15
+    assert stats["stages"]["yin"]["count"] + stats["skipped"] == 40
+    notes = [m.note for m in port.messages if m.type == "note_on"]
+    assert notes and notes[-1] == 57
+    assert port.messages[-1].type == "note_off"
+
+
+def test_activity_gate_holds_for_hold_hops():
+    gate = realtime.ActivityGate(0.1, hold=2)
+    tone = np.sin(np.arange(256) / 10.0)
+    quiet = np.zeros(256)
+    assert gate.update(0.5, tone)
+    assert gate.update(0.0, quiet)
+    assert not gate.update(0.0, quiet)
+
+
+def test_multichannel_routes_channels_to_midi_channels(port, monkeypatch):
+    from src.midiline import multichannel
+
+    monkeypatch.setattr(multichannel.mido, "open_output", lambda *a, **k: port)
+    sr = 44100
+    processor = multichannel.MultiChannelProcessor(
+        [0, 2], buffer_size=256, samplerate=sr, window_size=2048, workers=2
+    )
+    assert processor.num_device_channels == 3
+    t = np.arange(sr // 4) / sr
+    block = np.zeros((len(t), 3), dtype=np.float32)
+    block[:, 0] = 0.5 * np.sin(2 * np.pi * 220.0 * t)
+    block[:, 1] = 0.5 * np.sin(2 * np.pi * 330.0 * t)
+    block[:, 2] = 0.5 * np.sin(2 * np.pi * 440.0 * t)
+    for start in range(0, len(t) - 255, 256):
+        processor.process_block(block[start:start + 256])
+    processor.close()
+    last = {}
+    for msg in port.messages:
+        if msg.type == "note_on":
+            last[msg.channel] = msg.note
+    assert last == {0: 57, 1: 69}
+
+
+def test_events_carry_sample_accurate_onset(port):
+    sr = 44100
+    processor = realtime.RealTimeProcessor(
+        buffer_size=256, samplerate=sr, window_size=2048, threaded_output=False
+    )
+    onset = 10000
+    signal = np.zeros(sr // 2, dtype=np.float32)
+    t = np.arange(len(signal) - onset) / sr
+    signal[onset:] = 0.5 * np.sin(2 * np.pi * 440.0 * t)
+    for i in range(len(signal) // 256):
+        processor.process_block(signal[i * 256:(i + 1) * 256], time=100.0 + i * 256 / sr)
+    kind, _, _, _, stamp = processor.events.pop()
+    assert kind == 1
+    assert abs(stamp - (100.0 + onset / sr)) < 0.001
+    processor.close()
+
+
+def test_sender_holds_notes_for_constant_latency():
+    import time
+    from src.midiline.midi_sender import NOTE_ON, MidiSender, NoteQueue
+
+    class Port:
+        def __init__(self):
+            self.sent = []
+
+        def send(self, msg):
+            self.sent.append((time.perf_counter(), msg))
+
+    out = Port()
+    queue = NoteQueue(8)
+    sender = MidiSender(out, queue, latency=0.05)
+    stamp = time.perf_counter()
+    queue.push(NOTE_ON, 60, 100, 0, stamp)
+    assert sender.drain() == 0
+    sender.start()
+    time.sleep(0.1)
+    sender.stop()
+    assert len(out.sent) == 1
+    assert 0.05 <= out.sent[0][0] - stamp < 0.07
+    assert sender.stats()["late"]["count"] == 1
+
+
+def test_update_applies_at_block_boundary(port):
+    sr = 44100
+    processor = realtime.RealTimeProcessor(buffer_size=256, samplerate=sr, threaded_output=False)
+    tone = (0.5 * np.sin(2 * np.pi * 440.0 * np.arange(256 * 20) / sr)).astype(np.float32)
+    for start in range(0, 256 * 10, 256):
+        processor.process_block(tone[start:start + 256])
+    processor.sender.drain()
+    assert port.messages[-1].type == "note_on" and port.messages[-1].channel == 0
+
+    params = processor.update(channel=3, cutoff=80.0, amp_threshold=0.05)
+    assert params.channel == 3
+    # Nothing changes until the audio thread reaches the next block.
+    assert processor.channel == 0 and processor.highpass is None
+    processor.process_block(tone[2560:2816])
+    assert processor.channel == 3 and processor.highpass.cutoff == 80.0
+    assert processor.activity.open_threshold == 0.05
+    for start in range(2816, len(tone), 256):
+        processor.process_block(tone[start:start + 256])
+    processor.close()
+    processor.sender.drain()
+    kinds = [(m.type, m.channel) for m in port.messages]
+    # The note sounding on the old channel ends there before the new one starts.
+    assert kinds.index(("note_off", 0)) < kinds.index(("note_on", 3))
+    assert kinds[-1] == ("note_off", 3)
+
+
+def test_update_carries_gate_and_filter_state(port):
+    from src.midiline.preprocess import HighPassFilter
+
+    sr = 44100
+    processor = realtime.RealTimeProcessor(
+        buffer_size=256, samplerate=sr, cutoff=80.0, gate_threshold=0.01,
+        threaded_output=False,
+    )
+    noise = np.random.default_rng(0).standard_normal(256 * 21)
+    signal = (0.2 + 0.2 * noise).astype(np.float32)
+    for start in range(0, 256 * 20, 256):
+        processor.process_block(signal[start:start + 256])
+    gate = processor.gate
+    assert gate.gain > 0.99
+    processor.update(gate_threshold=0.02, cutoff=100.0)
+    processor.process_block(signal[-256:])
+    assert processor.gate is not gate and processor.gate.gain > 0.99
+    # Started from silence, the new filter would ring on the 0.2 offset.
+    expected = HighPassFilter(100.0, sr).process(signal)[-256:]
+    assert np.abs(processor.ring.view()[-256:] - expected).max() < 0.05
+    processor.close()
+
+
+def test_prime_fills_window_without_notes(port):
+    sr = 44100
+    processor = realtime.RealTimeProcessor(buffer_size=256, samplerate=sr, window_size=1024)
+    tone = (0.5 * np.sin(2 * np.pi * 440.0 * np.arange(1024) / sr)).astype(np.float32)
+    for start in range(0, 1024, 256):
+        assert not processor.warm
+        processor.prime(tone[start:start + 256])
+    assert processor.warm
+    assert processor.blocks == 0 and len(processor.events) == 0
+    processor.close()
+
+
+def test_noise_gate_is_independent_of_block_size():
+    sr = 44100
+    t = np.arange(sr) / sr
+    signal = (0.5 * np.sin(2 * np.pi * 220.0 * t)).astype(np.float32)
+    signal[: sr // 8] *= 0.001
+    signal[3 * sr // 8:] *= 0.001
+    outputs = []
+    for block in (64, 1024):
+        gate = realtime.NoiseGate(0.05, attack=5.0, release=20.0, samplerate=sr)
+        out = np.concatenate([
+            gate.process(signal[start:start + block]).copy()
+            for start in range(0, len(signal), block)
+        ])
+        outputs.append(out)
+    assert np.allclose(outputs[0], outputs[1], atol=1e-6)
+    out = outputs[0]
+    assert np.abs(out[: sr // 8]).max() < 1e-4
+    # Fully open a few attack times after the tone starts, closed after release.
+    middle = slice(sr // 8 + sr // 20, 3 * sr // 8)
+    assert np.allclose(out[middle], signal[middle], atol=1e-3)
+    assert np.abs(out[3 * sr // 8 + sr // 5:]).max() < 1e-5
+
+
+def test_noise_gate_reuses_its_buffers():
+    gate = realtime.NoiseGate(0.05, samplerate=44100, block_size=256)
+    block = np.full(256, 0.1, dtype=np.float32)
+    first = gate.process(block)
+    second = gate.process(block)
+    assert first.dtype == np.float32
+    assert np.shares_memory(first, second)
+    assert len(gate.process(block[:0])) == 0
+
+
+def test_noise_gate_smoother_matches_recursion():
+    sr = 44100
+    x = np.abs(np.random.default_rng(0).standard_normal(3000))
+    for ms in (0.0, 0.05, 5.0):
+        smoother = realtime._OnePole(ms, sr, 256)
+        out = smoother.process(x, np.empty_like(x))
+        pole = realtime._one_pole(ms, sr)
+        expected = np.empty_like(x)
+        state = 0.0
+        for i, value in enumerate(x):
+            state = pole * state + (1.0 - pole) * value
+            expected[i] = state
+        assert np.allclose(out, expected, rtol=1e-9, atol=1e-12)
+
+
+def test_noise_gate_buffers_fit_the_audio_block(port):
+    processor = realtime.RealTimeProcessor(
+        buffer_size=512, samplerate=44100, hop_size=128, gate_threshold=0.01,
+        threaded_output=False,
+    )
+    processor.process_block(np.zeros(512, dtype=np.float32))
+    assert len(processor.gate._out) == 512
+    processor.close()
+
+
+def test_dropped_note_off_is_retried(port):
+    sr = 44100
+    processor = realtime.RealTimeProcessor(
+        buffer_size=256, samplerate=sr, queue_size=1, threaded_output=False
+    )
+    tone = (0.5 * np.sin(2 * np.pi * 440.0 * np.arange(256 * 20) / sr)).astype(np.float32)
+    for start in range(0, len(tone), 256):
+        processor.process_block(tone[start:start + 256])
+        processor.sender.drain()
+    assert processor.last_note == 69
+    processor.events.push(1, 60, 100, 0)
+    silence = np.zeros(256, dtype=np.float32)
+    # The queue is full, so the note-off cannot be pushed yet.
+    while processor.last_note is not None:
+        processor.process_block(silence)
+    dropped = processor.events.dropped
+    processor.process_block(silence)
+    assert processor.events.dropped == dropped
+    processor.sender.drain()
+    processor.process_block(silence)
+    processor.close()
+    assert port.messages[-1].type == "note_off" and port.messages[-1].note == 69
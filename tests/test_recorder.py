@@ -0,0 +1,85 @@
+import os, sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+import time
+
+import pytest
+
+mido = pytest.importorskip("mido")
+
+from src.midiline.midi_sender import NOTE_OFF, NOTE_ON, MidiSender, NoteQueue
+from src.midiline.recorder import MidiFileRecorder
+
+
+class NullPort:
+    def send(self, msg):
+        pass
+
+
+def notes(path):
+    seconds = 0.0
+    found = []
+    for msg in mido.MidiFile(path):
+        seconds += msg.time
+        if msg.type in ("note_on", "note_off"):
+            found.append((msg.type, msg.note, msg.channel, round(seconds, 3)))
+    return found
+
+
+def test_recorder_writes_sender_output(tmp_path):
+    path = str(tmp_path / "take.mid")
+    recorder = MidiFileRecorder(path, flush_interval=0.01)
+    recorder.start()
+    queue = NoteQueue(16)
+    sender = MidiSender(NullPort(), queue)
+    sender.add_sink(recorder)
+    origin = recorder.origin
+    queue.push(NOTE_ON, 60, 100, 2, origin + 0.5)
+    queue.push(NOTE_OFF, 60, 0, 2, origin + 1.25)
+    sender.drain()
+    # Each flush leaves a complete file behind, before stop() is called.
+    deadline = time.monotonic() + 5.0
+    while recorder.written < 2 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert notes(path) == [("note_on", 60, 2, 0.5), ("note_off", 60, 2, 1.25)]
+
+    queue.push(NOTE_ON, 64, 90, 2, origin + 2.0)
+    sender.drain()
+    recorder.stop()
+    # The note still sounding at the end is closed there.
+    assert notes(path)[-2:] == [("note_on", 64, 2, 2.0), ("note_off", 64, 2, 2.0)]
+    assert recorder.stats() == {"written": 4, "dropped": 0}
+
+
+def test_recorder_keeps_send_order(tmp_path):
+    path = str(tmp_path / "take.mid")
+    recorder = MidiFileRecorder(path, flush_interval=60.0)
+    recorder.start()
+    origin = recorder.origin
+    recorder.push((NOTE_ON, 60, 100, 1, origin - 1.0))
+    recorder.push((NOTE_OFF, 60, 0, 1, origin + 0.2))
+    # A re-attack stamped at its onset, before the previous note-off.
+    recorder.push((NOTE_ON, 60, 100, 1, origin + 0.1))
+    recorder.stop()
+    assert notes(path) == [
+        ("note_on", 60, 1, 0.0), ("note_off", 60, 1, 0.2), ("note_on", 60, 1, 0.2),
+        ("note_off", 60, 1, 0.2),
+    ]
+
+
+def test_recorder_never_drops_note_offs(tmp_path):
+    path = str(tmp_path / "take.mid")
+    recorder = MidiFileRecorder(path, flush_interval=60.0, queue_size=2)
+    recorder.start()
+    origin = recorder.origin
+    recorder.push((NOTE_ON, 60, 100, 0, origin + 0.1))
+    recorder.push((NOTE_ON, 62, 100, 0, origin + 0.2))
+    # The writer has not caught up: the offs wait, the new note is lost.
+    recorder.push((NOTE_OFF, 60, 0, 0, origin + 0.3))
+    recorder.push((NOTE_ON, 64, 100, 0, origin + 0.4))
+    recorder.push((NOTE_OFF, 62, 0, 0, origin + 0.5))
+    recorder.stop()
+    assert notes(path) == [
+        ("note_on", 60, 0, 0.1), ("note_on", 62, 0, 0.2),
+        ("note_off", 60, 0, 0.3), ("note_off", 62, 0, 0.5),
+    ]
+    assert recorder.dropped == 1
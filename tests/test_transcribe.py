@@ -0,0 +1,48 @@
+import os, sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+import numpy as np
+import pytest
+
+mido = pytest.importorskip("mido")
+from scipy.io import wavfile
+
+from src.midiline.transcribe import load_audio, transcribe_file
+
+
+def test_transcribe_file_writes_notes(tmp_path):
+    sr = 22050
+    t = np.arange(sr // 2) / sr
+    signal = np.concatenate([
+        0.8 * np.sin(2 * np.pi * 440.0 * t),
+        np.zeros(sr // 4),
+        0.4 * np.sin(2 * np.pi * 659.26 * t),
+    ])
+    wav_path = tmp_path / "take.wav"
+    wavfile.write(wav_path, sr, (signal * 32767).astype(np.int16))
+
+    audio, rate = load_audio(str(wav_path))
+    assert rate == sr and audio.dtype == np.float32
+    assert np.max(np.abs(audio)) <= 1.0
+
+    out_path = tmp_path / "take.mid"
+    _, _, seconds, count = transcribe_file(str(wav_path), str(out_path), energy_threshold=0.1)
+    assert abs(seconds - 1.25) < 1e-3
+    notes = [m.note for m in mido.MidiFile(str(out_path)) if m.type == "note_on"]
+    assert count == 2
+    assert notes == [69, 76]
+
+
+def test_cli_refuses_inputs_with_the_same_output(tmp_path):
+    from click.testing import CliRunner
+    from src.midiline.cli import cli
+
+    for folder in ("a", "b"):
+        (tmp_path / folder).mkdir()
+        wavfile.write(tmp_path / folder / "take1.wav", 8000, np.zeros(800, dtype=np.int16))
+    out_dir = tmp_path / "midi"
+    result = CliRunner().invoke(cli, [
+        "transcribe", str(tmp_path / "a"), str(tmp_path / "b"), "--output-dir", str(out_dir),
+    ])
+    assert result.exit_code == 2
+    assert "mismo archivo" in result.output
+    assert not out_dir.exists()